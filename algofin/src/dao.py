@@ -1,14 +1,58 @@
 import os
 import csv
+import json
+import pickle
 import time
-from objects import Price, Balance, Strategy
+import weakref
+from itertools import islice, repeat
+from objects import Price, Balance, Checkpoint, RunProfile, Strategy, StrategyProfile
+from price_cache import PriceCache, PriceColumns
+from results_sink import ResultsSink, MemorySink
+from parquet_sink import ParquetSink, read_parquet
+from sqlite_sink import SqliteSink, read_sqlite, max_ending_balance, max_balance_at_anytime
+from results import Results
+from logs import RunLog, get_logger, running
 from decimal import Decimal
 
+# specify constants
+CSV = 'csv'
+PARQUET = 'parquet'
+SQLITE = 'sqlite'
+MEMORY = 'memory'
+SINKS = {CSV: ResultsSink, PARQUET: ParquetSink, SQLITE: SqliteSink, MEMORY: MemorySink}
+CHECKPOINTS = 'checkpoints.pickle'
+PROFILE = 'profile.json'
+PROFILE_STATS = 'profile.prof'
+
+logger = get_logger('dao')
+
 
 class Dao:
-    def __init__(self):
+    def __init__(self, buffer_rows: int = 10000, backend: str = CSV, log_level: int = None):
+        """
+        Reads the pricing data and writes the results of a run to the ../results folder partitioned by init time, now
+
+        Parameters
+        ----------
+        buffer_rows
+            The number of result rows buffered in memory before they are written
+        backend
+            one of ['csv', 'parquet', 'sqlite', 'memory'], see BackTest
+        log_level
+            The level of the messages of the algofin loggers that are logged to run.log in the results folder until
+            close, e.g. logging.INFO; None for no log file
+
+        Returns
+        -------
+        Dao
+        """
         self.now = str(int(time.time()))
-        print('now:', self.now)
+        self.buffer_rows = buffer_rows
+        self.backend = backend
+        self.sink = None
+        self.log = None if log_level is None else RunLog(log_level)
+        with running(self.log):
+            logger.info('now: %s', self.now)
 
     @staticmethod
     def get_all_symbols() -> set:
@@ -28,7 +72,7 @@ class Dao:
         for file in os.listdir('algofin/pricing_data'):
             if file.endswith(".csv"):
                 symbols.add(file[0:-4])
-        print('symbols:', symbols)
+        logger.debug('symbols: %s', symbols)
         return symbols
 
     def load_all_pricing_data(self) -> dict:
@@ -45,31 +89,128 @@ class Dao:
             List of daily stock prices
         """
         pricing_data = dict()
-        for symbol in self.get_all_symbols():
-            pricing_data[symbol] = self._get_prices(symbol)
+        with running(self.log):
+            for symbol in self.get_all_symbols():
+                pricing_data[symbol] = self._get_prices(symbol)
         return pricing_data
 
-    @staticmethod
-    def _create_folder_(path) -> None:
-        if not os.path.exists(path):
-            os.makedirs(path)
-
     def _write_to_csv(self, name: str, rows: list) -> None:
+        # the sink is opened on the first write, so the results folder follows any change to now before it
+        if self.sink is None:
+            self.sink = SINKS[self.backend]('algofin/results/' + self.now, self.buffer_rows)
+            # writes the buffered rows of a run that is never closed when the Dao is collected or the interpreter exits
+            weakref.finalize(self, self.sink.close)
+            if self.log is not None:
+                self.log.open('algofin/results/' + self.now)
+        with running(self.log):
+            self.sink.write(name, rows)
+
+    def flush(self) -> None:
+        """
+        Writes the buffered result rows to the csv files in the ../results folder
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.sink is not None:
+            with running(self.log):
+                self.sink.flush()
+
+    def close(self) -> None:
+        """
+        Writes the buffered result rows and closes the csv files in the ../results folder, a later write reopens them.
+        Closes the log file of the run
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.sink is not None:
+            with running(self.log):
+                self.sink.close()
+            self.sink = None
+        if self.log is not None:
+            self.log.open('algofin/results/' + self.now)
+            self.log.close()
+            self.log = None
+
+    def save_checkpoints(self, checkpoints: [Checkpoint]) -> None:
+        """
+        Saves the checkpoints of a run to the ../results folder, replacing the ones saved before
+
+        Parameters
+        ----------
+        checkpoints
+            The checkpoints, see BackTest.checkpoints
+
+        Returns
+        -------
+        None
+        """
+        path = 'algofin/results/' + self.now
+        os.makedirs(path, exist_ok=True)
+        with open(path + '/' + CHECKPOINTS, 'wb') as f:
+            pickle.dump(checkpoints, f, pickle.HIGHEST_PROTOCOL)
+
+    def save_profile(self, run: RunProfile, strategies: [StrategyProfile], profiler=None) -> None:
+        """
+        Saves the profiles of an instrumented run to the ../results folder, replacing the ones saved before: the run
+        summary and the strategy profiles as json, and the cProfile stats, which pstats and snakeviz read
+
+        Parameters
+        ----------
+        run
+            The summary of the run
+        strategies
+            The profile of each strategy
+        profiler
+            The cProfile.Profile of the run, None when the run was not profiled
+
+        Returns
+        -------
+        None
+        """
         path = 'algofin/results/' + self.now
-        self._create_folder_(path)
-        fullpath = path + '/' + name + '.csv'
-        print('writing rows to csv:', fullpath)
-        with open(fullpath, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
+        os.makedirs(path, exist_ok=True)
+        with open(path + '/' + PROFILE, 'w') as f:
+            json.dump({'run': run._asdict(), 'strategies': [profile._asdict() for profile in strategies]}, f, indent=2)
+        if profiler is not None:
+            profiler.dump_stats(path + '/' + PROFILE_STATS)
+
+    @staticmethod
+    def load_checkpoints(now: str) -> [Checkpoint]:
+        """
+        Loads the checkpoints saved by a run
+
+        Parameters
+        ----------
+        now
+            The results folder name of the run, its Dao.now
+
+        Returns
+        -------
+        [Checkpoint]
+            The checkpoints, in the order the strategies were back tested
+        """
+        with open('algofin/results/' + now + '/' + CHECKPOINTS, 'rb') as f:
+            return pickle.load(f)
 
     @staticmethod
     def load_balance(row) -> Balance:
         return Balance(int(row[0]), row[1], Decimal(row[2]), Decimal(row[3]), Decimal(row[4]), int(row[5]))
 
     @staticmethod
-    def load_price(row) -> Price:
-        return Price(row[0], row[1], Decimal(row[2]), Decimal(row[3]), Decimal(row[4]), Decimal(row[5]))
+    def load_price(row, day_index: int = None) -> Price:
+        return Price(row[0], row[1], Decimal(row[2]), Decimal(row[3]), Decimal(row[4]), Decimal(row[5]), day_index)
 
     @staticmethod
     def load_strategy(row) -> Strategy:
@@ -78,7 +219,7 @@ class Dao:
 
     @staticmethod
     def _read_csv(path, load_object, skip_headers=False) -> []:
-        print('reading csv:', path)
+        logger.debug('reading csv: %s', path)
 
         with open(path, newline='') as f:
             reader = csv.reader(f)
@@ -86,28 +227,105 @@ class Dao:
                 next(
                     reader)  # discarded, used to skip the first row of headers to cast to specific types on the following rows
             data = [load_object(row) for row in reader]
-            print(data[:10])
+            # formatted only when the debug messages are logged
+            logger.debug('first rows: %s', data[:10])
         return data
 
-    def _get_prices(self, name) -> [Price]:
+    def stream_prices(self, name, chunk_rows: int = 10000):
+        """
+        Streams the pricing data of a symbol from its csv file in the ../pricing_data folder, daily or intraday bars,
+        reading and converting chunk_rows rows at a time so the whole file is never held in memory
+
+        Parameters
+        ----------
+        name
+            The stock symbol
+        chunk_rows
+            The number of rows read at a time
+
+        Returns
+        -------
+        Generator[Price]
+            The daily or intraday prices, in the order of the csv file, with their row index as the day_index
+        """
+        path = 'algofin/pricing_data/' + name + '.csv'
+        with running(self.log):
+            logger.debug('streaming csv: %s', path)
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            day_index = 0
+            while chunk := list(islice(reader, chunk_rows)):
+                yield from map(self.load_price, chunk, range(day_index, day_index + len(chunk)))
+                day_index += len(chunk)
+
+    def get_price_columns(self, name) -> PriceColumns:
+        """
+        Gets the pricing data of a symbol as columns memory-mapped from the compiled cache of its csv file in the
+        ../pricing_data folder, the cache is built on first use and whenever the csv file changes
+
+        Parameters
+        ----------
+        name
+            The stock symbol
+
+        Returns
+        -------
+        PriceColumns
+            The pricing columns
+        """
         path = 'algofin/pricing_data/' + name + '.csv'
-        return self._read_csv(path, self.load_price, True)
+        with running(self.log):
+            return PriceCache(path).load(lambda csv_path: self._read_csv(csv_path, list, True))
 
-    def get_balances(self) -> [Balance]:
+    def get_pricing_fingerprint(self, name) -> str:
+        """
+        Gets the fingerprint of the pricing data of a symbol, the sha256 of its csv file in the ../pricing_data folder
+
+        Parameters
+        ----------
+        name
+            The stock symbol
+
+        Returns
+        -------
+        str
+            The hex sha256 of the csv file content
+        """
+        return PriceCache('algofin/pricing_data/' + name + '.csv').fingerprint()
+
+    def _get_prices(self, name) -> [Price]:
+        columns = self.get_price_columns(name)
+        dates = columns.date.astype(str).tolist()
+        # rebuilds the exact Decimal of the csv file: open, high, low and close
+        prices = [map(Decimal.scaleb, map(Decimal, units), exponents)
+                  for units, exponents in zip(columns.units.tolist(), columns.exponents.tolist())]
+        return list(map(Price, repeat(name), dates, *prices, range(len(dates))))
+
+    def get_balances(self, strategy_id: int = None) -> [Balance]:
         """
         Gets all the balance records from this init time of BackTest class
 
         Parameters
         ----------
-        None
+        strategy_id
+            Only get the balance records of this strategy, None for all of them.  The parquet backend only reads the
+            row groups of the strategy and the sqlite backend looks it up in the strategy_id index
 
         Returns
         -------
         [Balance]
             List of balance records
         """
+        self.flush()
+        if self.backend == PARQUET:
+            return read_parquet('algofin/results/' + self.now, 'balances', strategy_id)
+        if self.backend == SQLITE:
+            return [self.load_balance(row) for row in read_sqlite('algofin/results/' + self.now, 'balances',
+                                                                  strategy_id)]
         path = 'algofin/results/' + self.now + '/balances.csv'
-        return self._read_csv(path, self.load_balance, False)
+        balances = self._read_csv(path, self.load_balance, False)
+        return balances if strategy_id is None else [b for b in balances if b.strategy_id == strategy_id]
 
     def get_strategies(self) -> [Strategy]:
         """
@@ -122,6 +340,11 @@ class Dao:
         [strategy]
             List of strategy records
         """
+        self.flush()
+        if self.backend == PARQUET:
+            return read_parquet('algofin/results/' + self.now, 'strategies')
+        if self.backend == SQLITE:
+            return [self.load_strategy(row) for row in read_sqlite('algofin/results/' + self.now, 'strategies')]
         path = 'algofin/results/' + self.now + '/strategies.csv'
         return self._read_csv(path, self.load_strategy, False)
 
@@ -139,7 +362,60 @@ class Dao:
         strategy
             A strategy record
         """
+        self.flush()
+        if self.backend == PARQUET:
+            return next(iter(read_parquet('algofin/results/' + self.now, 'strategies', id)), None)
+        if self.backend == SQLITE:
+            rows = read_sqlite('algofin/results/' + self.now, 'strategies', id)
+            return self.load_strategy(rows[0]) if rows else None
         strategies = self.get_strategies()
         for strategy in strategies:
             if strategy[0] == id:
                 return strategy
+
+    def get_max_ending_balance(self) -> (int, Decimal, Balance):
+        """
+        Finds the strategy with the largest ending balance from the balance records of this init time of BackTest
+        class.  The sqlite backend answers with a query, the other backends read every balance record
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (int, Decimal, Balance)
+            The strategy ID that produced the largest ending balance
+            The largest ending balance amount
+            The largest ending Balance record
+        """
+        self.flush()
+        if self.backend == SQLITE:
+            return max_ending_balance('algofin/results/' + self.now)
+        return self._summarize().get_max_ending_balance()
+
+    def get_max_balance_at_anytime(self) -> (int, Decimal, Balance):
+        """
+        Finds the strategy with the largest balance at any time from the balance records of this init time of BackTest
+        class.  The sqlite backend answers with a query, the other backends read every balance record
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (int, Decimal, Balance)
+            The strategy ID that produced the largest anytime balance
+            The largest anytime balance amount
+            The largest anytime Balance record
+        """
+        self.flush()
+        if self.backend == SQLITE:
+            return max_balance_at_anytime('algofin/results/' + self.now)
+        return self._summarize().get_max_balance_at_anytime()
+
+    def _summarize(self) -> Results:
+        results = Results()
+        results.add_balances(self.get_balances())
+        return results
@@ -0,0 +1,112 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+from price_cache import PriceColumns
+from vector import VectorBackTest, PriceArrays
+import numpy as np
+
+# specify constants
+DIGITS = 6
+SCALE = 10 ** DIGITS
+"""
+Money is held as int64 micro-dollars, prices and offsets as int64 millionths.  The rounding is:
+- prices: exact, the csv files have at most 6 decimal places; a price with more is rounded half even
+- buy_offset, sell_offset, order_amount_ratio and the starting balance: rounded half even to millionths
+- limit prices, when an order is placed: the buy limit close * buy_offset and the sell limit buy price * sell_offset
+    are rounded half even to the micro-dollar
+- default order amount: starting balance * order_amount_ratio, rounded half even to the micro-dollar
+- shares: the order amount divided by the limit price, rounded down, the same as the Decimal engine
+- fills, totals and balances: exact, shares * price and sums of micro-dollars
+
+So the results only differ from the Decimal engine by the limit prices, which the Decimal engine keeps to up to 12
+decimal places; see parity.py for a report.  The int64 product of a price and an offset overflows when the price in
+dollars times the offset reaches about 9.2 million, e.g. a $500 share with a 1000 sell offset is 500 thousand.
+"""
+
+
+def to_fixed(value) -> int:
+    """
+    Converts a number to millionths, rounded half even
+
+    Parameters
+    ----------
+    value
+        A Decimal, int or str number, e.g. Decimal('0.995')
+
+    Returns
+    -------
+    int
+        The number of millionths, e.g. 995000
+    """
+    return int(Decimal(str(value)).scaleb(DIGITS).to_integral_value(ROUND_HALF_EVEN))
+
+
+def _divide(numerator, denominator):
+    # numerator / denominator rounded half to even, for non negative numerators
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice = 2 * remainder
+    return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+
+
+class FixedVectorBackTest(VectorBackTest):
+    """
+    The vector engine over int64 micro-dollars instead of float64, see SCALE for the rounding.  Every comparison is
+    exact, so the results are reproducible across platforms and numpy versions.
+    """
+    money = np.int64
+    tolerance = 0
+
+    @staticmethod
+    def load_prices(columns: PriceColumns) -> PriceArrays:
+        """
+        Gets the pricing columns in micro-dollars, from the exact coefficients of the csv prices
+
+        Parameters
+        ----------
+        columns
+            The memory-mapped pricing columns of the symbol
+
+        Returns
+        -------
+        PriceArrays
+            The int64 pricing columns
+        """
+        shift = columns.exponents.astype(np.int64) + DIGITS
+        scaled = columns.units * np.power(10, np.maximum(shift, 0))
+        return PriceArrays(*_divide(scaled, np.power(10, np.maximum(-shift, 0))))
+
+    @staticmethod
+    def decimal(value) -> Decimal:
+        """
+        Converts a money value of the balance arrays to a Decimal
+
+        Parameters
+        ----------
+        value
+            An int64 number of micro-dollars
+
+        Returns
+        -------
+        Decimal
+            The exact Decimal amount of dollars
+        """
+        return Decimal(int(value)).scaleb(-DIGITS)
+
+    @staticmethod
+    def _ratios(values):
+        return np.array([to_fixed(value) for value in values], dtype=np.int64)
+
+    @staticmethod
+    def _order_amounts(starting_balance, ratios):
+        return np.array([to_fixed(Decimal(str(starting_balance)) * Decimal(str(ratio))) for ratio in ratios],
+                        dtype=np.int64)
+
+    @staticmethod
+    def _money(value):
+        return to_fixed(value)
+
+    @staticmethod
+    def _limit_price(prices, offsets):
+        return _divide(prices * offsets, SCALE)
+
+    @staticmethod
+    def _shares(order_amount, price):
+        return order_amount // price
@@ -0,0 +1,452 @@
+import math
+import os
+import pickle
+from abc import ABC, abstractmethod
+from collections import deque
+from objects import Price
+from price_cache import PriceColumns
+import numpy as np
+
+# specify constants
+INDICATOR_PATH = 'algofin/cache/indicators'
+SMA = 'sma'
+EMA = 'ema'
+ATR = 'atr'
+RSI = 'rsi'
+BOLLINGER = 'bollinger'
+
+
+class Smoother:
+    def __init__(self, period: int, alpha: float):
+        """
+        Exponential smoothing seeded with the mean of the first period values, the recursion of EMA, ATR and RSI.
+        Each value is added in O(1), the same code computes a whole series and updates it a bar at a time, so an
+        updated series is the same as a computed one.
+
+        Parameters
+        ----------
+        period
+            The number of values averaged for the seed
+        alpha
+            The weight of a new value, e.g. 2 / (period + 1) for an EMA and 1 / period for Wilder's smoothing
+
+        Returns
+        -------
+        Smoother
+        """
+        self.period = period
+        self.alpha = alpha
+        self.count = 0
+        self.total = 0.0
+        self.value = math.nan
+
+    def add(self, value: float) -> float:
+        """
+        Adds a value
+
+        Parameters
+        ----------
+        value
+            The new value
+
+        Returns
+        -------
+        float
+            The smoothed value, nan until period values were added
+        """
+        self.count += 1
+        if self.count < self.period:
+            self.total += value
+        elif self.count == self.period:
+            self.value = (self.total + value) / self.period
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class Indicator(ABC):
+    """
+    A technical indicator over the daily prices of a symbol, with its parameters.  compute gets the series of every
+    trading day at once, with the vectorized numpy operations over the float64 pricing columns, and the state needed to
+    update it; update gets the value of one more trading day in O(1).  The values before the indicator has period
+    trading days are nan.  Subclasses implement both, an indicator without them cannot be created.
+    """
+    name = None
+    # the number of values per trading day
+    width = 1
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError('the period of an indicator is at least 1: ' + str(period))
+        self.period = period
+
+    @property
+    def key(self) -> str:
+        """
+        The name and parameters of the indicator, e.g. 'sma(20)', its key in an IndicatorCache
+        """
+        return f'{self.name}({self.period})'
+
+    @abstractmethod
+    def compute(self, columns: PriceColumns) -> (np.ndarray, object):
+        """
+        Computes the indicator over pricing columns
+
+        Parameters
+        ----------
+        columns
+            The pricing columns of a symbol
+
+        Returns
+        -------
+        (np.ndarray, object)
+            The float64 values, of shape (trading days, width)
+            The state after the last trading day, see update
+        """
+
+    @abstractmethod
+    def update(self, state, price: Price) -> tuple:
+        """
+        Computes the indicator for the next trading day in O(1), updating the state
+
+        Parameters
+        ----------
+        state
+            The state after the previous trading day, see compute
+        price
+            The price of the next trading day
+
+        Returns
+        -------
+        tuple
+            The width values of the trading day
+        """
+
+
+class Sma(Indicator):
+    """
+    Simple moving average of the closing prices
+    """
+    name = SMA
+
+    def compute(self, columns: PriceColumns) -> (np.ndarray, list):
+        close = np.asarray(columns.close, dtype=np.float64)
+        values = np.full((len(close), 1), np.nan)
+        if len(close) >= self.period:
+            sums = np.cumsum(close)
+            values[self.period - 1:, 0] = (sums[self.period - 1:] - np.append(0.0, sums[:-self.period])) / self.period
+        return values, _window(close, self.period)
+
+    def update(self, state: list, price: Price) -> tuple:
+        _slide(state, float(price.close), self.period)
+        return (state[1] / self.period if len(state[0]) == self.period else math.nan,)
+
+
+class Ema(Indicator):
+    """
+    Exponential moving average of the closing prices, 2 / (period + 1) weighted and seeded with the simple moving
+    average of the first period closing prices
+    """
+    name = EMA
+
+    def compute(self, columns: PriceColumns) -> (np.ndarray, Smoother):
+        smoother = Smoother(self.period, 2 / (self.period + 1))
+        # the recursion is a single pass over the float64 closing prices
+        values = np.array([smoother.add(close) for close in np.asarray(columns.close).tolist()], dtype=np.float64)
+        return values.reshape(-1, 1), smoother
+
+    def update(self, state: Smoother, price: Price) -> tuple:
+        return (state.add(float(price.close)),)
+
+
+class Atr(Indicator):
+    """
+    Wilder's average true range, the true range of the first trading day is its high - low
+    """
+    name = ATR
+
+    def compute(self, columns: PriceColumns) -> (np.ndarray, list):
+        high, low, close = (np.asarray(column, dtype=np.float64)
+                            for column in (columns.high, columns.low, columns.close))
+        previous_close = np.append(high[:1], close[:-1])
+        true_range = np.maximum(high, previous_close) - np.minimum(low, previous_close)
+        if len(true_range):
+            true_range[0] = high[0] - low[0]
+        smoother = Smoother(self.period, 1 / self.period)
+        values = np.array([smoother.add(value) for value in true_range.tolist()], dtype=np.float64)
+        return values.reshape(-1, 1), [float(close[-1]) if len(close) else None, smoother]
+
+    def update(self, state: list, price: Price) -> tuple:
+        previous_close, smoother = state
+        high, low = float(price.high), float(price.low)
+        true_range = high - low if previous_close is None else max(high, previous_close) - min(low, previous_close)
+        state[0] = float(price.close)
+        return (smoother.add(true_range),)
+
+
+class Rsi(Indicator):
+    """
+    Wilder's relative strength index of the closing prices, from 0 to 100; the first value is on the trading day after
+    the first period changes
+    """
+    name = RSI
+
+    def compute(self, columns: PriceColumns) -> (np.ndarray, list):
+        close = np.asarray(columns.close, dtype=np.float64)
+        changes = np.diff(close)
+        gains, losses = Smoother(self.period, 1 / self.period), Smoother(self.period, 1 / self.period)
+        values = np.full((len(close), 1), np.nan)
+        values[1:, 0] = [_rsi(gains.add(gain), losses.add(loss))
+                         for gain, loss in zip(np.maximum(changes, 0).tolist(), np.maximum(-changes, 0).tolist())]
+        return values, [float(close[-1]) if len(close) else None, gains, losses]
+
+    def update(self, state: list, price: Price) -> tuple:
+        previous_close, gains, losses = state
+        state[0] = close = float(price.close)
+        if previous_close is None:
+            return (math.nan,)
+        change = close - previous_close
+        return (_rsi(gains.add(max(change, 0.0)), losses.add(max(-change, 0.0))),)
+
+
+class Bollinger(Indicator):
+    """
+    Bollinger bands of the closing prices: the simple moving average, and the average plus and minus a number of
+    population standard deviations of the period closing prices, the values of a trading day are (middle, upper,
+    lower)
+    """
+    name = BOLLINGER
+    width = 3
+
+    def __init__(self, period: int, deviations: float = 2.0):
+        super().__init__(period)
+        self.deviations = deviations
+
+    @property
+    def key(self) -> str:
+        return f'{self.name}({self.period}, {self.deviations:g})'
+
+    def compute(self, columns: PriceColumns) -> (np.ndarray, list):
+        close = np.asarray(columns.close, dtype=np.float64)
+        values = np.full((len(close), 3), np.nan)
+        if len(close) >= self.period:
+            windows = np.lib.stride_tricks.sliding_window_view(close, self.period)
+            middle, deviation = windows.mean(axis=1), windows.std(axis=1)
+            values[self.period - 1:] = np.column_stack((middle, middle + self.deviations * deviation,
+                                                        middle - self.deviations * deviation))
+        return values, _window(close, self.period)
+
+    def update(self, state: list, price: Price) -> tuple:
+        _slide(state, float(price.close), self.period)
+        if len(state[0]) < self.period:
+            return math.nan, math.nan, math.nan
+        middle = state[1] / self.period
+        deviation = math.sqrt(max(state[2] / self.period - middle * middle, 0.0))
+        return middle, middle + self.deviations * deviation, middle - self.deviations * deviation
+
+
+def _rsi(gain: float, loss: float) -> float:
+    if math.isnan(gain) or loss == 0:
+        return gain if math.isnan(gain) else 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def _window(close: np.ndarray, period: int) -> list:
+    # the last period closing prices with their exact sum and sum of squares, the state of a moving window
+    window = deque(close[-period:].tolist())
+    return [window, math.fsum(window), math.fsum(value * value for value in window)]
+
+
+def _slide(state: list, close: float, period: int) -> None:
+    window = state[0]
+    window.append(close)
+    state[1] += close
+    state[2] += close * close
+    if len(window) > period:
+        removed = window.popleft()
+        state[1] -= removed
+        state[2] -= removed * removed
+
+
+class IndicatorSeries:
+    def __init__(self, indicator: Indicator, values: np.ndarray, state, fingerprint: str, last_date: bytes):
+        """
+        The values of an indicator on every trading day of a symbol, read by trading day index.  More trading days
+        are appended in amortized O(1) each.
+
+        Parameters
+        ----------
+        indicator
+            The indicator
+        values
+            The float64 values, of shape (trading days, width)
+        state
+            The state of the indicator after the last trading day
+        fingerprint
+            The fingerprint of the pricing data the series was computed over
+        last_date
+            The date of the last trading day, b'2023-04-10'
+
+        Returns
+        -------
+        IndicatorSeries
+        """
+        self.indicator = indicator
+        self.buffer = values
+        self.length = len(values)
+        self.state = state
+        self.fingerprint = fingerprint
+        self.last_date = last_date
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, trading_day: int):
+        """
+        Gets the value of a trading day
+
+        Parameters
+        ----------
+        trading_day
+            The trading day index, e.g. Price.day_index
+
+        Returns
+        -------
+        float or tuple
+            The value, or the width values of an indicator with more than one, e.g. Bollinger; nan before the
+            indicator has enough trading days
+        """
+        if not 0 <= trading_day < self.length:
+            raise IndexError(trading_day)
+        row = self.buffer[trading_day]
+        return float(row[0]) if self.indicator.width == 1 else tuple(row.tolist())
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The values of every trading day, of shape (trading days, width)
+        """
+        return self.buffer[:self.length]
+
+    def append(self, price: Price) -> None:
+        """
+        Computes the indicator for the next trading day
+
+        Parameters
+        ----------
+        price
+            The price of the next trading day
+
+        Returns
+        -------
+        None
+        """
+        if self.length == len(self.buffer):
+            # the buffer doubles, so appending is amortized O(1)
+            buffer = np.full((max(2 * self.length, 16), self.indicator.width), np.nan)
+            buffer[:self.length] = self.buffer[:self.length]
+            self.buffer = buffer
+        self.buffer[self.length] = self.indicator.update(self.state, price)
+        self.length += 1
+        self.last_date = price.date.encode() if isinstance(price.date, str) else price.date
+
+
+class IndicatorCache:
+    def __init__(self, pricing_data, path: str = None):
+        """
+        Cache of the indicator series of the symbols of a PricingData, so that an indicator with the same parameters
+        is computed once per symbol however many strategies use it.  A series is kept under its symbol and indicator
+        key and is tied to the fingerprint of the pricing data it was computed over.  When the pricing data of a
+        symbol changes by having more trading days after the last trading day of the series, the series is extended
+        with the new trading days in O(1) each, otherwise it is computed again.
+
+        Parameters
+        ----------
+        pricing_data
+            The PricingData of the BackTest
+        path
+            The folder the series are saved to, so that they are reused by later runs, e.g. INDICATOR_PATH; None only
+            keeps them in memory
+
+        Returns
+        -------
+        IndicatorCache
+        """
+        self.pricing_data = pricing_data
+        self.path = path
+        self.series = dict()
+        self.computed = 0
+        self.extended = 0
+
+    def get(self, symbol: str, indicator: Indicator) -> IndicatorSeries:
+        """
+        Gets the series of an indicator over the pricing data of a symbol, computing it the first time
+
+        Parameters
+        ----------
+        symbol
+            The stock symbol
+        indicator
+            The indicator, e.g. Atr(20)
+
+        Returns
+        -------
+        IndicatorSeries
+            The values of the indicator on every trading day of the symbol
+        """
+        fingerprint = self.pricing_data.fingerprint(symbol)
+        key = (symbol, indicator.key)
+        series = self.series.get(key)
+        if series is None:
+            series = self._load(symbol, indicator)
+        if series is not None and series.fingerprint == fingerprint:
+            self.series[key] = series
+            return series
+        series = self._extend(series, symbol)
+        if series is None:
+            series = self._compute(symbol, indicator)
+        series.fingerprint = fingerprint
+        self.series[key] = series
+        self._save(symbol, series)
+        return series
+
+    def _compute(self, symbol: str, indicator: Indicator) -> IndicatorSeries:
+        columns = self.pricing_data.columns(symbol)
+        values, state = indicator.compute(columns)
+        self.computed += 1
+        return IndicatorSeries(indicator, values, state, None, bytes(columns.date[-1]) if len(columns.date) else None)
+
+    def _extend(self, series: IndicatorSeries, symbol: str) -> IndicatorSeries:
+        # a series is extended when the pricing data has more trading days, and its last trading day has the same date
+        if series is None:
+            return None
+        columns = self.pricing_data.columns(symbol)
+        last_day = series.length - 1
+        if last_day < 0 or last_day >= len(columns.date) - 1 or bytes(columns.date[last_day]) != series.last_date:
+            return None
+        for trading_day in range(series.length, len(columns.date)):
+            series.append(Price(symbol, bytes(columns.date[trading_day]), columns.open[trading_day],
+                                columns.high[trading_day], columns.low[trading_day], columns.close[trading_day],
+                                trading_day))
+        self.extended += 1
+        return series
+
+    def _file(self, symbol: str, indicator: Indicator) -> str:
+        return os.path.join(self.path, symbol, indicator.key + '.pickle')
+
+    def _load(self, symbol: str, indicator: Indicator) -> IndicatorSeries:
+        if self.path is None or not os.path.exists(self._file(symbol, indicator)):
+            return None
+        with open(self._file(symbol, indicator), 'rb') as f:
+            return pickle.load(f)
+
+    def _save(self, symbol: str, series: IndicatorSeries) -> None:
+        if self.path is None:
+            return
+        path = self._file(symbol, series.indicator)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written to a temporary file and renamed, so concurrent readers never see a partial series
+        temporary_path = path + '.' + str(os.getpid())
+        with open(temporary_path, 'wb') as f:
+            pickle.dump(series, f)
+        os.replace(temporary_path, path)
@@ -0,0 +1,207 @@
+import cProfile
+import io
+import pstats
+from time import perf_counter
+from objects import RunProfile, StrategyProfile
+
+# specify constants
+SELL_FILLS = 'sell_fills'
+BUY_FILLS = 'buy_fills'
+SELL_EXPIRY = 'sell_expiry'
+BUY_EXPIRY = 'buy_expiry'
+NEW_ORDER = 'new_order'
+# the five daily steps of BackTest._run_, in order
+STEPS = {
+    '_process_executed_sell_orders': SELL_FILLS,
+    '_process_executed_buy_orders': BUY_FILLS,
+    '_change_expired_sell_orders_to_maket_orders': SELL_EXPIRY,
+    '_close_expired_buy_orders': BUY_EXPIRY,
+    '_add_new_buy_order': NEW_ORDER,
+}
+READ = 'read'
+LOAD = 'load'
+WRITE = 'write'
+# the I/O methods of Dao
+IO = {
+    'get_price_columns': READ,
+    '_get_prices': LOAD,
+    '_write_to_csv': WRITE,
+    'flush': WRITE,
+    'close': WRITE,
+}
+COUNTERS = ['days', 'orders_scanned', 'max_active_orders', 'fills', 'balance_records']
+
+
+class Instrumentation:
+    def __init__(self, profile: bool = False):
+        """
+        Opt in timers and counters of a BackTest and its Dao, see BackTest.  Instrumenting replaces the five daily
+        steps of the Decimal engine and the I/O methods of the Dao with timed wrappers on the instances, so a BackTest
+        without instrumentation runs the same code as before, at no cost.
+
+        The timers and counters of every strategy the Decimal engine back tests, including resumed strategies, are
+        kept as a StrategyProfile; the multi and vector engines only have their I/O and total times.  The summary of
+        the run is a RunProfile, saved with the strategy profiles to the ../results folder by BackTest.close.
+
+        Parameters
+        ----------
+        profile
+            Whether the run is also profiled with cProfile, from the start of the BackTest to its close
+
+        Returns
+        -------
+        Instrumentation
+        """
+        self.profiler = cProfile.Profile() if profile else None
+        self.io = dict.fromkeys(IO.values(), 0.0)
+        self.steps = dict.fromkeys(STEPS.values(), 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.strategies = []
+        self.started = perf_counter()
+        self.seconds = 0.0
+
+    def instrument_dao(self, dao) -> None:
+        """
+        Times the I/O of a Dao and starts the run, the profiler too when there is one
+
+        Parameters
+        ----------
+        dao
+            The Dao of the BackTest
+
+        Returns
+        -------
+        None
+        """
+        for name, timer in IO.items():
+            setattr(dao, name, self._timed(self.io, timer, getattr(dao, name)))
+        self.started = perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def instrument_back_test(self, back_test) -> None:
+        """
+        Times the daily steps of the Decimal engine of a BackTest and counts the orders, fills and balance records of
+        each strategy
+
+        Parameters
+        ----------
+        back_test
+            The BackTest
+
+        Returns
+        -------
+        None
+        """
+        for name, step in STEPS.items():
+            setattr(back_test, name, self._timed(self.steps, step, getattr(back_test, name)))
+        # the fill steps scan the orders of the book, their first argument
+        back_test._process_executed_sell_orders = self._scanned(back_test._process_executed_sell_orders, True)
+        back_test._process_executed_buy_orders = self._scanned(back_test._process_executed_buy_orders, False)
+        back_test._run_ = self._profiled(back_test._run_)
+
+    def finish(self) -> (RunProfile, [StrategyProfile]):
+        """
+        Ends the run, stops the profiler and sums up the strategy profiles; the run can be finished again after more
+        strategies are back tested
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (RunProfile, [StrategyProfile])
+            The summary of the run
+            The profile of each strategy, in the order they were back tested
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.seconds = perf_counter() - self.started
+        return self.summary(), list(self.strategies)
+
+    def summary(self) -> RunProfile:
+        """
+        Sums up the strategy profiles of the run so far
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        RunProfile
+            The summary of the run
+        """
+        totals = {field: sum(getattr(profile, field) for profile in self.strategies)
+                  for field in ['seconds', *STEPS.values(), *COUNTERS]}
+        totals['max_active_orders'] = max((profile.max_active_orders for profile in self.strategies), default=0)
+        return RunProfile(strategies=len(self.strategies), seconds=self.seconds, simulate=totals.pop('seconds'),
+                          **self.io, **totals)
+
+    def stats(self, limit: int = 20, sort: str = 'cumulative') -> str:
+        """
+        Formats the functions of the cProfile profile that took the most time
+
+        Parameters
+        ----------
+        limit
+            The number of functions
+        sort
+            The pstats sort key, e.g. 'cumulative' or 'tottime'
+
+        Returns
+        -------
+        str
+            The pstats report, empty without a profiler
+        """
+        if self.profiler is None:
+            return ''
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    @staticmethod
+    def _timed(timers: dict, timer: str, function):
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timers[timer] += perf_counter() - start
+        return timed
+
+    def _scanned(self, function, first: bool):
+        counters = self.counters
+
+        def scanned(book, *args, **kwargs):
+            if first:
+                # the sell fills are the first step of a trading day
+                counters['days'] += 1
+                counters['max_active_orders'] = max(counters['max_active_orders'], len(book.sells) + len(book.buys))
+            counters['orders_scanned'] += len(book.sells) if first else len(book.buys)
+            return function(book, *args, **kwargs)
+        return scanned
+
+    def _profiled(self, run):
+        def profiled(strategy, book, ledger, *args):
+            steps, counters = self.steps.copy(), self.counters
+            counters.update(dict.fromkeys(COUNTERS, 0))
+            ledger.record = self._counted(ledger.record)
+            start = perf_counter()
+            orders, trades, balances, summary = run(strategy, book, ledger, *args)
+            seconds = perf_counter() - start
+            counters['fills'] = len(trades)
+            self.strategies.append(StrategyProfile(strategy_id=strategy.strategy_id, seconds=seconds,
+                                                   **{step: self.steps[step] - steps[step] for step in steps},
+                                                   **counters))
+            return orders, trades, balances, summary
+        return profiled
+
+    def _counted(self, record):
+        counters = self.counters
+
+        def counted(*args, **kwargs):
+            counters['balance_records'] += 1
+            record(*args, **kwargs)
+        return counted
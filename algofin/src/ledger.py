@@ -0,0 +1,220 @@
+from array import array
+from decimal import Decimal
+from itertools import repeat
+from metrics import Metrics
+from objects import Balance, Order, Summary
+
+# specify constants
+FULL = 'full'
+END_OF_DAY = 'end_of_day'
+SUMMARY = 'summary'
+
+
+class Account:
+    __slots__ = ('date', 'order_balance', 'cash_balance', 'invested_balance', 'number_of_shares', 'total')
+
+    def __init__(self, date: str, order_balance: Decimal, cash_balance: Decimal, invested_balance: Decimal,
+                 number_of_shares: int):
+        """
+        The current balances of a strategy, the values of its latest balance record
+
+        Parameters
+        ----------
+        date, order_balance, cash_balance, invested_balance, number_of_shares
+            See Balance
+
+        Returns
+        -------
+        Account
+        """
+        self.update(date, order_balance, cash_balance, invested_balance, number_of_shares)
+
+    def update(self, date: str, order_balance: Decimal, cash_balance: Decimal, invested_balance: Decimal,
+               number_of_shares: int) -> None:
+        self.date = date
+        self.order_balance = order_balance
+        self.cash_balance = cash_balance
+        self.invested_balance = invested_balance
+        self.number_of_shares = number_of_shares
+        self.total = order_balance + cash_balance + invested_balance
+
+
+class Ledger:
+    def __init__(self, strategy_id: int, starting_balance: Balance, history: str = FULL, summary: Summary = None,
+                 held: bool = False):
+        """
+        The balance records of a strategy while it is back tested.  The current balances live in an Account that is
+        updated in place, the summary of the balance records is updated as they are recorded, and the history of the
+        balance records is kept in columns, depending on the history mode:
+        - full: every balance record
+        - end_of_day: the starting balance record and the last balance record of each trading day
+        - summary: no history, only the max and ending balance records, the same as the vector engine
+
+        The summary covers every balance record in every mode, so a sweep in summary mode keeps a fixed amount of
+        memory per strategy.  So do the performance metrics of the summary, see Metrics, which the engines feed with
+        the ends of the trading days and the trades.
+
+        Parameters
+        ----------
+        strategy_id
+            The strategy the balance records are for
+        starting_balance
+            The starting balance record
+        history
+            one of ['full', 'end_of_day', 'summary']
+        summary
+            The summary of a ledger that is resumed from a checkpoint, see checkpoint, with starting_balance its current
+            balances; None for a new ledger
+        held
+            Whether the current balances of a resumed ledger are held for the end of the day, they are kept first
+
+        Returns
+        -------
+        Ledger
+        """
+        self.strategy_id = strategy_id
+        self.history = history
+        self.account = Account(*starting_balance[1:])
+        self.dates = []
+        self.order_balances = []
+        self.cash_balances = []
+        self.invested_balances = []
+        self.numbers_of_shares = array('q')
+        self.held = held
+        if summary is not None:
+            self.summary = self._copy(summary)
+            # the trading day of the checkpoint ends once it is resumed
+            self.end_of_day()
+            return
+        self.summary = Summary(strategy_id=strategy_id, ending_total=None, ending_balance=None,
+                               max_total=Decimal(0), max_balance=None, max_drawdown=Decimal(0),
+                               metrics=Metrics(self.account.date, self.account.total))
+        self._summarize()
+        if history != SUMMARY:
+            self._append()
+
+    def record(self, date: str, order_balance: Decimal, cash_balance: Decimal, invested_balance: Decimal,
+               number_of_shares: int) -> None:
+        """
+        Records a new balance record, which becomes the current balances
+
+        Parameters
+        ----------
+        date, order_balance, cash_balance, invested_balance, number_of_shares
+            See Balance
+
+        Returns
+        -------
+        None
+        """
+        self.account.update(date, order_balance, cash_balance, invested_balance, number_of_shares)
+        self._summarize()
+        if self.history == FULL:
+            self._append()
+        self.held = self.history == END_OF_DAY
+
+    def end_of_day(self) -> None:
+        """
+        Ends a trading day, keeps the last balance record of the day in end_of_day mode
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        account = self.account
+        self.summary.metrics.end_of_day(account.date, account.total, account.number_of_shares)
+        self._keep()
+
+    def trade(self, order: Order, total: Decimal) -> None:
+        """
+        Adds the fill of an order to the metrics of the summary, see Metrics.trade
+
+        Parameters
+        ----------
+        order
+            The order that filled
+        total
+            The total of its trade
+
+        Returns
+        -------
+        None
+        """
+        self.summary.metrics.trade(order.symbol, order.buy_sell, order.number_of_shares, total)
+
+    def checkpoint(self) -> (Balance, Summary, bool):
+        """
+        Gets the state a ledger is resumed from, see Ledger
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (Balance, Summary, bool)
+            The current balances
+            A copy of the summary
+            Whether the current balances are held for the end of the day
+        """
+        return self._balance(), self._copy(self.summary), self.held
+
+    def balances(self) -> [Balance]:
+        """
+        Ends the back test and gets the balance records that are kept in the history mode
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        [Balance]
+            The balance records, in the order they were recorded
+        """
+        self._keep()
+        self.summary.ending_total = self.account.total
+        self.summary.ending_balance = self._balance()
+        if self.history == SUMMARY:
+            # the max balance record goes first so that it wins a tie with the ending balance record
+            return [balance for balance in (self.summary.max_balance, self.summary.ending_balance) if balance]
+        return list(map(Balance, repeat(self.strategy_id), self.dates, self.order_balances, self.cash_balances,
+                        self.invested_balances, self.numbers_of_shares))
+
+    def _balance(self) -> Balance:
+        account = self.account
+        return Balance(self.strategy_id, account.date, account.order_balance, account.cash_balance,
+                       account.invested_balance, account.number_of_shares)
+
+    @staticmethod
+    def _copy(summary: Summary) -> Summary:
+        summary = Summary(**summary._asdict())
+        summary.metrics = summary.metrics.copy()
+        return summary
+
+    def _keep(self) -> None:
+        if self.held:
+            self._append()
+            self.held = False
+
+    def _summarize(self) -> None:
+        # the same as Results.add_balances, without keeping the balance records
+        summary = self.summary
+        total = self.account.total
+        if total > summary.max_total:
+            summary.max_total = total
+            summary.max_balance = self._balance()
+        elif summary.max_total > 0:
+            summary.max_drawdown = max(summary.max_drawdown, (summary.max_total - total) / summary.max_total)
+
+    def _append(self) -> None:
+        account = self.account
+        self.dates.append(account.date)
+        self.order_balances.append(account.order_balance)
+        self.cash_balances.append(account.cash_balance)
+        self.invested_balances.append(account.invested_balance)
+        self.numbers_of_shares.append(account.number_of_shares)
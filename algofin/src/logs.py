@@ -0,0 +1,253 @@
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from time import perf_counter
+from objects import Progress
+
+# specify constants
+LOGGER = 'algofin'
+RUN_LOG = 'run.log'
+FORMAT = '%(asctime)s %(processName)s %(name)s %(levelname)s %(message)s'
+INTERVAL = 5.0
+RUN = ContextVar('run', default=None)
+"""The run id of the RunLog of the Dao that logs, see running"""
+RUN_IDS = count(1)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Gets the logger of a module, a child of the algofin logger.  Nothing is logged until a handler is configured,
+    e.g. with configure or Dao(log_level=...), and a message below the level of the logger is never formatted
+
+    Parameters
+    ----------
+    name
+        The module name, e.g. 'dao'
+
+    Returns
+    -------
+    logging.Logger
+        The 'algofin.<name>' logger
+    """
+    return logging.getLogger(LOGGER + '.' + name)
+
+
+def configure(level: int = logging.INFO, stream=sys.stderr) -> logging.Handler:
+    """
+    Logs the messages of the algofin loggers at a level and above to a stream, e.g. for a script
+
+    Parameters
+    ----------
+    level
+        The logging level, e.g. logging.DEBUG
+    stream
+        The stream the messages are written to
+
+    Returns
+    -------
+    logging.Handler
+        The handler, which logging.getLogger(LOGGER).removeHandler removes
+    """
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    _add_handler(handler, level)
+    return handler
+
+
+def _add_handler(handler: logging.Handler, level: int) -> None:
+    logger = logging.getLogger(LOGGER)
+    handler.setLevel(level)
+    logger.addHandler(handler)
+    _lower_level(logger, level)
+
+
+def _lower_level(logger: logging.Logger, level: int) -> None:
+    # the logger lets through the messages of its most verbose handler
+    if logger.level == logging.NOTSET or logger.level > level:
+        logger.setLevel(level)
+
+
+@contextmanager
+def running(log: 'RunLog'):
+    """
+    Tags the messages logged in the block with the run of a log file, so only that RunLog writes them
+
+    Parameters
+    ----------
+    log
+        The RunLog of the Dao that logs, None when the Dao has no log file
+
+    Returns
+    -------
+    None
+    """
+    token = RUN.set(None if log is None else log.run)
+    try:
+        yield
+    finally:
+        RUN.reset(token)
+
+
+class RunLog(logging.Handler):
+    def __init__(self, level: int):
+        """
+        Logging handler of the log file of a run, run.log in its results folder.  The results folder is only known
+        once the run writes its first results, see Dao, so the messages before are kept in memory until open.
+
+        The handler is added to the shared algofin logger, so it only writes the messages logged for its own run, see
+        running, and the level of the logger is restored on close.
+
+        Parameters
+        ----------
+        level
+            The logging level, e.g. logging.INFO
+
+        Returns
+        -------
+        RunLog
+        """
+        super().__init__()
+        self.setFormatter(logging.Formatter(FORMAT))
+        self.records = []
+        self.file = None
+        self.run = next(RUN_IDS)
+        self.addFilter(self._owns)
+        logger = logging.getLogger(LOGGER)
+        # the level of the logger before the first of the open run logs
+        self.restore = next((log.restore for log in logger.handlers if isinstance(log, RunLog)), logger.level)
+        _add_handler(self, level)
+
+    def open(self, path: str) -> None:
+        """
+        Opens the log file in a results folder and writes the messages logged so far, opening again does nothing
+
+        Parameters
+        ----------
+        path
+            The results folder
+
+        Returns
+        -------
+        None
+        """
+        if self.file is not None:
+            return
+        os.makedirs(path, exist_ok=True)
+        self.file = open(path + '/' + RUN_LOG, 'a')
+        for record in self.records:
+            self.emit(record)
+        self.records.clear()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.file is None:
+            self.records.append(record)
+            return
+        self.file.write(self.format(record) + '\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Closes the log file and stops logging to it
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        logger = logging.getLogger(LOGGER)
+        logger.removeHandler(self)
+        logger.setLevel(self.restore)
+        for handler in logger.handlers:
+            _lower_level(logger, handler.level)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        super().close()
+
+    def _owns(self, record: logging.LogRecord) -> bool:
+        return getattr(record, 'run', RUN.get()) == self.run
+
+
+class ProgressReporter:
+    def __init__(self, total: int, workers: int, interval: float = INTERVAL):
+        """
+        Logs the progress of a sweep as Progress records on the 'algofin.progress' logger, at most once per interval
+        and when the sweep is done.  The records are logged at the INFO level with the Progress in the progress
+        attribute of the LogRecord, so a handler can read the fields.
+
+        Parameters
+        ----------
+        total
+            The number of strategies of the sweep
+        workers
+            The number of worker processes
+        interval
+            The min seconds between two progress messages
+
+        Returns
+        -------
+        ProgressReporter
+        """
+        self.total = total
+        self.workers = workers
+        self.interval = interval
+        self.logger = get_logger('progress')
+        self.done = 0
+        self.busy = 0.0
+        self.started = perf_counter()
+        self.reported = self.started
+
+    def update(self, done: int, busy: float) -> Progress:
+        """
+        Adds strategies that were back tested and logs the progress when it is due
+
+        Parameters
+        ----------
+        done
+            The number of strategies
+        busy
+            The seconds a worker process spent back testing them
+
+        Returns
+        -------
+        Progress
+            The progress so far
+        """
+        self.done += done
+        self.busy += busy
+        now = perf_counter()
+        progress = self.progress(now)
+        if (now - self.reported >= self.interval or self.done >= self.total) and self.logger.isEnabledFor(logging.INFO):
+            self.reported = now
+            self.logger.info('%d/%d strategies, %.1f strategies/s, eta %s s, %.0f%% worker utilization',
+                             progress.done, progress.total, progress.strategies_per_second,
+                             'unknown' if progress.eta is None else f'{progress.eta:.0f}', 100 * progress.utilization,
+                             extra={'progress': progress})
+        return progress
+
+    def progress(self, now: float = None) -> Progress:
+        """
+        Gets the progress so far
+
+        Parameters
+        ----------
+        now
+            The perf_counter time, the current time by default
+
+        Returns
+        -------
+        Progress
+            The progress so far
+        """
+        seconds = (perf_counter() if now is None else now) - self.started
+        rate = self.done / seconds if seconds > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else None
+        utilization = self.busy / (self.workers * seconds) if seconds > 0 else 0.0
+        return Progress(done=self.done, total=self.total, seconds=seconds, strategies_per_second=rate, eta=eta,
+                        utilization=utilization)
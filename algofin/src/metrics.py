@@ -0,0 +1,219 @@
+import math
+from datetime import date
+from decimal import Decimal
+from order_book import BUY
+
+# specify constants
+SHARPE = 'sharpe'
+SORTINO = 'sortino'
+MAX_DRAWDOWN_DAYS = 'max_drawdown_days'
+CAGR = 'cagr'
+WIN_RATE = 'win_rate'
+AVERAGE_TRADE_RETURN = 'average_trade_return'
+EXPOSURE = 'exposure'
+TURNOVER = 'turnover'
+METRICS = [SHARPE, SORTINO, MAX_DRAWDOWN_DAYS, CAGR, WIN_RATE, AVERAGE_TRADE_RETURN, EXPOSURE, TURNOVER]
+TRADING_DAYS = 252
+CALENDAR_DAYS = 365.25
+
+
+class Metrics:
+    __slots__ = ('start_date', 'start_total', 'date', 'total', 'days', 'returns', 'mean', 'm2', 'downside', 'peak',
+                 'underwater', 'max_underwater', 'exposed', 'total_sum', 'positions', 'traded', 'closed', 'wins',
+                 'return_sum')
+
+    def __init__(self, start_date: str, start_total: Decimal):
+        """
+        The performance metrics of a strategy, accumulated in a single pass over the ends of its trading days and its
+        trades, so a strategy keeps a fixed amount of state however long it is back tested.  The Ledger of a strategy
+        feeds it, see Ledger.end_of_day and Ledger.trade, and keeps it in Summary.metrics.
+
+        The daily returns are the changes of the total balance from one end of day to the next, starting from the
+        starting total, their mean and variance are kept with Welford's algorithm.  The trade returns are the sale
+        totals over the average cost of the shares sold, only closed trades count, and only the shares held of each
+        symbol are kept for them.  The risk free rate is 0.
+
+        Parameters
+        ----------
+        start_date
+            The date of the starting balance record
+        start_total
+            The total balance of the starting balance record
+
+        Returns
+        -------
+        Metrics
+        """
+        self.start_date = start_date
+        self.start_total = start_total
+        self.date = start_date
+        self.total = start_total
+        self.days = 0
+        self.returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside = 0.0
+        self.peak = start_total
+        self.underwater = 0
+        self.max_underwater = 0
+        self.exposed = 0
+        self.total_sum = Decimal(0)
+        self.positions = dict()
+        self.traded = Decimal(0)
+        self.closed = 0
+        self.wins = 0
+        self.return_sum = 0.0
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Metrics) and self._state() == other._state()
+
+    def __repr__(self) -> str:
+        return 'Metrics(' + ', '.join(name + '=' + repr(getattr(self, name)) for name in METRICS) + ')'
+
+    def end_of_day(self, date: str, total: Decimal, number_of_shares: int) -> None:
+        """
+        Ends a trading day of the strategy
+
+        Parameters
+        ----------
+        date
+            The date of the last balance record of the day
+        total
+            The total balance of the last balance record of the day
+        number_of_shares
+            The number of shares of the last balance record of the day
+
+        Returns
+        -------
+        None
+        """
+        self.days += 1
+        if self.total > 0:
+            daily_return = float(total / self.total) - 1.0
+            self.returns += 1
+            delta = daily_return - self.mean
+            self.mean += delta / self.returns
+            self.m2 += delta * (daily_return - self.mean)
+            self.downside += min(daily_return, 0.0) ** 2
+        if total >= self.peak:
+            self.peak = total
+            self.underwater = 0
+        else:
+            self.underwater += 1
+            self.max_underwater = max(self.max_underwater, self.underwater)
+        if number_of_shares > 0:
+            self.exposed += 1
+        self.total_sum += total
+        self.date = date
+        self.total = total
+
+    def trade(self, symbol: str, buy_sell: str, number_of_shares: int, total: Decimal) -> None:
+        """
+        Adds a trade of the strategy
+
+        Parameters
+        ----------
+        symbol
+            The symbol traded
+        buy_sell
+            one of ['buy', 'sell'], the side of the order that filled
+        number_of_shares
+            The number of shares traded
+        total
+            The total of the trade, number_of_shares * price
+
+        Returns
+        -------
+        None
+        """
+        self.traded += total
+        shares, cost = self.positions.get(symbol, (0, Decimal(0)))
+        if buy_sell == BUY:
+            self.positions[symbol] = (shares + number_of_shares, cost + total)
+            return
+        if shares <= 0:
+            return
+        sold = min(number_of_shares, shares)
+        sold_cost = cost * sold / shares
+        if sold < shares:
+            self.positions[symbol] = (shares - sold, cost - sold_cost)
+        else:
+            del self.positions[symbol]
+        if sold_cost > 0:
+            trade_return = float(total / sold_cost) - 1.0
+            self.closed += 1
+            self.wins += trade_return > 0
+            self.return_sum += trade_return
+
+    def copy(self) -> 'Metrics':
+        """
+        Gets a copy of the metrics, for the checkpoint of a ledger
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Metrics
+            The copy
+        """
+        metrics = Metrics.__new__(Metrics)
+        for name, value in zip(self.__slots__, self._state()):
+            setattr(metrics, name, value)
+        metrics.positions = dict(self.positions)
+        return metrics
+
+    @property
+    def sharpe(self) -> float:
+        """The annualized mean over the standard deviation of the daily returns, None without 2 varying returns"""
+        if self.returns < 2 or self.m2 <= 0:
+            return None
+        return self.mean / math.sqrt(self.m2 / (self.returns - 1)) * math.sqrt(TRADING_DAYS)
+
+    @property
+    def sortino(self) -> float:
+        """The annualized mean over the downside deviation of the daily returns, None without a losing day"""
+        if self.downside <= 0:
+            return None
+        return self.mean / math.sqrt(self.downside / self.returns) * math.sqrt(TRADING_DAYS)
+
+    @property
+    def max_drawdown_days(self) -> int:
+        """The most trading days in a row that ended below the highest end of day total so far"""
+        return self.max_underwater
+
+    @property
+    def cagr(self) -> float:
+        """The compound annual growth rate of the total balance, None before a calendar day has passed"""
+        if not self.days:
+            return None
+        years = (date.fromisoformat(self.date[:10]) - date.fromisoformat(self.start_date[:10])).days / CALENDAR_DAYS
+        if years <= 0 or self.start_total <= 0 or self.total < 0:
+            return None
+        return float(self.total / self.start_total) ** (1.0 / years) - 1.0
+
+    @property
+    def win_rate(self) -> float:
+        """The fraction of the closed trades with a positive return, None without a closed trade"""
+        return self.wins / self.closed if self.closed else None
+
+    @property
+    def average_trade_return(self) -> float:
+        """The mean return of the closed trades, None without a closed trade"""
+        return self.return_sum / self.closed if self.closed else None
+
+    @property
+    def exposure(self) -> float:
+        """The fraction of the trading days that ended holding shares, None before a trading day has ended"""
+        return self.exposed / self.days if self.days else None
+
+    @property
+    def turnover(self) -> float:
+        """The total of the buys and sells over twice the average end of day total, None before a trading day"""
+        if not self.days or self.total_sum <= 0:
+            return None
+        return float(self.traded / 2 / (self.total_sum / self.days))
+
+    def _state(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
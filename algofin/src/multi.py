@@ -0,0 +1,218 @@
+from collections import defaultdict
+from decimal import Decimal
+from ledger import Ledger, FULL
+from objects import Balance, Order, Price, Rule, Strategy, Summary, Trade
+from order_book import OrderBook, BUY, SELL
+from strategies import LIMIT, MARKET
+
+
+class MultiBackTest:
+    def __init__(self, prices: [Price], strategies: [Strategy], rules: [Rule], first_days: [int], last_days: [int],
+                 starting_balance: Decimal, history: str = FULL):
+        """
+        Back tests a batch of strategies of the same symbol with the Decimal engine in a single pass over the prices.
+
+        Follows BackTest.implement_ step by step, with the same Decimal operations in the same order, so the results
+        are the same as back testing the strategies one at a time.  Each trading day the price is decoded once, with
+        the day's low and high prices the orders are compared with, and every live strategy is advanced in strategy
+        order.  The state of the strategies is kept as a struct of arrays, one element per strategy: their
+        parameters, their order, cash and share balances, and their order book, trades and ledger.
+
+        Parameters
+        ----------
+        prices
+            List of daily stock prices of the symbol
+        strategies
+            The strategies, all of the symbol
+        rules
+            The Rule of each strategy, see rules.compile_rules
+        first_days, last_days
+            The trading day index of the start and end date of each strategy, see BackTest._get_trading_day
+        starting_balance
+            The starting balance for back testing
+        history
+            one of ['full', 'end_of_day', 'summary'], the balance records that are kept, see Ledger
+
+        Returns
+        -------
+        MultiBackTest
+        """
+        self.prices = prices
+        self.strategies = strategies
+        self.first_days = first_days
+        self.last_days = last_days
+        self.buy_offsets = [rule.buy_offset for rule in rules]
+        self.sell_offsets = [rule.sell_offset for rule in rules]
+        self.order_durations = [rule.order_duration for rule in rules]
+        self.default_order_amounts = [starting_balance * rule.order_amount_ratio for rule in rules]
+        self.order_balances = [Decimal(0)] * len(strategies)
+        self.cash_balances = [starting_balance] * len(strategies)
+        self.numbers_of_shares = [0] * len(strategies)
+        self.books = [OrderBook() for _ in strategies]
+        self.trades = [[] for _ in strategies]
+        self.ledgers = [Ledger(strategy.strategy_id,
+                               Balance(strategy_id=strategy.strategy_id, date=strategy.start_date,
+                                       order_balance=Decimal(0), cash_balance=starting_balance,
+                                       invested_balance=Decimal(0), number_of_shares=0),
+                               history) for strategy in strategies]
+
+    def implement_(self) -> [([Order], [Trade], [Balance], Summary)]:
+        """
+        Implements the strategies, each from its first to its last trading day index
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        [([Order], [Trade], [Balance], Summary)]
+            The orders, with trading day indices for the dates, the trades, the balance records and the summary of
+            each strategy, with order and trade ids starting from 1 for each strategy
+        """
+        starting = defaultdict(list)
+        for i, first_day in enumerate(self.first_days):
+            # a strategy that is live trades at least on its first trading day, which is before the newest one
+            if first_day < len(self.prices) - 1:
+                starting[first_day].append(i)
+        last_day = max((max(self.first_days[i], self.last_days[i]) for days in starting.values() for i in days),
+                       default=-1)
+        live = []
+        for trading_day in range(min(starting, default=0), last_day + 1):
+            if trading_day in starting:
+                live += starting[trading_day]
+            if live:
+                live = self._trade_day(live, trading_day)
+        return [(book.history, trades, ledger.balances(), ledger.summary)
+                for book, trades, ledger in zip(self.books, self.trades, self.ledgers)]
+
+    def _trade_day(self, live: [int], trading_day: int) -> [int]:
+        # the day's price is decoded once for every live strategy
+        price = self.prices[trading_day]
+        low = min(price.open, price.low, price.close)
+        high = max(price.open, price.high, price.close)
+        still_live = []
+        for i in live:
+            self._trade_strategy(i, trading_day, price, low, high)
+            if trading_day >= self.last_days[i]:
+                self._record(i, price.date, self.order_balances[i], self.cash_balances[i],
+                             self.numbers_of_shares[i] * price.close, self.numbers_of_shares[i])
+            else:
+                still_live.append(i)
+            self.ledgers[i].end_of_day()
+        return still_live
+
+    def _trade_strategy(self, i: int, trading_day: int, price: Price, low: Decimal, high: Decimal) -> None:
+        # the steps of BackTest.implement_, skipped when a strategy has no orders they could touch, and the active
+        # orders are only dropped from the book on the days some were filled or expired
+        book = self.books[i]
+        closed = trading_day in book.expiries
+        if book.sells:
+            closed |= self._process_executed_sell_orders(i, price, high)
+        if book.buys:
+            closed |= self._process_executed_buy_orders(i, trading_day, price, low)
+        if trading_day in book.expiries:
+            self._process_expired_orders(i, trading_day, price)
+        if self.cash_balances[i] > 0:
+            self._add_new_buy_order(i, trading_day, price)
+        if closed:
+            book.end_of_day(trading_day)
+
+    def _record(self, i: int, date: str, order_balance: Decimal, cash_balance: Decimal, invested_balance: Decimal,
+                number_of_shares: int) -> None:
+        self.order_balances[i] = order_balance
+        self.cash_balances[i] = cash_balance
+        self.numbers_of_shares[i] = number_of_shares
+        self.ledgers[i].record(date, order_balance, cash_balance, invested_balance, number_of_shares)
+
+    def _trade(self, i: int, order: Order, date: str, price: Decimal, total: Decimal) -> None:
+        trades = self.trades[i]
+        trades.append(Trade(trade_id=len(trades) + 1, order_id=order.order_id, number_of_shares=order.number_of_shares,
+                            date=date, price=price, total=total))
+        self.ledgers[i].trade(order, total)
+
+    def _process_executed_sell_orders(self, i: int, price: Price, high: Decimal) -> bool:
+        # every fill records a balance from the balances at the start of the step
+        filled = False
+        order_balance, cash_balance, number_of_shares = \
+            self.order_balances[i], self.cash_balances[i], self.numbers_of_shares[i]
+        for order in self.books[i].sells:
+            if order.trade_type == MARKET:
+                # a market sell adds the shares, the same as BackTest._process_executed_sell_orders
+                sale_price = price.open
+                new_number_of_shares = order.number_of_shares + number_of_shares
+            elif order.price <= high:
+                sale_price = order.price if order.price >= price.open else price.open
+                new_number_of_shares = number_of_shares - order.number_of_shares
+            else:
+                continue
+            sale_total = order.number_of_shares * sale_price
+            self._record(i, price.date, order_balance, cash_balance + sale_total,
+                         new_number_of_shares * price.close, new_number_of_shares)
+            order.active = False
+            filled = True
+            self._trade(i, order, price.date, sale_price, sale_total)
+        return filled
+
+    def _process_executed_buy_orders(self, i: int, trading_day: int, price: Price, low: Decimal) -> bool:
+        filled = False
+        order_balance, cash_balance, number_of_shares = \
+            self.order_balances[i], self.cash_balances[i], self.numbers_of_shares[i]
+        book = self.books[i]
+        for order in book.buys:
+            if order.active and order.price >= low:
+                buy_price = order.price if order.price <= price.open else price.open
+                buy_total = order.number_of_shares * buy_price
+                new_number_of_shares = number_of_shares + order.number_of_shares
+                self._record(i, price.date, order_balance - order.total, cash_balance + order.total - buy_total,
+                             new_number_of_shares * price.close, new_number_of_shares)
+                order.active = False
+                filled = True
+                self._trade(i, order, price.date, buy_price, buy_total)
+                if self.sell_offsets[i] is None:
+                    # the shares are held
+                    continue
+
+                sale_price = buy_price * self.sell_offsets[i]
+                book.add(Order(order_id=len(book) + 1, strategy_id=order.strategy_id, symbol=order.symbol,
+                               number_of_shares=order.number_of_shares, buy_sell=SELL, trade_type=LIMIT,
+                               open_date=trading_day + 1, close_date=self._close_day(i, trading_day),
+                               price=sale_price, total=order.number_of_shares * sale_price, active=True))
+        return filled
+
+    def _process_expired_orders(self, i: int, trading_day: int, price: Price) -> None:
+        book = self.books[i]
+        for order in book.expiring(trading_day, SELL):
+            # converted to a market sell at the next opening price
+            order.trade_type = MARKET
+        order_balance, cash_balance, number_of_shares = \
+            self.order_balances[i], self.cash_balances[i], self.numbers_of_shares[i]
+        expired = book.expiring(trading_day, BUY)
+        if expired:
+            invested_balance = number_of_shares * price.close
+            for order in expired:
+                order_balance -= order.total
+                cash_balance += order.total
+                self._record(i, price.date, order_balance, cash_balance, invested_balance, number_of_shares)
+                order.active = False
+
+    def _add_new_buy_order(self, i: int, trading_day: int, price: Price) -> None:
+        cash_balance = self.cash_balances[i]
+        default_order_amount = self.default_order_amounts[i]
+        order_amount = default_order_amount if default_order_amount < cash_balance else cash_balance
+        buy_offset_price = price.close * self.buy_offsets[i]
+        order_number_of_shares = int(order_amount / buy_offset_price)
+        if order_number_of_shares > 0:
+            book = self.books[i]
+            strategy = self.strategies[i]
+            total = buy_offset_price * order_number_of_shares
+            book.add(Order(order_id=len(book) + 1, strategy_id=strategy.strategy_id, symbol=strategy.symbol,
+                           number_of_shares=order_number_of_shares, buy_sell=BUY, trade_type=LIMIT,
+                           open_date=trading_day + 1, close_date=self._close_day(i, trading_day),
+                           price=buy_offset_price, total=total, active=True))
+            number_of_shares = self.numbers_of_shares[i]
+            self._record(i, self.prices[trading_day + 1].date, self.order_balances[i] + total, cash_balance - total,
+                         number_of_shares * price.close, number_of_shares)
+
+    def _close_day(self, i: int, trading_day: int) -> int:
+        return min(trading_day + 1 + self.order_durations[i], len(self.prices) - 1)
@@ -16,7 +16,7 @@ Parameters
 - description: string
 - buy_offset: at what percentage (<=1) of the current price to enter a limit buy order
 - sell_offset: after a successful purchase, at what percentage (>=1) of the buy price to enter a limit sell order
-- trade_type: currently only `LIMIT` is implemented
+- trade_type: the StrategyType of the strategy, one of ['limit', 'hold'] or a registered strategy type, see rules.py
 - order_duration: # of days before a limit order is cancelled
 - order_amount_ratio: percentage (<=1) of the starting balance, or total current balance, whichever is less, that is used for the next order amount
 - symbol: the stock symbol for the trading strategy, one of [QQQ, RITM]
@@ -29,7 +29,7 @@ Strategy
     A strategy record
 """
 
-Price = namedtuple('Price', ['symbol', 'date', 'open', 'high', 'low', 'close'])
+Price = namedtuple('Price', ['symbol', 'date', 'open', 'high', 'low', 'close', 'day_index'])
 """
 The historic pricing data is daily pricing information.  A historic price has specific features:
 
@@ -41,6 +41,8 @@ Parameters
 - high: the highest price on that day
 - low: the lowest price on that day
 - close: the price at the close of the day
+- day_index: int, the position of this trading day in the symbol's price series, used by the back testing engine to
+    compare dates as integers
 
 Returns
 -------
@@ -62,8 +64,8 @@ Parameters
 - number_of_shares: the integer number of shares
 - buy_sell: one of ['buy', 'sell']
 - trade_type: one of ['limit', 'market']
-- open_date: the date the order was opened in string iso format: '2023-04-10'
-- close_date: the date the order was closed in string iso format: '2023-04-17'
+- open_date: the trading day index the order was opened on, saved to the results in string iso format: '2023-04-10'
+- close_date: the trading day index the order was closed on, saved to the results in string iso format: '2023-04-17'
 - price: the limit price of the order
 - total: the total value of the order: number_of_shares * price
 - active: whether the tade is active, one of [True, False]
@@ -113,3 +115,235 @@ Returns
 Balance
     A balance record
 """
+
+Summary = recordtype('Summary',
+                     ['strategy_id', 'ending_total', 'ending_balance', 'max_total', 'max_balance', 'max_drawdown',
+                      'metrics'])
+"""
+Summary record, the running summary of the balance records of a strategy
+
+Parameters
+----------
+- strategy_id: which strategy is this summary for
+- ending_total: Decimal total balance of the last balance record: order_balance + cash_balance + invested_balance
+- ending_balance: the last Balance record
+- max_total: Decimal largest total balance at anytime, Decimal(0) until a balance record has a positive total
+- max_balance: the first Balance record with the largest total balance, None until max_total is positive
+- max_drawdown: Decimal largest drop of the total balance from its running max, as a fraction of that max.
+    None for the vector engine, which only keeps the max and ending balance records
+- metrics: the Metrics of the strategy, e.g. its Sharpe ratio, CAGR and win rate, accumulated while it was back tested.
+    None for the vector engines and for summaries of balance records read back, which have no trading days or trades
+
+Returns
+-------
+Summary
+    A summary record
+"""
+
+Parity = namedtuple('Parity', ['strategy_id', 'decimal_ending_total', 'ending_total', 'ending_error',
+                               'decimal_max_total', 'max_total', 'max_error'])
+"""
+Parity record, how close the results of an engine are to the results of the Decimal engine for a strategy
+
+Parameters
+----------
+- strategy_id: which strategy is this parity record for
+- decimal_ending_total: Decimal ending total balance of the Decimal engine
+- ending_total: Decimal ending total balance of the engine
+- ending_error: Decimal relative error of the ending total balance: |ending_total - decimal_ending_total| /
+    decimal_ending_total
+- decimal_max_total: Decimal largest total balance at anytime of the Decimal engine
+- max_total: Decimal largest total balance at anytime of the engine
+- max_error: Decimal relative error of the largest total balance
+
+Returns
+-------
+Parity
+    A parity record
+"""
+
+CachedResult = namedtuple('CachedResult', ['orders', 'trades', 'balances', 'summary', 'order_count', 'trade_count'])
+"""
+Cached result record, the results of back testing a strategy as they are kept by ResultCache
+
+Parameters
+----------
+- orders: the Order records, empty when the cache only keeps summaries or for the vector engines
+- trades: the Trade records, empty when the cache only keeps summaries or for the vector engines
+- balances: the Balance records that were saved
+- summary: the Summary of the balance records, None for the vector engines
+- order_count: the number of orders the back test placed, which the order ids of the next strategy follow
+- trade_count: the number of trades the back test made, which the trade ids of the next strategy follow
+
+Returns
+-------
+CachedResult
+    A cached result record
+"""
+
+Checkpoint = namedtuple('Checkpoint', ['strategy', 'date', 'trading_day', 'balance', 'summary', 'held', 'orders',
+                                       'order_count', 'trade_count'])
+"""
+Checkpoint record, the state of the Decimal engine at the end of the last trading day of a strategy, before its
+ending balance record, so that the strategy can be resumed over pricing data that has more trading days
+
+Parameters
+----------
+- strategy: the strategy that was back tested
+- date: the date of the last trading day in string iso format: '2023-04-10'
+- trading_day: the trading day index of the last trading day
+- balance: the current Balance record
+- summary: the Summary of the balance records
+- held: whether the current Balance record is held for the end of the day, see Ledger
+- orders: the active Order records, with trading day indices for the dates and ids starting from 1 for the strategy
+- order_count: the number of orders the strategy placed
+- trade_count: the number of trades the strategy made
+
+Returns
+-------
+Checkpoint
+    A checkpoint record
+"""
+
+Window = namedtuple('Window', ['window_id', 'train_start', 'train_end', 'test_start', 'test_end', 'symbol',
+                               'buy_offset', 'sell_offset', 'order_duration', 'order_amount_ratio', 'train_return',
+                               'test_return'])
+"""
+Window record, the strategy optimized on the train dates of a walk forward window and how it did on the test dates
+
+Parameters
+----------
+- window_id: the index of the window, from 0
+- train_start, train_end: the first and last trading day of the train dates in string iso format: '2023-04-10'
+- test_start, test_end: the first and last trading day of the test dates, the trading days after the train dates
+- symbol, buy_offset, sell_offset, order_duration, order_amount_ratio: the optimized strategy parameters, see Strategy
+- train_return: Decimal objective of the strategy over the train dates as a fraction of the starting balance, less 1
+- test_return: Decimal objective of the strategy over the test dates as a fraction of the starting balance, less 1
+
+Returns
+-------
+Window
+    A window record
+"""
+
+WalkForwardReport = namedtuple('WalkForwardReport', ['windows', 'train_days', 'test_days', 'mean_train_return',
+                                                     'mean_test_return', 'compounded_test_return', 'positive_windows',
+                                                     'efficiency'])
+"""
+Walk forward report record, the consolidated results of the windows of a walk forward
+
+Parameters
+----------
+- windows: the Window records, in date order
+- train_days, test_days: the number of trading days of the train and test dates of every window
+- mean_train_return, mean_test_return: Decimal mean train and test return of the windows
+- compounded_test_return: Decimal return of reinvesting through the test dates of the windows one after the other
+- positive_windows: Decimal fraction of the windows with a positive test return
+- efficiency: Decimal mean test return per trading day over mean train return per trading day, how much of the
+    optimized performance holds out of sample; None when the mean train return is 0
+
+Returns
+-------
+WalkForwardReport
+    A walk forward report record
+"""
+
+StrategyProfile = namedtuple('StrategyProfile', ['strategy_id', 'seconds', 'days', 'sell_fills', 'buy_fills',
+                                                 'sell_expiry', 'buy_expiry', 'new_order', 'orders_scanned',
+                                                 'max_active_orders', 'fills', 'balance_records'])
+"""
+Strategy profile record, where the time of the Decimal engine went while it back tested a strategy, see Instrumentation
+
+Parameters
+----------
+- strategy_id: the strategy that was back tested
+- seconds: the wall clock seconds of the back test, from its first to its last trading day
+- days: the number of trading days that were simulated
+- sell_fills, buy_fills, sell_expiry, buy_expiry, new_order: the seconds spent in each of the five daily steps
+- orders_scanned: the number of orders the sell and buy fill steps looked at, over every trading day
+- max_active_orders: the largest number of active orders at the start of a trading day
+- fills: the number of trades
+- balance_records: the number of balance records, including the ones the history mode does not keep
+
+Returns
+-------
+StrategyProfile
+    A strategy profile record
+"""
+
+RunProfile = namedtuple('RunProfile', ['strategies', 'seconds', 'read', 'load', 'write', 'simulate', 'sell_fills',
+                                       'buy_fills', 'sell_expiry', 'buy_expiry', 'new_order', 'days',
+                                       'orders_scanned', 'max_active_orders', 'fills', 'balance_records'])
+"""
+Run profile record, the totals of the strategy profiles of a BackTest and the time of its I/O, see Instrumentation
+
+Parameters
+----------
+- strategies: the number of strategy profiles
+- seconds: the wall clock seconds from the start of the BackTest to its close
+- read: the seconds spent reading the pricing columns of the symbols, from their csv files or caches
+- load: the seconds spent loading the Decimal prices of the symbols, including reading their columns
+- write: the seconds spent writing the results to the ../results folder
+- simulate: the seconds of the strategy back tests
+- sell_fills, buy_fills, sell_expiry, buy_expiry, new_order, days, orders_scanned, fills, balance_records: the sums
+    over the strategy profiles
+- max_active_orders: the max over the strategy profiles
+
+Returns
+-------
+RunProfile
+    A run profile record
+"""
+
+Progress = namedtuple('Progress', ['done', 'total', 'seconds', 'strategies_per_second', 'eta', 'utilization'])
+"""
+Progress record of a sweep, see ProgressReporter
+
+Parameters
+----------
+- done: the number of strategies back tested so far
+- total: the number of strategies of the sweep
+- seconds: the wall clock seconds since the sweep started
+- strategies_per_second: done / seconds
+- eta: the estimated seconds until the sweep is done at the current rate, None before the first strategy is done
+- utilization: the fraction of the time the worker processes spent back testing, busy seconds / (workers * seconds)
+
+Returns
+-------
+Progress
+    A progress record
+"""
+
+OrderRequest = namedtuple('OrderRequest', ['buy_sell', 'number_of_shares', 'price'])
+"""
+Order request record, an order a StrategyType asks the back test to enter, see rules.py
+
+Parameters
+----------
+- buy_sell: one of ['buy', 'sell']
+- number_of_shares: the integer number of shares
+- price: the limit price of the order.  The order opens on the next trading day and closes after the order duration of
+    the strategy; a buy order that did not fill is cancelled, a sell order that did not fill becomes a market order
+
+Returns
+-------
+OrderRequest
+    An order request record
+"""
+
+Rule = namedtuple('Rule', ['buy_offset', 'sell_offset', 'order_duration', 'order_amount_ratio'])
+"""
+Rule record, the declarative form of a strategy that the vector engines compile to a batch, see rules.py
+
+Parameters
+----------
+- buy_offset: every trading day enter a limit buy at the closing price * buy_offset
+- sell_offset: when a buy fills enter a limit sell at the buy price * sell_offset, None to hold the shares
+- order_duration: # of trading days before an order is closed
+- order_amount_ratio: percentage (<=1) of the starting balance, or the cash balance, whichever is less, of each buy
+
+Returns
+-------
+Rule
+    A rule record
+"""
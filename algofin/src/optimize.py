@@ -1,12 +1,542 @@
+import math
+import random
+import time
+from datetime import date, timedelta
 from decimal import Decimal
-from objects import Strategy
+from itertools import product
+from logs import configure
+from metrics import METRICS, MAX_DRAWDOWN_DAYS
+from objects import Strategy, Summary
 from strategies import LIMIT
-from trading import BackTest
+from sweep import Sweep
+from result_cache import ResultCache
+from trading import BackTest, DECIMAL
 
+# specify constants
+GRID = 'grid'
+RANDOM = 'random'
+SUCCESSIVE_HALVING = 'successive_halving'
+TPE = 'tpe'
+ENDING_TOTAL = 'ending_total'
+MAX_TOTAL = 'max_total'
+MAX_DRAWDOWN = 'max_drawdown'
+# the objectives that are minimized, their scores are negated so that the best score is always the largest
+MINIMIZED = {MAX_DRAWDOWN, MAX_DRAWDOWN_DAYS}
 
-def find_optimal_strategy(start, end) -> Strategy:
+# the values of each strategy parameter that are searched, in the order of the grid search
+SPACE = {
+    'symbol': ['QQQ', 'RITM'],
+    'order_amount_ratio': [Decimal('0.05'), Decimal('0.10'), Decimal('0.15'), Decimal('0.20')],
+    'buy_offset': [Decimal('0.90'), Decimal('0.91'), Decimal('0.92'), Decimal('0.93'), Decimal('0.94'),
+                   Decimal('0.95'), Decimal('0.96'), Decimal('0.97'), Decimal('0.98'), Decimal('0.99')],
+    'sell_offset': [Decimal('1.01'), Decimal('1.02'), Decimal('1.03'), Decimal('1.04'), Decimal('1.05'),
+                    Decimal('1.06'), Decimal('1.07'), Decimal('1.08'), Decimal('1.09'), Decimal('1.10')],
+    'order_duration': [10],
+}
+
+
+def get_score(summary: Summary, objective: str):
+    """
+    Gets the score of a back tested strategy for an objective, the larger the better
+
+    Parameters
+    ----------
+    summary
+        The Summary of the strategy
+    objective
+        A Summary attribute, one of ['ending_total', 'max_total', 'max_drawdown'], or a Metrics attribute, one of
+        ['sharpe', 'sortino', 'max_drawdown_days', 'cagr', 'win_rate', 'average_trade_return', 'exposure', 'turnover']
+
+    Returns
+    -------
+    Decimal or float
+        The value of the objective, negated when it is minimized, see MINIMIZED.  -inf when the metric is undefined
+        for the strategy, e.g. the win rate without a closed trade, so that it ranks last
     """
-    For a specified date range, iterates over lists of potential values for a strategy and back tests them to find the
+    source = summary.metrics if objective in METRICS else summary
+    value = None if source is None else getattr(source, objective)
+    if value is None and (source is None or objective == MAX_DRAWDOWN):
+        raise ValueError('the ' + objective + ' objective needs the decimal or multi engine, the vector engines only '
+                         'keep the max and ending balances')
+    if value is None:
+        return float('-inf')
+    return -value if objective in MINIMIZED else value
+
+
+class Budget:
+    def __init__(self, backtests: int = None, seconds: float = None):
+        """
+        How much a search may spend, in back tests, in wall clock seconds or both; None is unlimited.  The budget is
+        checked between batches of back tests, so a seconds budget can be overrun by one batch.
+
+        Parameters
+        ----------
+        backtests
+            The max number of strategies back tested, a back test over a short window counts as one
+        seconds
+            The max wall clock seconds since the search started
+
+        Returns
+        -------
+        Budget
+        """
+        self.backtests = backtests
+        self.seconds = seconds
+        self.spent = 0
+        self.started = time.perf_counter()
+
+    def spend(self, backtests: int) -> None:
+        self.spent += backtests
+
+    def remaining(self) -> int:
+        """
+        Gets the number of back tests left, None when only the time is limited
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            The number of back tests left
+        """
+        return None if self.backtests is None else max(self.backtests - self.spent, 0)
+
+    def exhausted(self) -> bool:
+        """
+        Whether the search must stop
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True when the back tests or the seconds are spent
+        """
+        out_of_time = self.seconds is not None and time.perf_counter() - self.started >= self.seconds
+        return out_of_time or self.remaining() == 0
+
+
+class Search:
+    def __init__(self, back_test: BackTest, start: str, end: str, budget: Budget = None, objective: str = ENDING_TOTAL,
+                 workers: int = 1, chunk_size: int = 10, batch_size: int = 100):
+        """
+        Back tests candidate strategy parameters for a search and keeps the best strategy over the full date range
+
+        Parameters
+        ----------
+        back_test
+            The BackTest the candidates are back tested with, it saves the results
+        start
+            Start date of the full date range in string format: '2005-01-01'
+        end
+            End date of the full date range in string format: '2016-01-01'
+        budget
+            The budget of the search, unlimited by default
+        objective
+            What the best strategy is ranked by, see get_score, e.g. 'ending_total' or 'sharpe'
+        workers
+            The number of worker processes, see Sweep; 1 back tests in this process.  The pool of worker processes is
+            started once for each run of a search and reused by every batch, see open
+        chunk_size
+            The number of strategies sent to a worker process at a time
+        batch_size
+            The max number of candidates back tested at a time, the vector engines back test a batch at once
+
+        Returns
+        -------
+        Search
+        """
+        self.back_test = back_test
+        self.start = start
+        self.end = end
+        self.budget = budget or Budget()
+        self.objective = objective
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.strategy_id = 1
+        self.best_strategy = None
+        self.best_score = None
+        self.sweep = None
+        self.opened = []
+
+    def __enter__(self):
+        # a search that is already open stays open when a run inside it ends
+        self.opened.append(self.sweep is None)
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.opened.pop():
+            self.close()
+
+    def open(self) -> None:
+        """
+        Starts the pool of worker processes of the search, when it has more than one worker
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.workers != 1 and self.sweep is None:
+            self.sweep = Sweep(self.back_test, self.workers, self.chunk_size)
+            self.sweep.open()
+
+    def close(self) -> None:
+        """
+        Stops the pool of worker processes of the search
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.sweep is not None:
+            self.sweep.close()
+            self.sweep = None
+
+    def size(self) -> int:
+        """
+        Gets the size of the next batch of back tests within the budget
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            The number of candidates to back test next, 0 when the budget is exhausted
+        """
+        if self.budget.exhausted():
+            return 0
+        return min(self.batch_size, self.budget.remaining() or self.batch_size)
+
+    def evaluate(self, candidates: [dict], start: str = None, end: str = None) -> [Decimal]:
+        """
+        Back tests candidates over a date range, the full date range by default
+
+        Parameters
+        ----------
+        candidates
+            The strategy parameters, e.g. {'symbol': 'QQQ', 'buy_offset': Decimal('0.9'), ...}
+        start
+            Start date in string format: '2005-01-01'
+        end
+            End date in string format: '2016-01-01'
+
+        Returns
+        -------
+        [Decimal]
+            The score of each candidate, see get_score
+        """
+        start, end = start or self.start, end or self.end
+        strategies = [self._strategy(candidate, start, end) for candidate in candidates]
+        if self.workers == 1:
+            self.back_test.implement_all_(strategies)
+        elif self.sweep is not None:
+            self.sweep.implement_all_(strategies)
+        else:
+            Sweep(self.back_test, self.workers, self.chunk_size).implement_all_(strategies)
+        self.budget.spend(len(strategies))
+        scores = [get_score(self.back_test.results.summaries[strategy.strategy_id], self.objective)
+                  for strategy in strategies]
+        for strategy, score in zip(strategies, scores):
+            self._track_best(strategy, score)
+        return scores
+
+    def _strategy(self, candidate: dict, start: str, end: str) -> Strategy:
+        self.strategy_id += 1
+        return Strategy(strategy_id=self.strategy_id,
+                        strategy_name='limit buy offset down; limit sell offset up',
+                        description='Set a limit buy at current price * buy offset; when that purchase is made; set a limit sell at purchase price * sell offset. The purchase order expires after the specified duration of trading days if not fulfilled.',
+                        trade_type=LIMIT,
+                        start_date=start,
+                        end_date=end,
+                        **candidate)
+
+    def _track_best(self, strategy: Strategy, score: Decimal) -> None:
+        # only full date range back tests compete, the first one wins a tie
+        full_range = (strategy.start_date, strategy.end_date) == (self.start, self.end)
+        if full_range and (self.best_score is None or score > self.best_score):
+            self.best_strategy = strategy
+            self.best_score = score
+
+
+class GridSearch:
+    def __init__(self, space: dict = None, seed: int = None):
+        """
+        Searches every combination of the parameter values, in order
+
+        Parameters
+        ----------
+        space
+            The values of each strategy parameter, see SPACE
+        seed
+            Not used, the grid has no randomness
+
+        Returns
+        -------
+        GridSearch
+        """
+        self.space = space or SPACE
+        self.combinations = (dict(zip(self.space, values)) for values in product(*self.space.values()))
+
+    def ask(self, count: int) -> [dict]:
+        """
+        Gets the next candidates to back test
+
+        Parameters
+        ----------
+        count
+            The max number of candidates
+
+        Returns
+        -------
+        [dict]
+            The candidates, fewer than count when the space is exhausted
+        """
+        return [candidate for _, candidate in zip(range(count), self.combinations)]
+
+    def tell(self, candidates: [dict], scores: [Decimal]) -> None:
+        """
+        Learns the scores of back tested candidates
+
+        Parameters
+        ----------
+        candidates
+            The candidates
+        scores
+            The objective of each candidate
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    def run(self, search: Search) -> (Strategy, Decimal):
+        """
+        Asks for candidates and back tests them until the space or the budget is exhausted
+
+        Parameters
+        ----------
+        search
+            The search that back tests the candidates
+
+        Returns
+        -------
+        (Strategy, Decimal)
+            The best strategy over the full date range
+            Its objective
+        """
+        with search:
+            candidates = self.ask(search.size())
+            while candidates:
+                self.tell(candidates, search.evaluate(candidates))
+                candidates = self.ask(search.size())
+        return search.best_strategy, search.best_score
+
+
+class RandomSearch(GridSearch):
+    def __init__(self, space: dict = None, seed: int = None):
+        """
+        Searches the combinations of the parameter values in a random order, without repeats
+
+        Parameters
+        ----------
+        space
+            The values of each strategy parameter, see SPACE
+        seed
+            The seed of the random order, for reproducible searches
+
+        Returns
+        -------
+        RandomSearch
+        """
+        super().__init__(space)
+        self.random = random.Random(seed)
+        self.seen = set()
+        self.size = math.prod(len(values) for values in self.space.values())
+
+    def ask(self, count: int) -> [dict]:
+        candidates = []
+        while len(candidates) < count and len(self.seen) < self.size:
+            candidates.append(self._claim(self._sample()))
+        return candidates
+
+    def _sample(self) -> tuple:
+        values = tuple(self.random.randrange(len(values)) for values in self.space.values())
+        while values in self.seen:
+            values = tuple(self.random.randrange(len(values)) for values in self.space.values())
+        return values
+
+    def _claim(self, indexes: tuple) -> dict:
+        # candidates are identified by the index of each of their values
+        self.seen.add(indexes)
+        return {name: values[index] for (name, values), index in zip(self.space.items(), indexes)}
+
+
+class TPESearch(RandomSearch):
+    def __init__(self, space: dict = None, seed: int = None, startup: int = 20, gamma: float = 0.25,
+                 samples: int = 24, batch: int = 5):
+        """
+        Tree-structured Parzen estimator search over the parameter values.  After startup random candidates, the
+        back tested candidates are split into the best gamma fraction and the rest, and each parameter gets a smoothed
+        histogram of its values in both groups.  New candidates are sampled from the histograms of the best group and
+        the one most likely to be in the best group rather than the rest is back tested next.
+
+        Parameters
+        ----------
+        space
+            The values of each strategy parameter, see SPACE
+        seed
+            The seed of the sampling, for reproducible searches
+        startup
+            The number of random candidates before the histograms are used
+        gamma
+            The fraction of the back tested candidates in the best group
+        samples
+            The number of candidates sampled from the histograms for each candidate returned
+        batch
+            The max number of candidates returned at a time once the histograms are used, so that they are updated
+            often
+
+        Returns
+        -------
+        TPESearch
+        """
+        super().__init__(space, seed)
+        self.startup = startup
+        self.gamma = gamma
+        self.samples = samples
+        self.batch = batch
+        self.observed = []
+
+    def tell(self, candidates: [dict], scores: [Decimal]) -> None:
+        for candidate, score in zip(candidates, scores):
+            self.observed.append((score, tuple(values.index(candidate[name])
+                                               for name, values in self.space.items())))
+
+    def ask(self, count: int) -> [dict]:
+        if len(self.observed) < self.startup:
+            return super().ask(min(count, self.startup - len(self.observed)))
+        ranked = sorted(self.observed, key=lambda observation: observation[0], reverse=True)
+        split = max(1, int(self.gamma * len(ranked)))
+        good = self._histograms([indexes for _, indexes in ranked[:split]])
+        bad = self._histograms([indexes for _, indexes in ranked[split:]])
+        candidates = []
+        while len(candidates) < min(count, self.batch) and len(self.seen) < self.size:
+            candidates.append(self._claim(self._best_sample(good, bad)))
+        return candidates
+
+    def _histograms(self, observations: [tuple]) -> [[float]]:
+        # the smoothed frequency of each value of each parameter
+        histograms = []
+        for dimension, values in enumerate(self.space.values()):
+            counts = [1.0] * len(values)
+            for indexes in observations:
+                counts[indexes[dimension]] += 1
+            histograms.append([count / sum(counts) for count in counts])
+        return histograms
+
+    def _best_sample(self, good: [[float]], bad: [[float]]) -> tuple:
+        best, best_ratio = None, -1.0
+        for _ in range(self.samples):
+            indexes = tuple(self.random.choices(range(len(weights)), weights)[0] for weights in good)
+            ratio = math.prod(good[d][i] / bad[d][i] for d, i in enumerate(indexes))
+            if indexes not in self.seen and ratio > best_ratio:
+                best, best_ratio = indexes, ratio
+        # falls back to a random unseen candidate when every sample was back tested already
+        return best if best is not None else self._sample()
+
+
+class SuccessiveHalving(RandomSearch):
+    def __init__(self, space: dict = None, seed: int = None, candidates: int = 81, eta: int = 3,
+                 min_days: int = 365):
+        """
+        Successive halving: back tests random candidates over a short window at the start of the date range, keeps the
+        best 1 / eta of them, and back tests the survivors over a window eta times longer, until the survivors are back
+        tested over the full date range
+
+        Parameters
+        ----------
+        space
+            The values of each strategy parameter, see SPACE
+        seed
+            The seed of the random candidates, for reproducible searches
+        candidates
+            The number of candidates back tested over the first window
+        eta
+            The reduction factor of each rung
+        min_days
+            The min length of a window in calendar days
+
+        Returns
+        -------
+        SuccessiveHalving
+        """
+        super().__init__(space, seed)
+        self.candidates = candidates
+        self.eta = eta
+        self.min_days = min_days
+
+    def run(self, search: Search) -> (Strategy, Decimal):
+        with search:
+            return self._run(search)
+
+    def _run(self, search: Search) -> (Strategy, Decimal):
+        survivors = self.ask(self.candidates)
+        for end in self._window_ends(search.start, search.end, len(survivors)):
+            remaining = search.budget.remaining()
+            if remaining is not None and remaining < len(survivors):
+                # the budget does not cover every rung, the best survivors skip to the full date range
+                end, survivors = search.end, survivors[:remaining]
+            if not survivors or search.budget.exhausted():
+                break
+            survivors = self._promote(search, survivors, end)
+            if end == search.end:
+                break
+        return search.best_strategy, search.best_score
+
+    def _promote(self, search: Search, candidates: [dict], end: str) -> [dict]:
+        # back tests a rung and returns the best candidates first, in their previous order on a tie
+        scores = []
+        for i in range(0, len(candidates), search.batch_size):
+            scores += search.evaluate(candidates[i:i + search.batch_size], search.start, end)
+        ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        return [candidates[i] for i in ranked[:max(1, len(candidates) // self.eta)]]
+
+    def _window_ends(self, start: str, end: str, candidates: int) -> [str]:
+        # one rung per reduction of the candidates, the last rung is the full date range
+        rungs = 1
+        while candidates >= self.eta:
+            candidates //= self.eta
+            rungs += 1
+        first, last = date.fromisoformat(start), date.fromisoformat(end)
+        days = (last - first).days
+        lengths = sorted({max(self.min_days, days // self.eta ** (rungs - 1 - rung)) for rung in range(rungs)})
+        return [(first + timedelta(days=length)).isoformat() for length in lengths if length < days] + [end]
+
+
+SEARCHES = {GRID: GridSearch, RANDOM: RandomSearch, SUCCESSIVE_HALVING: SuccessiveHalving, TPE: TPESearch}
+
+
+def find_optimal_strategy(start, end, engine=DECIMAL, workers=1, chunk_size=10, search=GRID, budget=None,
+                          space=None, seed=None, objective=ENDING_TOTAL, cache=None) -> Strategy:
+    """
+    For a specified date range, searches the potential values for a strategy and back tests them to find the
     optimal combination of configuration values.  saves teh results in the results folder and prints out the best
     strategy
 
@@ -18,84 +548,59 @@ def find_optimal_strategy(start, end) -> Strategy:
     end
         End date in string format: '2016-01-01'
 
+    engine
+        The BackTest engine, one of ['decimal', 'multi', 'vector', 'fixed'].  The vector and fixed engines back test
+        all the strategies of a symbol in one batch and only save their max and ending balances
+
+    workers
+        The number of worker processes the strategies are back tested on, None for the number of CPUs.  The results
+        are the same as with a single worker
+
+    chunk_size
+        The number of strategies sent to a worker process at a time
+
+    search
+        How the values are searched, one of ['grid', 'random', 'successive_halving', 'tpe']
+        - grid: every combination of the values, in order
+        - random: the combinations in a random order
+        - successive_halving: random combinations over short windows first, the best are promoted to longer windows
+        - tpe: random combinations first, then the combinations most like the best ones so far
+
+    budget
+        The Budget of the search in back tests or seconds, unlimited by default
+
+    space
+        The values of each strategy parameter, defaults to SPACE
+
+    seed
+        The seed of the random searches
+
+    objective
+        What the best strategy is ranked by, see get_score: the ending or max total balance, the max drawdown, or a
+        performance metric such as 'sharpe', 'sortino', 'cagr' or 'win_rate'.  The metrics are accumulated while the
+        strategies are back tested, so they need the decimal or multi engine
+
+    cache
+        The ResultCache of the back tests, so the strategies of an earlier search are not simulated again.  The
+        worker processes share it, see Sweep
+
     Returns
     -------
     Strategy
         The optimally configured strategy from the values iterated over
     """
-    symbols = [
-        'QQQ',
-        'RITM'
-    ]
-
-    buy_offsets = [
-        Decimal('0.90'),
-        Decimal('0.91'),
-        Decimal('0.92'),
-        Decimal('0.93'),
-        Decimal('0.94'),
-        Decimal('0.95'),
-        Decimal('0.96'),
-        Decimal('0.97'),
-        Decimal('0.98'),
-        Decimal('0.99'),
-    ]
-
-    sell_offsets = [
-        Decimal('1.01'),
-        Decimal('1.02'),
-        Decimal('1.03'),
-        Decimal('1.04'),
-        Decimal('1.05'),
-        Decimal('1.06'),
-        Decimal('1.07'),
-        Decimal('1.08'),
-        Decimal('1.09'),
-        Decimal('1.10'),
-    ]
-
-    order_amount_ratios = [
-        Decimal('0.05'),
-        Decimal('0.10'),
-        Decimal('0.15'),
-        Decimal('0.20')
-    ]
-
-    strategy_id = 1
-
-    back_test = BackTest()
-
-    for symbol in symbols:
-        for order_amount_ratio in order_amount_ratios:
-            for buy_offset in buy_offsets:
-                for sell_offset in sell_offsets:
-                    strategy = Strategy(strategy_id=(strategy_id := strategy_id + 1),
-                                        strategy_name='limit buy offset down; limit sell offset up',
-                                        description='Set a limit buy at current price * buy offset; when that purchase is made; set a limit sell at purchase price * sell offset. The purchase order expires after the specified duration of trading days if not fulfilled.',
-                                        buy_offset=buy_offset,
-                                        sell_offset=sell_offset,
-                                        trade_type=LIMIT,
-                                        order_duration=10,
-                                        order_amount_ratio=order_amount_ratio,
-                                        symbol=symbol,
-                                        start_date=start,
-                                        end_date=end)
-
-                    back_test.implement_(strategy)
-
-    anytime_strategy_id, anytime_balance_amount, anytime_balance = back_test.get_max_strategy_balance_at_anytime()
-    anytime_strategy = back_test.dao.get_strategy(anytime_strategy_id)
-    print('Max balance anytime:', anytime_strategy_id, anytime_balance_amount, anytime_balance)
-    print(anytime_strategy)
-
-    ending_strategy_id, ending_balance_amount, ending_balance = back_test.get_max_strategy_ending_balance()
-    ending_strategy = back_test.dao.get_strategy(ending_strategy_id)
-    print('Max ending balance:', ending_strategy_id, ending_balance_amount, ending_balance)
-    print(ending_strategy)
-
-    return ending_strategy
+    back_test = BackTest(engine=engine, cache=cache)
+    searcher = SEARCHES[search](space, seed)
+    with back_test:
+        strategy, score = searcher.run(Search(back_test, start, end, budget, objective, workers, chunk_size))
+    print('Best', objective + ':', strategy.strategy_id if strategy else None, score)
+    print(strategy)
+
+    return strategy
 
 
 if __name__ == '__main__':
-    best_strategy = find_optimal_strategy('2005-01-01', '2016-01-01')
+    configure()
+    with ResultCache() as result_cache:
+        best_strategy = find_optimal_strategy('2005-01-01', '2016-01-01', cache=result_cache)
     print('\n\nBest strategy:', best_strategy)
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from objects import Order
+
+# specify constants
+BUY = 'buy'
+SELL = 'sell'
+
+
+class OrderBook:
+    def __init__(self, archived: int = 0):
+        """
+        Indexes the orders of a single strategy back test so that each trading day only touches the live orders.
+
+        - history: every order in creation (order_id) order, append-only; this is what is saved to the results
+        - buys: the active buy orders in order_id order
+        - sells: the active sell orders in order_id order
+        - expiries: the orders bucketed by their close date trading day index
+
+        Filled and expired orders are marked inactive and dropped from the active lists, but stay in the history.
+        A book restored from a checkpoint only holds the orders that were active, the orders placed before them are
+        archived: counted by len, so the order ids carry on, but not kept.
+
+        Parameters
+        ----------
+        archived
+            The number of orders placed before the checkpoint the book is restored from
+
+        Returns
+        -------
+        OrderBook
+        """
+        self.archived = archived
+        self.history = []
+        self.buys = []
+        self.sells = []
+        self.expiries = defaultdict(list)
+
+    def __len__(self) -> int:
+        return self.archived + len(self.history)
+
+    def add(self, order: Order) -> None:
+        """
+        Adds a new active order to the book
+
+        Parameters
+        ----------
+        order
+            The new order
+
+        Returns
+        -------
+        None
+        """
+        self.history.append(order)
+        if order.buy_sell == BUY:
+            self.buys.append(order)
+        else:
+            self.sells.append(order)
+        self.expiries[order.close_date].append(order)
+
+    def expiring(self, trading_day: int, buy_sell: str) -> [Order]:
+        """
+        Gets the active orders of one side that close on the trading day, in order_id order
+
+        Parameters
+        ----------
+        trading_day
+            The trading day index
+        buy_sell
+            one of ['buy', 'sell']
+
+        Returns
+        -------
+        [Order]
+            The active orders closing on the trading day
+        """
+        return [order for order in self.expiries.get(trading_day, ()) if order.active and order.buy_sell == buy_sell]
+
+    def end_of_day(self, trading_day: int) -> None:
+        """
+        Drops the orders that were filled or expired during the trading day from the active lists
+
+        Parameters
+        ----------
+        trading_day
+            The trading day index
+
+        Returns
+        -------
+        None
+        """
+        self.expiries.pop(trading_day, None)
+        self.buys = [order for order in self.buys if order.active]
+        self.sells = [order for order in self.sells if order.active]
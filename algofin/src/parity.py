@@ -0,0 +1,48 @@
+from objects import Parity, Strategy
+from results import Results
+from strategies import Strategies
+from ledger import SUMMARY
+from trading import BackTest, FIXED
+
+
+def parity_report(strategies: [Strategy], engine: str = FIXED, starting_balance: int = 10000) -> [Parity]:
+    """
+    Back tests strategies with the Decimal engine and with a vector engine, without saving any results, and compares
+    their ending and max total balances
+
+    Parameters
+    ----------
+    strategies
+        The strategies that are compared
+    engine
+        The engine compared to the Decimal engine, one of ['vector', 'fixed']
+    starting_balance
+        The starting balance for back testing
+
+    Returns
+    -------
+    [Parity]
+        One parity record per strategy, in the order of the strategies
+    """
+    decimal_back_test = BackTest(starting_balance, history=SUMMARY)
+    decimal_summaries = {strategy.strategy_id: decimal_back_test._simulate_(strategy)[3] for strategy in strategies}
+    results = Results()
+    results.add_balances(BackTest(starting_balance, engine)._simulate_vector_(strategies), track_drawdown=False)
+
+    report = []
+    for strategy in strategies:
+        expected = decimal_summaries[strategy.strategy_id]
+        summary = results.summaries[strategy.strategy_id]
+        report.append(Parity(strategy_id=strategy.strategy_id,
+                             decimal_ending_total=expected.ending_total,
+                             ending_total=summary.ending_total,
+                             ending_error=abs(summary.ending_total - expected.ending_total) / expected.ending_total,
+                             decimal_max_total=expected.max_total,
+                             max_total=summary.max_total,
+                             max_error=abs(summary.max_total - expected.max_total) / expected.max_total))
+    return report
+
+
+if __name__ == '__main__':
+    for parity in parity_report(Strategies.get_strategies()):
+        print(parity)
@@ -0,0 +1,208 @@
+import os
+from datetime import date
+from decimal import Decimal, localcontext
+from itertools import groupby
+from objects import Balance, Order, Strategy, Trade
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the parquet results backend is optional: pip install algofin[parquet]
+    pa = pq = None
+
+# specify constants
+SCALE = 18
+"""
+Number of decimal places of the Decimal columns, decimal128(38, 18).  The Decimal engine produces at most 11 decimal
+places and the vector engine at most 17, so the values are stored exactly; a value with more decimal places is rounded
+half even to 18.  Values read back compare equal to the values written but carry all 18 decimal places.
+"""
+PRECISION = 38
+OBJECTS = {'strategies': Strategy, 'orders': Order, 'trades': Trade, 'balances': Balance}
+
+
+def _schemas() -> dict:
+    money = pa.decimal128(PRECISION, SCALE)
+    return {
+        'strategies': pa.schema([('strategy_id', pa.int64()), ('strategy_name', pa.string()),
+                                 ('description', pa.string()), ('buy_offset', money), ('sell_offset', money),
+                                 ('trade_type', pa.string()), ('order_duration', pa.int64()),
+                                 ('order_amount_ratio', money), ('symbol', pa.string()),
+                                 ('start_date', pa.date32()), ('end_date', pa.date32())]),
+        'orders': pa.schema([('order_id', pa.int64()), ('strategy_id', pa.int64()), ('symbol', pa.string()),
+                             ('number_of_shares', pa.int64()), ('buy_sell', pa.string()), ('trade_type', pa.string()),
+                             ('open_date', pa.date32()), ('close_date', pa.date32()), ('price', money),
+                             ('total', money), ('active', pa.bool_())]),
+        'trades': pa.schema([('trade_id', pa.int64()), ('order_id', pa.int64()), ('number_of_shares', pa.int64()),
+                             ('date', pa.date32()), ('price', money), ('total', money)]),
+        'balances': pa.schema([('strategy_id', pa.int64()), ('date', pa.date32()), ('order_balance', money),
+                               ('cash_balance', money), ('invested_balance', money),
+                               ('number_of_shares', pa.int64())]),
+    }
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError('the parquet results backend needs pyarrow: pip install algofin[parquet]')
+
+
+def _to_column(values, data_type):
+    if pa.types.is_decimal(data_type):
+        exponent = Decimal(1).scaleb(-SCALE)
+        # the default context has 28 digits, too few for the 20 integer digits of a decimal128 column
+        with localcontext() as context:
+            context.prec = PRECISION
+            values = [Decimal(value).quantize(exponent) for value in values]
+    elif pa.types.is_date(data_type):
+        values = [date.fromisoformat(value) for value in values]
+    return pa.array(values, type=data_type)
+
+
+def _from_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def read_parquet(path: str, name: str, strategy_id: int = None) -> list:
+    """
+    Reads the records of a results table saved by ParquetSink.  With a strategy id only the row groups of that
+    strategy are read: balances, orders and strategies are filtered on strategy_id, and trades on the order_id range
+    of the strategy's orders.
+
+    Parameters
+    ----------
+    path
+        The results folder
+    name
+        One of ['strategies', 'orders', 'trades', 'balances']
+    strategy_id
+        Only read the records of this strategy, None for every record
+
+    Returns
+    -------
+    list
+        The records in the order they were written, e.g. [Balance]
+    """
+    _require_pyarrow()
+    folder = path + '/' + name
+    if not os.path.exists(folder):
+        return []
+    filters = None
+    if strategy_id is not None and name == 'trades':
+        order_ids = [order.order_id for order in read_parquet(path, 'orders', strategy_id)]
+        if not order_ids:
+            return []
+        filters = [('order_id', '>=', min(order_ids)), ('order_id', '<=', max(order_ids))]
+    elif strategy_id is not None:
+        filters = [('strategy_id', '=', strategy_id)]
+    table = pq.read_table(folder, schema=_schemas()[name], filters=filters)
+    return [OBJECTS[name](*map(_from_value, row.values())) for row in table.to_pylist()]
+
+
+class ParquetSink:
+    def __init__(self, path: str, buffer_rows: int = 10000):
+        """
+        Buffered writer of result rows to typed parquet tables in a results folder, a drop in for ResultsSink.
+
+        Each table is a folder of parquet files, e.g. balances/part-00000.parquet, and every flush writes one more file
+        per table so that the rows written so far can be read while the run goes on.  Within a file, the orders and
+        balances have one row group per strategy, so reading one strategy skips the row groups of every other
+        strategy.  The schemas follow the records in objects.py, with dates as date32 and Decimals as decimal128,
+        see SCALE.
+
+        Parameters
+        ----------
+        path
+            The results folder, created on the first write
+        buffer_rows
+            The number of buffered rows, over all the tables, that triggers a flush
+
+        Returns
+        -------
+        ParquetSink
+        """
+        _require_pyarrow()
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.schemas = _schemas()
+        self.buffers = dict()
+        self.parts = dict()
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, name: str, rows: list) -> None:
+        """
+        Buffers records for a table of the results folder
+
+        Parameters
+        ----------
+        name
+            One of ['strategies', 'orders', 'trades', 'balances']
+        rows
+            The records, e.g. [Balance]
+
+        Returns
+        -------
+        None
+        """
+        if name not in self.buffers:
+            os.makedirs(self.path + '/' + name, exist_ok=True)
+            self.buffers[name] = []
+            self.parts[name] = 0
+        self.buffers[name].extend(rows)
+        self.buffered += len(rows)
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records to a new parquet file per table
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for name, rows in self.buffers.items():
+            if rows:
+                self._write_part(name, rows)
+                rows.clear()
+        self.buffered = 0
+
+    def close(self) -> None:
+        """
+        Writes the buffered records, the parquet files are complete after every flush so there is nothing else to close
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.flush()
+
+    def _write_part(self, name: str, rows: list) -> None:
+        schema = self.schemas[name]
+        table = pa.table([_to_column(values, field.type) for values, field in zip(zip(*rows), schema)],
+                         schema=schema)
+        fullpath = self.path + '/' + name + '/part-' + str(self.parts[name]).zfill(5) + '.parquet'
+        self.parts[name] += 1
+        with pq.ParquetWriter(fullpath, schema) as writer:
+            if name in ('orders', 'balances'):
+                # one row group per strategy, the rows of a strategy are written together
+                offset = 0
+                for _, group in groupby(row.strategy_id for row in rows):
+                    length = len(list(group))
+                    writer.write_table(table.slice(offset, length))
+                    offset += length
+            else:
+                writer.write_table(table)
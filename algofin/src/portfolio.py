@@ -0,0 +1,306 @@
+from bisect import bisect_left
+from decimal import Decimal
+from ledger import Ledger, FULL
+from objects import Balance, Order, Price, Strategy, Summary, Trade
+from order_book import OrderBook, BUY, SELL
+from strategies import LIMIT, MARKET
+
+
+class MergedPrices:
+    def __init__(self, pricing_data, symbols: [str]):
+        """
+        Date aligned view of the pricing data of several symbols, built once: the sorted union of their dates, the
+        merged days, and for each symbol the trading day index of every merged day and the merged day of every
+        trading day, so a back test looks prices up by list index instead of by date.
+
+        Parameters
+        ----------
+        pricing_data
+            The mapping of stock symbol to its list of daily prices, e.g. PricingData
+        symbols
+            The stock symbols, in the order of their symbol indices
+
+        Returns
+        -------
+        MergedPrices
+        """
+        self.symbols = list(symbols)
+        self.prices = [pricing_data[symbol] for symbol in self.symbols]
+        self.dates = sorted({price.date for prices in self.prices for price in prices})
+        merged_day = {iso_date: day for day, iso_date in enumerate(self.dates)}
+        self.merged_days = [[merged_day[price.date] for price in prices] for prices in self.prices]
+        self.trading_days = []
+        for merged_days in self.merged_days:
+            # -1 on the merged days the symbol has no price
+            trading_days = [-1] * len(self.dates)
+            for trading_day, day in enumerate(merged_days):
+                trading_days[day] = trading_day
+            self.trading_days.append(trading_days)
+
+    def trading_day(self, symbol_index: int, iso_date: str) -> int:
+        """
+        Gets the trading day index of a symbol on or after a date, see BackTest._get_trading_day
+
+        Parameters
+        ----------
+        symbol_index
+            The index of the symbol in symbols
+        iso_date
+            Date in string format: '2023-04-10'
+
+        Returns
+        -------
+        int
+            The trading day index, the number of trading days when the date is after the last one
+        """
+        prices = self.prices[symbol_index]
+        return bisect_left(prices, iso_date, key=lambda price: price.date)
+
+
+class PortfolioBackTest:
+    def __init__(self, pricing_data, strategies: [Strategy], starting_balance: Decimal, portfolio_id: int = 0,
+                 history: str = FULL):
+        """
+        Back tests several strategies, of any symbols, out of one account: a single cash balance and order balance
+        that every strategy allocates its orders from.  The symbols are advanced in lockstep over the merged days of
+        a MergedPrices view, and each strategy follows the rules of BackTest.implement_ on the days its symbol has a
+        price, between its own start and end date.  Each merged day runs the steps over the whole portfolio:
+        1. the sell orders that were executed, the cash of the sales goes back to the pool
+        2. the buy orders that were executed, each places a limit sell order
+        3. the limit sell orders that expired are converted to market sells
+        4. the buy orders that expired, their order amounts go back to the pool
+        5. a new limit buy order for each strategy with a price that day, in strategy order, while there is cash
+
+        The steps only look at the active orders, indexed in one OrderBook, and the symbols that are held, so the cost
+        of a day grows with the active orders rather than the number of symbols.  Unlike BackTest.implement_ every
+        fill of a step is applied to the balances, and a market sell removes the shares it sold.
+
+        Parameters
+        ----------
+        pricing_data
+            The mapping of stock symbol to its list of daily prices, e.g. PricingData
+        strategies
+            The strategies of the portfolio, with unique strategy ids
+        starting_balance
+            The starting cash balance of the account
+        portfolio_id
+            The strategy id of the balance records and summary of the account
+        history
+            one of ['full', 'end_of_day', 'summary'], the balance records that are kept, see Ledger
+
+        Returns
+        -------
+        PortfolioBackTest
+        """
+        self.strategies = strategies
+        self.starting_balance = starting_balance
+        self.merged = MergedPrices(pricing_data, sorted({strategy.symbol for strategy in strategies}))
+        symbol_index = {symbol: k for k, symbol in enumerate(self.merged.symbols)}
+        self.sleeves = {strategy.strategy_id: i for i, strategy in enumerate(strategies)}
+        self.symbol_indices = [symbol_index[strategy.symbol] for strategy in strategies]
+        self.default_order_amounts = [starting_balance * strategy.order_amount_ratio for strategy in strategies]
+        # the strategies with a price on each merged day, in strategy order, and the strategies ending on each
+        self.days = [[] for _ in self.merged.dates]
+        self.ending = [[] for _ in self.merged.dates]
+        self.last_day = -1
+        for i, strategy in enumerate(strategies):
+            k = self.symbol_indices[i]
+            prices = self.merged.prices[k]
+            first_day = self.merged.trading_day(k, strategy.start_date)
+            # orders placed on the last trading day open on the next one
+            last_day = min(self.merged.trading_day(k, strategy.end_date), len(prices) - 2)
+            for trading_day in range(first_day, last_day + 1):
+                self.days[self.merged.merged_days[k][trading_day]].append((i, trading_day))
+            if first_day <= last_day:
+                self.ending[self.merged.merged_days[k][last_day]].append(i)
+                self.last_day = max(self.last_day, self.merged.merged_days[k][last_day])
+        # the account
+        self.order_balance = Decimal(0)
+        self.cash_balance = starting_balance
+        self.invested_balance = Decimal(0)
+        self.number_of_shares = 0
+        self.shares = [0] * len(self.merged.symbols)
+        self.values = [Decimal(0)] * len(self.merged.symbols)
+        self.closes = [None] * len(self.merged.symbols)
+        self.held = set()
+        self.book = OrderBook()
+        self.trades = []
+        start_date = min((strategy.start_date for strategy in strategies), default=None)
+        self.ledger = Ledger(portfolio_id, Balance(strategy_id=portfolio_id, date=start_date, order_balance=Decimal(0),
+                                                   cash_balance=starting_balance, invested_balance=Decimal(0),
+                                                   number_of_shares=0), history)
+
+    def implement_(self) -> ([Order], [Trade], [Balance], Summary):
+        """
+        Implements the strategies of the portfolio, each from its start date to its end date
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        ([Order], [Trade], [Balance], Summary)
+            The orders of every strategy, in the order they were placed, with iso format dates
+            The trades, in the order they were made
+            The balance records of the account
+            The summary of the balance records of the account
+        """
+        for day in range(self.last_day + 1):
+            if self.days[day] or self.book.buys or self.book.sells:
+                self._trade_day(day)
+                for i in self.ending[day]:
+                    self._end_strategy(i)
+            self.ledger.end_of_day()
+        if self.last_day >= 0:
+            self._record(self.merged.dates[self.last_day])
+        dates = self.merged.dates
+        orders = [Order(**{**order._asdict(), 'open_date': dates[order.open_date],
+                           'close_date': dates[order.close_date]}) for order in self.book.history]
+        return orders, self.trades, self.ledger.balances(), self.ledger.summary
+
+    def _trade_day(self, day: int) -> None:
+        self._mark_to_market(day)
+        closed = day in self.book.expiries
+        if self.book.sells:
+            closed |= self._process_executed_sell_orders(day)
+        if self.book.buys:
+            closed |= self._process_executed_buy_orders(day)
+        if day in self.book.expiries:
+            self._process_expired_orders(day)
+        self._add_new_buy_orders(day)
+        if closed:
+            self.book.end_of_day(day)
+
+    def _price(self, order: Order, day: int) -> Price:
+        # the price of the order's symbol on the merged day, None when it has no price that day
+        k = self.symbol_indices[self.sleeves[order.strategy_id]]
+        trading_day = self.merged.trading_days[k][day]
+        return self.merged.prices[k][trading_day] if trading_day >= 0 else None
+
+    def _mark_to_market(self, day: int) -> None:
+        # only the symbols that are held are valued, at their latest close
+        for k in self.held:
+            trading_day = self.merged.trading_days[k][day]
+            if trading_day >= 0:
+                self.closes[k] = self.merged.prices[k][trading_day].close
+                self._value(k)
+
+    def _value(self, k: int) -> None:
+        value = self.shares[k] * self.closes[k]
+        self.invested_balance += value - self.values[k]
+        self.values[k] = value
+
+    def _add_shares(self, k: int, number_of_shares: int, close: Decimal) -> None:
+        self.shares[k] += number_of_shares
+        self.number_of_shares += number_of_shares
+        self.closes[k] = close
+        self._value(k)
+        if self.shares[k]:
+            self.held.add(k)
+        else:
+            self.held.discard(k)
+
+    def _record(self, date: str) -> None:
+        self.ledger.record(date, self.order_balance, self.cash_balance, self.invested_balance, self.number_of_shares)
+
+    def _trade(self, order: Order, date: str, price: Decimal, total: Decimal) -> None:
+        self.trades.append(Trade(trade_id=len(self.trades) + 1, order_id=order.order_id,
+                                 number_of_shares=order.number_of_shares, date=date, price=price, total=total))
+        self.ledger.trade(order, total)
+
+    def _process_executed_sell_orders(self, day: int) -> bool:
+        filled = False
+        for order in self.book.sells:
+            price = self._price(order, day)
+            if price is None:
+                continue
+            if order.trade_type == MARKET:
+                sale_price = price.open
+            elif order.price <= max(price.open, price.high, price.close):
+                sale_price = order.price if order.price >= price.open else price.open
+            else:
+                continue
+            sale_total = order.number_of_shares * sale_price
+            self.cash_balance += sale_total
+            self._add_shares(self.symbol_indices[self.sleeves[order.strategy_id]], -order.number_of_shares,
+                             price.close)
+            self._record(price.date)
+            order.active = False
+            filled = True
+            self._trade(order, price.date, sale_price, sale_total)
+        return filled
+
+    def _process_executed_buy_orders(self, day: int) -> bool:
+        filled = False
+        for order in self.book.buys:
+            price = self._price(order, day)
+            if price is None or not order.active or order.price < min(price.open, price.low, price.close):
+                continue
+            buy_price = order.price if order.price <= price.open else price.open
+            buy_total = order.number_of_shares * buy_price
+            i = self.sleeves[order.strategy_id]
+            self.order_balance -= order.total
+            self.cash_balance += order.total - buy_total
+            self._add_shares(self.symbol_indices[i], order.number_of_shares, price.close)
+            self._record(price.date)
+            order.active = False
+            filled = True
+            self._trade(order, price.date, buy_price, buy_total)
+
+            sale_price = buy_price * self.strategies[i].sell_offset
+            self._add_order(i, price.day_index, SELL, order.number_of_shares, sale_price)
+        return filled
+
+    def _process_expired_orders(self, day: int) -> None:
+        for order in self.book.expiring(day, SELL):
+            # converted to a market sell at the next opening price of its symbol
+            order.trade_type = MARKET
+        for order in self.book.expiring(day, BUY):
+            self.order_balance -= order.total
+            self.cash_balance += order.total
+            self._record(self.merged.dates[day])
+            order.active = False
+
+    def _add_new_buy_orders(self, day: int) -> None:
+        # the strategies allocate from the pool in strategy order, until it runs out of cash
+        for i, trading_day in self.days[day]:
+            if self.cash_balance <= 0:
+                break
+            self._add_new_buy_order(i, trading_day, day)
+
+    def _add_new_buy_order(self, i: int, trading_day: int, day: int) -> None:
+        strategy = self.strategies[i]
+        price = self.merged.prices[self.symbol_indices[i]][trading_day]
+        default_order_amount = self.default_order_amounts[i]
+        order_amount = default_order_amount if default_order_amount < self.cash_balance else self.cash_balance
+        buy_offset_price = price.close * strategy.buy_offset
+        order_number_of_shares = int(order_amount / buy_offset_price)
+        if order_number_of_shares > 0:
+            order = self._add_order(i, trading_day, BUY, order_number_of_shares, buy_offset_price)
+            self.order_balance += order.total
+            self.cash_balance -= order.total
+            self._record(self.merged.dates[day])
+
+    def _add_order(self, i: int, trading_day: int, buy_sell: str, number_of_shares: int, price: Decimal) -> Order:
+        # the dates of the orders are merged days, the order duration is in trading days of the symbol
+        strategy = self.strategies[i]
+        k = self.symbol_indices[i]
+        merged_days = self.merged.merged_days[k]
+        order = Order(order_id=len(self.book) + 1, strategy_id=strategy.strategy_id, symbol=strategy.symbol,
+                      number_of_shares=number_of_shares, buy_sell=buy_sell, trade_type=LIMIT,
+                      open_date=merged_days[trading_day + 1],
+                      close_date=merged_days[min(trading_day + 1 + strategy.order_duration, len(merged_days) - 1)],
+                      price=price, total=number_of_shares * price, active=True)
+        self.book.add(order)
+        return order
+
+    def _end_strategy(self, i: int) -> None:
+        # the active orders of a strategy past its end date stay active but are no longer traded, the same as
+        # BackTest.implement_, and their order amounts stay in the order balance
+        strategy_id = self.strategies[i].strategy_id
+        book = self.book
+        book.buys = [order for order in book.buys if order.strategy_id != strategy_id]
+        book.sells = [order for order in book.sells if order.strategy_id != strategy_id]
+        for day, orders in book.expiries.items():
+            book.expiries[day] = [order for order in orders if order.strategy_id != strategy_id]
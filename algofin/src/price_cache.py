@@ -0,0 +1,175 @@
+import os
+import json
+import mmap
+import hashlib
+from collections import namedtuple
+from decimal import Decimal
+import numpy as np
+
+# specify constants
+MAGIC = b'ALGOFIN\x01'
+ALIGNMENT = 64
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+PriceColumns = namedtuple('PriceColumns', ['date', 'open', 'high', 'low', 'close', 'units', 'exponents'])
+"""
+Columnar daily pricing information of one symbol, indexed by trading day index
+
+Parameters
+----------
+- date: numpy bytes array of the dates in iso format: b'2023-04-10'
+- open, high, low, close: float64 numpy arrays of the prices
+- units: int64 numpy array of shape (4, days), the open, high, low and close prices as integer coefficients
+- exponents: int8 numpy array of shape (4, days), the power of ten of each coefficient, so that
+    Decimal(units[i][day]).scaleb(exponents[i][day]) is exactly the Decimal read from the csv file
+
+Returns
+-------
+PriceColumns
+    The pricing columns
+"""
+
+
+class PriceCache:
+    def __init__(self, csv_path: str):
+        """
+        A compiled, memory-mapped cache of a pricing csv file, saved next to it with a .cache extension.
+
+        The cache file is a small json header followed by one fixed-width column per field, each aligned to 64 bytes.
+        Loading maps the file read only and returns numpy views over the mapped pages, so nothing is parsed or copied
+        and processes loading the same symbol share the pages through the OS page cache.  The header records the size,
+        mtime and sha256 of the csv file it was built from; the cache is rebuilt when the csv file content changes, and
+        only its header is rewritten with the new size and mtime when the csv file was touched but not changed.
+
+        Parameters
+        ----------
+        csv_path
+            The path of the pricing csv file
+
+        Returns
+        -------
+        PriceCache
+        """
+        self.csv_path = csv_path
+        self.path = csv_path[:-4] + '.cache'
+
+    def load(self, read_csv) -> PriceColumns:
+        """
+        Loads the pricing columns from the cache, rebuilding the cache first if it is missing or stale
+
+        Parameters
+        ----------
+        read_csv
+            Function that reads the csv file into a list of rows of strings, without the header row
+
+        Returns
+        -------
+        PriceColumns
+            The pricing columns
+        """
+        columns = self._read()
+        if columns is None:
+            self._write(read_csv(self.csv_path))
+            columns = self._read()
+        return columns
+
+    def fingerprint(self) -> str:
+        """
+        Gets the sha256 of the csv file, from the header of a fresh cache so that the csv file is not read again
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            The hex sha256 of the csv file content
+        """
+        header = self._header()
+        if header is not None and self._is_fresh(header):
+            return header['sha256']
+        return self._sha256()
+
+    def _stamp(self) -> dict:
+        stat = os.stat(self.csv_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _sha256(self) -> str:
+        with open(self.csv_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _is_fresh(self, header: dict) -> bool:
+        # the size and mtime are checked first so that a fresh cache does not read the csv file
+        stamp = self._stamp()
+        if header['source'] == stamp:
+            return True
+        if header['sha256'] != self._sha256():
+            return False
+        # the csv file was touched but not changed, the new stamp saves hashing it again on the next load
+        self._restamp(stamp)
+        return True
+
+    def _restamp(self, stamp: dict) -> None:
+        mapped, header, start = self._map()
+        columns = {name: mapped[start + offset:start + offset + np.dtype(dtype).itemsize * count]
+                   for name, (dtype, count, offset, shape) in header['columns'].items()}
+        self._save(dict(header, source=stamp), columns)
+
+    @staticmethod
+    def _data_offset(header_length: int) -> int:
+        # the columns start at the first aligned offset after the magic bytes, header length and header
+        return -(-(len(MAGIC) + 4 + header_length) // ALIGNMENT) * ALIGNMENT
+
+    def _map(self) -> (mmap.mmap, dict, int):
+        # the mapped cache file, its header and the offset of its columns, None when there is no valid cache file
+        if not os.path.exists(self.path):
+            return None, None, None
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            return None, None, None
+        header_length = int.from_bytes(mapped[len(MAGIC):len(MAGIC) + 4], 'little')
+        header = json.loads(mapped[len(MAGIC) + 4:len(MAGIC) + 4 + header_length])
+        return mapped, header, self._data_offset(header_length)
+
+    def _header(self) -> dict:
+        return self._map()[1]
+
+    def _read(self) -> PriceColumns:
+        mapped, header, start = self._map()
+        if header is None or not self._is_fresh(header):
+            return None
+        return PriceColumns(**{name: np.frombuffer(mapped, dtype=dtype, count=count, offset=start + offset)
+                               .reshape(shape) for name, (dtype, count, offset, shape) in header['columns'].items()})
+
+    def _write(self, rows: [[str]]) -> None:
+        decimals = [[Decimal(row[i + 2]) for row in rows] for i in range(len(PRICE_COLUMNS))]
+        columns = {'date': np.array([row[1] for row in rows], dtype=np.bytes_)}
+        for name, values in zip(PRICE_COLUMNS, decimals):
+            columns[name] = np.array([float(value) for value in values], dtype=np.float64)
+        columns['units'] = np.array([[int(value.scaleb(-value.as_tuple().exponent)) for value in values]
+                                     for values in decimals], dtype=np.int64).reshape(len(PRICE_COLUMNS), -1)
+        columns['exponents'] = np.array([[value.as_tuple().exponent for value in values] for values in decimals],
+                                        dtype=np.int8).reshape(len(PRICE_COLUMNS), -1)
+
+        # column offsets are relative to the start of the columns
+        header = {'source': self._stamp(), 'sha256': self._sha256(), 'columns': dict()}
+        offset = 0
+        for name, column in columns.items():
+            header['columns'][name] = (column.dtype.str, column.size, offset, column.shape)
+            offset += -(-column.nbytes // ALIGNMENT) * ALIGNMENT
+        self._save(header, {name: column.tobytes() for name, column in columns.items()})
+
+    def _save(self, header: dict, columns: dict) -> None:
+        encoded = json.dumps(header).encode()
+        start = self._data_offset(len(encoded))
+
+        # written to a temporary file and renamed, so concurrent readers never see a partial cache
+        temporary_path = self.path + '.' + str(os.getpid())
+        with open(temporary_path, 'wb') as f:
+            f.write(MAGIC + len(encoded).to_bytes(4, 'little') + encoded)
+            for name, data in columns.items():
+                f.seek(start + header['columns'][name][2])
+                f.write(data)
+        os.replace(temporary_path, self.path)
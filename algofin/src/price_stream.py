@@ -0,0 +1,199 @@
+import heapq
+import sys
+from datetime import datetime, timedelta
+from objects import Order, Price
+from order_book import OrderBook
+
+# specify constants
+BARS = 'bars'
+MINUTES = 'minutes'
+HOURS = 'hours'
+DAYS = 'days'
+DURATION_UNITS = [BARS, MINUTES, HOURS, DAYS]
+"""
+The units of Strategy.order_duration: a number of bars, the same as trading days for daily bars, or wall time, e.g. 30
+minutes.  An order with a wall time duration closes on the first bar at or after its open bar time plus the duration
+"""
+LOOKAHEAD = 2
+
+
+class PriceWindow:
+    def __init__(self, bars, lookahead: int = LOOKAHEAD):
+        """
+        Sliding window over a stream of price bars, daily or intraday, so a back test only holds the bars around the
+        current one instead of the whole history.  Bars are indexed by their position in the stream, the same as
+        trading day indices, and the window reads up to lookahead bars past the current one.
+
+        Parameters
+        ----------
+        bars
+            An iterable of Price bars in date order, e.g. Dao.stream_prices; the day_index of each bar is its position
+        lookahead
+            The number of bars read ahead of the current bar, at least 1 for the open date of the orders placed on it
+
+        Returns
+        -------
+        PriceWindow
+        """
+        self.bars = iter(bars)
+        self.lookahead = lookahead
+        self.window = dict()
+        self.count = 0
+        self.exhausted = False
+
+    def __getitem__(self, index: int) -> Price:
+        self._fill(index)
+        if index not in self.window:
+            raise IndexError(index)
+        return self.window[index]
+
+    def __len__(self) -> int:
+        # the number of bars is only known once the stream is read to its end
+        return self.count if self.exhausted else sys.maxsize
+
+    def __iter__(self):
+        index = 0
+        while True:
+            self._fill(index + self.lookahead)
+            if index not in self.window:
+                return
+            yield self.window[index]
+            self.window.pop(index - 1, None)
+            index += 1
+
+    def is_last(self, index: int) -> bool:
+        """
+        Whether a bar is the last one of the stream, it has to be within the lookahead of the current bar
+
+        Parameters
+        ----------
+        index
+            The bar index
+
+        Returns
+        -------
+        bool
+            True when there is no bar after it
+        """
+        self._fill(index + 1)
+        return index + 1 not in self.window
+
+    def _fill(self, index: int) -> None:
+        while not self.exhausted and self.count <= index:
+            price = next(self.bars, None)
+            if price is None:
+                self.exhausted = True
+                return
+            self.window[self.count] = price if price.day_index == self.count else price._replace(day_index=self.count)
+            self.count += 1
+
+
+class OrderDates:
+    def __init__(self, window: PriceWindow, order_duration: int, duration_unit: str = BARS):
+        """
+        The dates of the orders of a back test over a PriceWindow.  Orders keep bar indices for their open and close
+        dates, and the dates of the bars are looked up while they are in the window, so the orders can be saved with
+        iso format dates once the bars are gone.  With a wall time duration unit the close bar of an order is only
+        known once a bar at or after its close time is read, until then the order is held in a heap by close time.
+
+        Parameters
+        ----------
+        window
+            The PriceWindow of the back test
+        order_duration
+            The Strategy.order_duration
+        duration_unit
+            one of ['bars', 'minutes', 'hours', 'days'], see DURATION_UNITS
+
+        Returns
+        -------
+        OrderDates
+        """
+        if duration_unit not in DURATION_UNITS:
+            raise ValueError('unknown duration unit: ' + duration_unit)
+        self.window = window
+        self.duration = None if duration_unit == BARS else timedelta(**{duration_unit: order_duration})
+        self.dates = dict()
+        self.pending = dict()
+        self.closing = []
+        self.placed = 0
+
+    def close_due(self, book: OrderBook, price: Price) -> None:
+        """
+        Closes the wall time orders whose close time is reached on a bar, before the expiry steps of the bar
+
+        Parameters
+        ----------
+        book
+            The OrderBook of the back test
+        price
+            The current bar
+
+        Returns
+        -------
+        None
+        """
+        if self.closing:
+            time = datetime.fromisoformat(price.date)
+            while self.closing and self.closing[0][0] <= time:
+                _, _, order = heapq.heappop(self.closing)
+                order.close_date = price.day_index
+                book.expiries[price.day_index].append(order)
+                self.dates[price.day_index] = price.date
+        self._resolve(price)
+
+    def add_orders(self, book: OrderBook) -> None:
+        """
+        Looks up the dates of the orders placed on the current bar, and holds the wall time orders until they close
+
+        Parameters
+        ----------
+        book
+            The OrderBook of the back test
+
+        Returns
+        -------
+        None
+        """
+        for order in book.history[self.placed:]:
+            open_price = self.window[order.open_date]
+            self.dates[order.open_date] = open_price.date
+            if self.duration is not None:
+                # the close date the steps set in bars is replaced by the bar at the close time
+                book.expiries[order.close_date].remove(order)
+                heapq.heappush(self.closing, (datetime.fromisoformat(open_price.date) + self.duration,
+                                              order.order_id, order))
+            elif order.close_date not in self.dates:
+                self.pending[order.close_date] = None
+        self.placed = len(book.history)
+
+    def with_iso_dates(self, orders: [Order], last_index: int) -> [Order]:
+        """
+        Gets the orders with iso format dates, reading the stream on until the close bars of the orders are reached.
+        An order that closes after the last bar gets the date of the last bar, the same as BackTest._add_new_buy_order
+
+        Parameters
+        ----------
+        orders
+            The orders, with bar indices for the dates
+        last_index
+            The index of the last bar that was traded
+
+        Returns
+        -------
+        [Order]
+            The orders with iso format dates
+        """
+        index = last_index + 1
+        while (self.pending or self.closing) and not self.window.is_last(index - 1):
+            self.close_due(OrderBook(), self.window[index])
+            self.window.window.pop(index - 1, None)
+            index += 1
+        last_date = self.window[index - 1].date
+        return [Order(**{**order._asdict(), 'open_date': self.dates[order.open_date],
+                         'close_date': self.dates.get(order.close_date, last_date)}) for order in orders]
+
+    def _resolve(self, price: Price) -> None:
+        if price.day_index in self.pending:
+            del self.pending[price.day_index]
+            self.dates[price.day_index] = price.date
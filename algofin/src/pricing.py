@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from dao import Dao
+from logs import running
+from objects import Price
+from price_cache import PriceColumns
+
+
+class PricingData(Mapping):
+    def __init__(self, dao: Dao, max_symbols: int = None, preload: [str] = ()):
+        """
+        Lazy mapping of stock symbol to its list of daily prices.  A symbol is loaded the first time it is looked up,
+        and at most max_symbols symbols are kept loaded, evicting the least recently used one.
+
+        Parameters
+        ----------
+        dao
+            The Dao the pricing data is loaded with
+        max_symbols
+            The max number of symbols kept loaded, None for no limit
+        preload
+            Symbols to load up front, e.g. the symbols of a batch of strategies
+
+        Returns
+        -------
+        PricingData
+        """
+        self.dao = dao
+        with running(dao.log):
+            self.symbols = dao.get_all_symbols()
+        self.max_symbols = max_symbols
+        self.loaded = OrderedDict()
+        self.price_columns = dict()
+        self.fingerprints = dict()
+        self.preload(preload)
+
+    def __getitem__(self, symbol: str) -> [Price]:
+        if symbol in self.loaded:
+            self.loaded.move_to_end(symbol)
+            return self.loaded[symbol]
+        if symbol not in self.symbols:
+            raise KeyError(symbol)
+        prices = self.dao._get_prices(symbol)
+        self.loaded[symbol] = prices
+        while self.max_symbols is not None and len(self.loaded) > self.max_symbols:
+            self.loaded.popitem(last=False)
+        return prices
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.symbols
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def preload(self, symbols: [str]) -> None:
+        """
+        Loads symbols ahead of their first look up, up to max_symbols of them
+
+        Parameters
+        ----------
+        symbols
+            The stock symbols, e.g. {strategy.symbol for strategy in strategies}
+
+        Returns
+        -------
+        None
+        """
+        for symbol in list(symbols)[:self.max_symbols]:
+            self[symbol]
+
+    def columns(self, symbol: str) -> PriceColumns:
+        """
+        Gets the memory-mapped pricing columns of a symbol.  The columns are views of the OS page cache, so they are
+        kept for every symbol without counting towards max_symbols
+
+        Parameters
+        ----------
+        symbol
+            The stock symbol
+
+        Returns
+        -------
+        PriceColumns
+            The pricing columns
+        """
+        if symbol not in self.price_columns:
+            if symbol not in self.symbols:
+                raise KeyError(symbol)
+            self.price_columns[symbol] = self.dao.get_price_columns(symbol)
+        return self.price_columns[symbol]
+
+    def fingerprint(self, symbol: str) -> str:
+        """
+        Gets the fingerprint of the pricing data of a symbol, read once per symbol
+
+        Parameters
+        ----------
+        symbol
+            The stock symbol
+
+        Returns
+        -------
+        str
+            The hex sha256 of the pricing csv file
+        """
+        if symbol not in self.fingerprints:
+            if symbol not in self.symbols:
+                raise KeyError(symbol)
+            self.fingerprints[symbol] = self.dao.get_pricing_fingerprint(symbol)
+        return self.fingerprints[symbol]
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import zlib
+from datetime import date
+from decimal import Decimal
+from objects import Balance, CachedResult, Order, Rule, Strategy, Summary
+
+# specify constants
+CACHE_PATH = 'algofin/cache/results.db'
+MAX_BYTES = 256 * 1024 ** 2
+VERSION = 3
+"""
+Version of the cached results, part of every key.  Bump it when a change to an engine changes its results, so the
+results cached before the change are never hit again and are evicted as the least recently used.
+"""
+CHUNK = 500
+
+
+def _relabel_balance(balance: Balance, strategy_id: int) -> Balance:
+    return balance._replace(strategy_id=strategy_id) if balance is not None else None
+
+
+def relabel(result: CachedResult, strategy_id: int, order_id_offset: int, trade_id_offset: int) -> CachedResult:
+    """
+    Gives a cached result the ids of a strategy, the results are cached with strategy id 0 and ids starting from 1
+
+    Parameters
+    ----------
+    result
+        The cached result
+    strategy_id
+        The strategy id of the result
+    order_id_offset
+        The amount the order ids are shifted by, e.g. BackTest.order_id_offset
+    trade_id_offset
+        The amount the trade ids are shifted by, e.g. BackTest.trade_id_offset
+
+    Returns
+    -------
+    CachedResult
+        The result with the ids
+    """
+    orders = [Order(**{**order._asdict(), 'order_id': order.order_id + order_id_offset, 'strategy_id': strategy_id})
+              for order in result.orders]
+    trades = [trade._replace(trade_id=trade.trade_id + trade_id_offset, order_id=trade.order_id + order_id_offset)
+              for trade in result.trades]
+    balances = [_relabel_balance(balance, strategy_id) for balance in result.balances]
+    summary = result.summary
+    if summary is not None:
+        summary = Summary(strategy_id, summary.ending_total, _relabel_balance(summary.ending_balance, strategy_id),
+                          summary.max_total, _relabel_balance(summary.max_balance, strategy_id), summary.max_drawdown,
+                          summary.metrics)
+    return result._replace(orders=orders, trades=trades, balances=balances, summary=summary)
+
+
+class ResultCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES, ledgers: bool = True):
+        """
+        Persistent cache of back test results in a SQLite database, in front of BackTest.implement_ and implement_all_.
+
+        The results of a strategy are fully determined by its parameters, dates and symbol, the starting balance, the
+        pricing data and the engine, so they are cached under a sha256 of those values, see key.  The results are
+        pickled and compressed, and the least recently used results are evicted once the database holds more than
+        max_bytes of them.  Processes can share a cache, SQLite serializes their writes.
+
+        Parameters
+        ----------
+        path
+            The database file, created with its folder
+        max_bytes
+            The max compressed size of the cached results
+        ledgers
+            Whether the orders, trades and balance records of the Decimal engine are cached, so a hit saves the same
+            results files as a back test; otherwise only the summaries are cached and a hit saves the max and ending
+            balance records, like the summary history
+
+        Returns
+        -------
+        ResultCache
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ledgers = ledgers
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                    '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, used INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def key(self, strategy: Strategy, starting_balance: Decimal, fingerprint: str, engine: str,
+            history: str = None, strategy_type: str = None, rule: Rule = None) -> str:
+        """
+        Gets the key of the results of a strategy, the sha256 of the canonical json of every value that determines
+        them.  Decimals keep their exact string, as Decimal('0.1') and Decimal('0.10') save different strings, and
+        the strategy id, name and description are left out
+
+        Parameters
+        ----------
+        strategy
+            The strategy
+        starting_balance
+            The starting balance of the back test
+        fingerprint
+            The fingerprint of the pricing data of the strategy's symbol, see PricingData.fingerprint
+        engine
+            The engine, one of ['decimal', 'multi', 'vector', 'fixed']
+        history
+            The balance records the Decimal engine saves, None for the vector engines
+        strategy_type
+            The class name of the strategy type of the strategy's trade type, see BackTest.strategy_types
+        rule
+            The rule of the strategy type for the strategy, see StrategyType.rule
+
+        Returns
+        -------
+        str
+            The hex key
+        """
+        values = {'version': VERSION, 'engine': engine, 'history': history, 'ledgers': self.ledgers,
+                  'starting_balance': str(starting_balance), 'pricing': fingerprint, 'symbol': strategy.symbol,
+                  'buy_offset': str(strategy.buy_offset), 'sell_offset': str(strategy.sell_offset),
+                  'trade_type': strategy.trade_type, 'order_duration': strategy.order_duration,
+                  'strategy_type': strategy_type, 'rule': None if rule is None else [str(value) for value in rule],
+                  'order_amount_ratio': str(strategy.order_amount_ratio),
+                  'start_date': date.fromisoformat(strategy.start_date).isoformat(),
+                  'end_date': date.fromisoformat(strategy.end_date).isoformat()}
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+    def get(self, keys: [str]) -> dict:
+        """
+        Gets the cached results of keys and marks them as the most recently used
+
+        Parameters
+        ----------
+        keys
+            The keys, see key
+
+        Returns
+        -------
+        dict
+            The CachedResult of each key that is cached, with strategy id 0 and ids starting from 1, see relabel
+        """
+        keys = list(dict.fromkeys(keys))
+        results = dict()
+        with self.connection:
+            used = self._tick()
+            for i in range(0, len(keys), CHUNK):
+                chunk = keys[i:i + CHUNK]
+                marks = ', '.join('?' * len(chunk))
+                rows = self.connection.execute(f'SELECT key, value FROM results WHERE key IN ({marks})', chunk)
+                results.update((key, pickle.loads(zlib.decompress(value))) for key, value in rows)
+                self.connection.execute(f'UPDATE results SET used = ? WHERE key IN ({marks})', (used, *chunk))
+        self.hits += len(results)
+        self.misses += len(keys) - len(results)
+        return results
+
+    def put(self, results: dict) -> None:
+        """
+        Caches results, then evicts the least recently used results over max_bytes
+
+        Parameters
+        ----------
+        results
+            The CachedResult of each key, with strategy id 0 and ids starting from 1, see relabel
+
+        Returns
+        -------
+        None
+        """
+        if not results:
+            return
+        with self.connection:
+            used = self._tick()
+            rows = []
+            for key, result in results.items():
+                value = zlib.compress(pickle.dumps(self._kept(result), pickle.HIGHEST_PROTOCOL), 1)
+                rows.append((key, value, len(value), used))
+            self.connection.executemany('INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, ?)',
+                                        rows)
+            self.connection.execute("""
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY used DESC, rowid DESC) AS kept FROM results)
+                    WHERE kept > ?)""", (self.max_bytes,))
+
+    def size(self) -> (int, int):
+        """
+        Gets the number of cached results and their compressed size
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (int, int)
+            The number of cached results
+            Their size in bytes
+        """
+        count, size = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return count, size
+
+    def close(self) -> None:
+        """
+        Closes the database, closing again does nothing
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _tick(self) -> int:
+        # the recency of a get or put, later ones are larger
+        return self.connection.execute('SELECT COALESCE(MAX(used), 0) + 1 FROM results').fetchone()[0]
+
+    def _kept(self, result: CachedResult) -> CachedResult:
+        if self.ledgers or result.summary is None:
+            return result
+        summary = result.summary
+        balances = [balance for balance in (summary.max_balance, summary.ending_balance) if balance]
+        return result._replace(orders=[], trades=[], balances=balances)
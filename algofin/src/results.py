@@ -0,0 +1,154 @@
+from decimal import Decimal
+from objects import Balance, Strategy, Summary
+
+
+class Results:
+    def __init__(self):
+        """
+        In memory store of the strategies back tested by a BackTest and the running summaries of their balance
+        records, so that the best strategies can be found without reading the results files back.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Results
+        """
+        self.strategies = dict()
+        self.summaries = dict()
+
+    def add_strategies(self, strategies: [Strategy]) -> None:
+        """
+        Adds back tested strategies to the store
+
+        Parameters
+        ----------
+        strategies
+            The strategies
+
+        Returns
+        -------
+        None
+        """
+        for strategy in strategies:
+            self.strategies[strategy.strategy_id] = strategy
+
+    def add_summaries(self, summaries: [Summary]) -> None:
+        """
+        Adds the summaries of strategies whose balance records were summarized while they were back tested
+
+        Parameters
+        ----------
+        summaries
+            The summaries, e.g. Ledger.summary
+
+        Returns
+        -------
+        None
+        """
+        for summary in summaries:
+            self.summaries[summary.strategy_id] = summary
+
+    def add_balances(self, balances: [Balance], track_drawdown: bool = True) -> None:
+        """
+        Updates the summaries of the strategies with their balance records, in the order they were recorded
+
+        Parameters
+        ----------
+        balances
+            The balance records, of one or more strategies
+        track_drawdown
+            Whether the balance records are the full history of the strategies, so that the max drawdown can be
+            tracked
+
+        Returns
+        -------
+        None
+        """
+        for balance in balances:
+            summary = self.summaries.get(balance.strategy_id)
+            if summary is None:
+                summary = Summary(strategy_id=balance.strategy_id, ending_total=None, ending_balance=None,
+                                  max_total=Decimal(0), max_balance=None,
+                                  max_drawdown=Decimal(0) if track_drawdown else None, metrics=None)
+                self.summaries[balance.strategy_id] = summary
+            self._add_balance(summary, balance)
+
+    @staticmethod
+    def _add_balance(summary: Summary, balance: Balance) -> None:
+        total = balance.order_balance + balance.cash_balance + balance.invested_balance
+        summary.ending_total = total
+        summary.ending_balance = balance
+        if total > summary.max_total:
+            summary.max_total = total
+            summary.max_balance = balance
+        elif summary.max_drawdown is not None and summary.max_total > 0:
+            summary.max_drawdown = max(summary.max_drawdown, (summary.max_total - total) / summary.max_total)
+
+    def get_max_ending_balance(self) -> (int, Decimal, Balance):
+        """
+        Finds the strategy with the largest ending balance, the first one on a tie
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (int, Decimal, Balance)
+            The strategy ID that produced the largest ending balance
+            The largest ending balance amount
+            The largest ending Balance record
+        """
+        strategy_id = 0
+        ending_balance = 0
+        balance = None
+        for summary in self.summaries.values():
+            if summary.ending_total > ending_balance:
+                strategy_id = summary.strategy_id
+                ending_balance = summary.ending_total
+                balance = summary.ending_balance
+        return strategy_id, ending_balance, balance
+
+    def get_max_balance_at_anytime(self) -> (int, Decimal, Balance):
+        """
+        Finds the strategy with the largest balance at any time, the first one on a tie
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        (int, Decimal, Balance)
+            The strategy ID that produced the largest anytime balance
+            The largest anytime balance amount
+            The largest anytime Balance record
+        """
+        strategy_id = 0
+        anytime_balance = Decimal(0)
+        balance = None
+        for summary in self.summaries.values():
+            if summary.max_total > anytime_balance:
+                strategy_id = summary.strategy_id
+                anytime_balance = summary.max_total
+                balance = summary.max_balance
+        return strategy_id, anytime_balance, balance
+
+    def get_strategy(self, id: int) -> Strategy:
+        """
+        Gets a specific back tested strategy
+
+        Parameters
+        ----------
+        id
+            The strategy id
+
+        Returns
+        -------
+        strategy
+            A strategy record
+        """
+        return self.strategies.get(id)
@@ -0,0 +1,141 @@
+import os
+import csv
+from logs import get_logger
+
+logger = get_logger('results_sink')
+
+
+class ResultsSink:
+    def __init__(self, path: str, buffer_rows: int = 10000):
+        """
+        Buffered writer of result rows to the csv files of a results folder.  Each csv file is opened once, on its first
+        write, and stays open until the sink is closed.  Rows are buffered in memory and written in batches once
+        buffer_rows rows are waiting, when flush is called and when the sink is closed.
+
+        Use it as a context manager, or call close, so that the buffered rows of a run that raises are still written.
+
+        Parameters
+        ----------
+        path
+            The results folder, created on the first write
+        buffer_rows
+            The number of buffered rows, over all the csv files, that triggers a flush; 0 writes every batch through
+
+        Returns
+        -------
+        ResultsSink
+        """
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.files = dict()
+        self.writers = dict()
+        self.buffers = dict()
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, name: str, rows: list) -> None:
+        """
+        Buffers rows for a csv file of the results folder
+
+        Parameters
+        ----------
+        name
+            The csv file name without the extension, e.g. 'balances'
+        rows
+            The rows, each a sequence of values written with csv.writer
+
+        Returns
+        -------
+        None
+        """
+        if name not in self.files:
+            self._open(name)
+        self.buffers[name].extend(rows)
+        self.buffered += len(rows)
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows to the csv files, so readers of the csv files see every row written so far
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for name, rows in self.buffers.items():
+            if rows:
+                self.writers[name].writerows(rows)
+                rows.clear()
+            self.files[name].flush()
+        self.buffered = 0
+
+    def close(self) -> None:
+        """
+        Flushes the buffered rows and closes the csv files, closing again does nothing
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files, self.writers, self.buffers = dict(), dict(), dict()
+
+    def _open(self, name: str) -> None:
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        fullpath = self.path + '/' + name + '.csv'
+        logger.debug('writing rows to csv: %s', fullpath)
+        self.files[name] = open(fullpath, 'a', newline='')
+        self.writers[name] = csv.writer(self.files[name])
+        self.buffers[name] = []
+
+
+class MemorySink:
+    def __init__(self, path: str, buffer_rows: int = 10000):
+        """
+        A drop in for ResultsSink that discards the rows, for back tests whose results are only kept in memory by
+        Results, e.g. the back tests of each window of a walk forward
+
+        Parameters
+        ----------
+        path
+            Not used, nothing is written
+        buffer_rows
+            Not used, nothing is buffered
+
+        Returns
+        -------
+        MemorySink
+        """
+        self.path = path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, name: str, rows: list) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
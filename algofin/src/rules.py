@@ -0,0 +1,176 @@
+from decimal import Decimal
+from indicators import IndicatorCache
+from objects import Order, OrderRequest, Price, Rule, Strategy, Trade
+from order_book import BUY, SELL
+from strategies import LIMIT, HOLD
+
+
+class StrategyType:
+    """
+    The behaviour of a kind of strategy, the orders it enters on every trading day and when its orders fill.  The
+    Decimal engine calls the hooks of the strategy type of each strategy, see BackTest, and fills the orders with its
+    OHLC rules, so a new kind of strategy is a subclass given to the BackTest under a Strategy.trade_type instead of a
+    change to the engine.
+
+    A strategy type whose behaviour fits a Rule also returns it from rule, and then the vector engines back test its
+    strategies in batches, without calling the hooks, and so does the multi engine.
+    """
+
+    def rule(self, strategy: Strategy) -> Rule:
+        """
+        Gets the declarative form of a strategy, if it has one
+
+        Parameters
+        ----------
+        strategy
+            The strategy
+
+        Returns
+        -------
+        Rule
+            The rule of the strategy, None when only the hooks describe it
+        """
+        return None
+
+    def on_bar(self, strategy: Strategy, prices: [Price], trading_day: int, account, starting_balance: Decimal,
+               indicators: IndicatorCache) -> [OrderRequest]:
+        """
+        Called on every trading day the strategy is live, after the fills and the expired orders of the day
+
+        Parameters
+        ----------
+        strategy
+            The strategy
+        prices
+            The daily prices of the symbol, only the trading days up to trading_day should be read
+        trading_day
+            The trading day index of the current day
+        account
+            The current balances of the strategy, see Ledger.account
+        starting_balance
+            The starting balance of the back test
+        indicators
+            The indicators of the back test, read by trading day index, e.g.
+            indicators.get(strategy.symbol, Atr(20))[trading_day]
+
+        Returns
+        -------
+        [OrderRequest]
+            The orders to enter, in order
+        """
+        return []
+
+    def on_fill(self, strategy: Strategy, order: Order, trade: Trade) -> [OrderRequest]:
+        """
+        Called when a buy order of the strategy fills, the orders it returns are entered once every buy of the day
+        has filled
+
+        Parameters
+        ----------
+        strategy
+            The strategy
+        order
+            The order that filled
+        trade
+            The trade of the fill
+
+        Returns
+        -------
+        [OrderRequest]
+            The orders to enter, in order
+        """
+        return []
+
+
+class RuleType(StrategyType):
+    """
+    A strategy type described by a Rule, its hooks carry out the rule in the Decimal engine the same way the vector
+    engines do: a limit buy at the closing price * buy_offset every trading day, and a limit sell at the buy price *
+    sell_offset when it fills.  Subclasses only implement rule.
+    """
+
+    def on_bar(self, strategy: Strategy, prices: [Price], trading_day: int, account, starting_balance: Decimal,
+               indicators: IndicatorCache) -> [OrderRequest]:
+        if account.cash_balance <= Decimal(0):
+            return []
+        rule = self.rule(strategy)
+        default_order_amount = starting_balance * rule.order_amount_ratio
+        order_amount = default_order_amount if default_order_amount < account.cash_balance else account.cash_balance
+        buy_offset_price = prices[trading_day].close * rule.buy_offset
+        order_num_of_shares = int(order_amount / buy_offset_price)
+        return [OrderRequest(BUY, order_num_of_shares, buy_offset_price)] if order_num_of_shares > 0 else []
+
+    def on_fill(self, strategy: Strategy, order: Order, trade: Trade) -> [OrderRequest]:
+        sell_offset = self.rule(strategy).sell_offset
+        if sell_offset is None:
+            return []
+        return [OrderRequest(SELL, trade.number_of_shares, trade.price * sell_offset)]
+
+
+class OffsetRule(RuleType):
+    """
+    'limit buy offset down; limit sell offset up', the rule is the offsets, order duration and order amount ratio of
+    the strategy
+    """
+
+    def rule(self, strategy: Strategy) -> Rule:
+        return Rule(strategy.buy_offset, strategy.sell_offset, strategy.order_duration, strategy.order_amount_ratio)
+
+
+class BuyAndHold(RuleType):
+    """
+    'buy and hold', buys like OffsetRule and never sells, the sell offset of the strategy is not used
+    """
+
+    def rule(self, strategy: Strategy) -> Rule:
+        return Rule(strategy.buy_offset, None, strategy.order_duration, strategy.order_amount_ratio)
+
+
+# the strategy type of each built in Strategy.trade_type, see BackTest for adding more
+STRATEGY_TYPES = {LIMIT: OffsetRule(), HOLD: BuyAndHold()}
+
+
+def get_strategy_type(strategy: Strategy, strategy_types: dict = None) -> StrategyType:
+    """
+    Gets the strategy type of a strategy
+
+    Parameters
+    ----------
+    strategy
+        The strategy
+    strategy_types
+        The strategy type of each trade type, defaults to STRATEGY_TYPES
+
+    Returns
+    -------
+    StrategyType
+        The strategy type of its trade type
+    """
+    strategy_type = (STRATEGY_TYPES if strategy_types is None else strategy_types).get(strategy.trade_type)
+    if strategy_type is None:
+        raise ValueError('unknown trade type: ' + str(strategy.trade_type))
+    return strategy_type
+
+
+def compile_rules(strategies: [Strategy], strategy_types: dict = None) -> [Rule]:
+    """
+    Gets the rules of strategies for the multi and vector engines
+
+    Parameters
+    ----------
+    strategies
+        The strategies
+    strategy_types
+        The strategy type of each trade type, defaults to STRATEGY_TYPES
+
+    Returns
+    -------
+    [Rule]
+        The rule of each strategy, in the order of the strategies
+    """
+    rules = [get_strategy_type(strategy, strategy_types).rule(strategy) for strategy in strategies]
+    for strategy, rule in zip(strategies, rules):
+        if rule is None:
+            raise ValueError('the ' + strategy.trade_type + ' strategies only run on the decimal engine, they have no '
+                             'rule for the multi and vector engines')
+    return rules
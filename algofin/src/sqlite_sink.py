@@ -0,0 +1,232 @@
+import os
+import sqlite3
+from contextlib import closing
+from decimal import Decimal
+from objects import Balance
+
+# specify constants
+DATABASE = 'results.db'
+TOLERANCE = 1e-12
+"""
+Relative tolerance of the REAL totals that pick the candidates of the leaderboard queries, the candidates are then
+compared with their exact Decimal totals so the results match BackTest.get_max_strategy_ending_balance and
+BackTest.get_max_strategy_balance_at_anytime
+"""
+# Decimals are stored as TEXT so they read back exactly, total is their REAL sum for ranking
+TABLES = {
+    'strategies': ['strategy_id INTEGER PRIMARY KEY', 'strategy_name TEXT', 'description TEXT', 'buy_offset TEXT',
+                   'sell_offset TEXT', 'trade_type TEXT', 'order_duration INTEGER', 'order_amount_ratio TEXT',
+                   'symbol TEXT', 'start_date TEXT', 'end_date TEXT'],
+    'orders': ['order_id INTEGER', 'strategy_id INTEGER', 'symbol TEXT', 'number_of_shares INTEGER', 'buy_sell TEXT',
+               'trade_type TEXT', 'open_date TEXT', 'close_date TEXT', 'price TEXT', 'total TEXT', 'active INTEGER'],
+    'trades': ['trade_id INTEGER', 'order_id INTEGER', 'number_of_shares INTEGER', 'date TEXT', 'price TEXT',
+               'total TEXT'],
+    'balances': ['strategy_id INTEGER', 'date TEXT', 'order_balance TEXT', 'cash_balance TEXT',
+                 'invested_balance TEXT', 'number_of_shares INTEGER',
+                 'total REAL GENERATED ALWAYS AS (CAST(order_balance AS REAL) + CAST(cash_balance AS REAL) + '
+                 'CAST(invested_balance AS REAL)) VIRTUAL'],
+}
+INDEXES = {'orders': ['strategy_id', 'open_date'], 'trades': ['order_id', 'date'],
+           'balances': ['strategy_id', 'date', 'total']}
+BALANCE_COLUMNS = 'strategy_id, date, order_balance, cash_balance, invested_balance, number_of_shares'
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(path + '/' + DATABASE)
+
+
+def _columns(name: str) -> [str]:
+    return [column.split()[0] for column in TABLES[name] if 'GENERATED' not in column]
+
+
+def _to_value(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _load_balance(row) -> Balance:
+    return Balance(row[0], row[1], Decimal(row[2]), Decimal(row[3]), Decimal(row[4]), row[5])
+
+
+def _first_max(rows: [tuple]) -> (int, Decimal, Balance):
+    # the first balance record with a strictly larger exact total wins, the same as the in memory summaries
+    strategy_id, total, balance = 0, Decimal(0), None
+    for balance_row in map(_load_balance, rows):
+        balance_total = balance_row.order_balance + balance_row.cash_balance + balance_row.invested_balance
+        if balance_total > total:
+            strategy_id, total, balance = balance_row.strategy_id, balance_total, balance_row
+    return strategy_id, total, balance
+
+
+def read_sqlite(path: str, name: str, strategy_id: int = None) -> [tuple]:
+    """
+    Reads the rows of a results table saved by SqliteSink, the strategy id is looked up with the strategy_id index
+
+    Parameters
+    ----------
+    path
+        The results folder
+    name
+        One of ['strategies', 'orders', 'balances']
+    strategy_id
+        Only read the rows of this strategy, None for every row
+
+    Returns
+    -------
+    [tuple]
+        The rows in the order they were written, Decimals as strings
+    """
+    columns = ', '.join(_columns(name))
+    with closing(_connect(path)) as connection:
+        if strategy_id is None:
+            return connection.execute(f'SELECT {columns} FROM {name} ORDER BY rowid').fetchall()
+        return connection.execute(f'SELECT {columns} FROM {name} WHERE strategy_id = ? ORDER BY rowid',
+                                  (strategy_id,)).fetchall()
+
+
+def max_ending_balance(path: str) -> (int, Decimal, Balance):
+    """
+    Finds the strategy with the largest ending balance with a query over the last balance record of each strategy
+
+    Parameters
+    ----------
+    path
+        The results folder
+
+    Returns
+    -------
+    (int, Decimal, Balance)
+        The strategy ID that produced the largest ending balance
+        The largest ending balance amount
+        The largest ending Balance record
+    """
+    with closing(_connect(path)) as connection:
+        rows = connection.execute(f"""
+            WITH endings AS (SELECT rowid AS position, * FROM balances
+                             WHERE rowid IN (SELECT MAX(rowid) FROM balances GROUP BY strategy_id))
+            SELECT {BALANCE_COLUMNS} FROM endings
+            WHERE total >= (SELECT MAX(total) FROM endings) * (1 - ?)
+            ORDER BY position""", (TOLERANCE,)).fetchall()
+    return _first_max(rows)
+
+
+def max_balance_at_anytime(path: str) -> (int, Decimal, Balance):
+    """
+    Finds the strategy with the largest balance at any time with a query over the total index
+
+    Parameters
+    ----------
+    path
+        The results folder
+
+    Returns
+    -------
+    (int, Decimal, Balance)
+        The strategy ID that produced the largest anytime balance
+        The largest anytime balance amount
+        The largest anytime Balance record
+    """
+    with closing(_connect(path)) as connection:
+        rows = connection.execute(f"""
+            SELECT {BALANCE_COLUMNS} FROM balances
+            WHERE total >= (SELECT MAX(total) FROM balances) * (1 - ?)
+            ORDER BY rowid""", (TOLERANCE,)).fetchall()
+    return _first_max(rows)
+
+
+class SqliteSink:
+    def __init__(self, path: str, buffer_rows: int = 10000):
+        """
+        Buffered writer of result rows to one SQLite database per run, results.db in the results folder, a drop in for
+        ResultsSink.  The database has a table per record type indexed on strategy_id and date, and every flush
+        inserts the buffered rows with executemany in a single transaction.
+
+        Parameters
+        ----------
+        path
+            The results folder, created with the database
+        buffer_rows
+            The number of buffered rows, over all the tables, that triggers a flush
+
+        Returns
+        -------
+        SqliteSink
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.connection = _connect(path)
+        self.buffers = {name: [] for name in TABLES}
+        self.buffered = 0
+        with self.connection:
+            for name, columns in TABLES.items():
+                self.connection.execute(f'CREATE TABLE IF NOT EXISTS {name} ({", ".join(columns)})')
+            for name, columns in INDEXES.items():
+                for column in columns:
+                    self.connection.execute(f'CREATE INDEX IF NOT EXISTS {name}_{column} ON {name} ({column})')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, name: str, rows: list) -> None:
+        """
+        Buffers records for a table of the database
+
+        Parameters
+        ----------
+        name
+            One of ['strategies', 'orders', 'trades', 'balances']
+        rows
+            The records, e.g. [Balance]
+
+        Returns
+        -------
+        None
+        """
+        self.buffers[name].extend(rows)
+        self.buffered += len(rows)
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Inserts the buffered records in one transaction
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.connection is None:
+            return
+        with self.connection:
+            for name, rows in self.buffers.items():
+                if rows:
+                    columns = _columns(name)
+                    self.connection.executemany(
+                        f'INSERT INTO {name} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                        (tuple(map(_to_value, row)) for row in rows))
+                    rows.clear()
+        self.buffered = 0
+
+    def close(self) -> None:
+        """
+        Inserts the buffered records and closes the database, closing again does nothing
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -4,6 +4,7 @@ from decimal import Decimal
 # specify constants
 LIMIT = 'limit'
 MARKET = 'market'
+HOLD = 'hold'
 QQQ = 'QQQ'
 RITM = 'RITM'
 QQQ_start = '1999-05-01'
@@ -121,8 +122,8 @@ class Strategies:
                                     strategy_name=buy_and_hold_name,
                                     description=buy_and_hold_description,
                                     buy_offset=Decimal('1'),
-                                    sell_offset=Decimal('1000'),
-                                    trade_type=LIMIT,
+                                    sell_offset=Decimal('1'),
+                                    trade_type=HOLD,
                                     order_duration=100000,
                                     order_amount_ratio=Decimal('1'),
                                     symbol=QQQ,
@@ -134,8 +135,8 @@ class Strategies:
                                      strategy_name=buy_and_hold_name,
                                      description=buy_and_hold_description,
                                      buy_offset=Decimal('1'),
-                                     sell_offset=Decimal('1000'),
-                                     trade_type=LIMIT,
+                                     sell_offset=Decimal('1'),
+                                     trade_type=HOLD,
                                      order_duration=100000,
                                      order_amount_ratio=Decimal('1'),
                                      symbol=RITM,
@@ -0,0 +1,194 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from logs import ProgressReporter, running
+from objects import Balance, Checkpoint, Order, Strategy, Summary, Trade
+from result_cache import ResultCache
+from trading import BackTest, BATCH_ENGINES, MULTI
+
+# the BackTest of a worker process, created once per worker so the pricing data is loaded once per worker
+worker_back_test = None
+
+
+def _init_worker(starting_balance, engine: str, history: str, strategy_types: dict, indicator_path: str,
+                 cache: tuple, checkpoint: bool) -> None:
+    global worker_back_test
+    # each worker opens the cache database of the parent process, SQLite serializes their writes
+    worker_back_test = BackTest(starting_balance, engine, history=history,
+                                cache=None if cache is None else ResultCache(*cache), checkpoint=checkpoint,
+                                strategy_types=strategy_types, indicator_path=indicator_path)
+
+
+def _simulate_chunk(strategies: [Strategy]) -> (
+        [Order], [Trade], [Balance], [Summary], {int: Checkpoint}, (int, int), float):
+    # the seconds the worker spent on the chunk are returned last, for the worker utilization of the progress
+    start = perf_counter()
+    cache = worker_back_test.cache
+    if cache is not None:
+        cache.hits = cache.misses = 0
+    worker_back_test.checkpoints = dict()
+    results = _simulate(strategies)
+    counts = (0, 0) if cache is None else (cache.hits, cache.misses)
+    return (*results, worker_back_test.checkpoints, counts, perf_counter() - start)
+
+
+def _simulate(strategies: [Strategy]) -> ([Order], [Trade], [Balance], [Summary]):
+    # ids start from 1 in every chunk, the parent process shifts them when the chunks are merged
+    back_test = worker_back_test
+    back_test.order_id_offset = 0
+    back_test.trade_id_offset = 0
+    if back_test.engine in BATCH_ENGINES:
+        balances = back_test._simulate_vector_(strategies) if back_test.cache is None else \
+            back_test._simulate_vector_cached_(strategies)
+        return [], [], balances, None
+    # the same as BackTest.implement_all_, the multi engine back tests one strategy at a time with a cache or
+    # checkpoints
+    if back_test.engine == MULTI and back_test.cache is None and not back_test.checkpoint:
+        results = back_test._simulate_multi_(strategies)
+    elif back_test.cache is None:
+        results = [back_test._simulate_(strategy) for strategy in strategies]
+    else:
+        results = [back_test._simulate_cached_(strategy) for strategy in strategies]
+    orders, trades, balances, summaries = [], [], [], []
+    for strategy_orders, strategy_trades, strategy_balances, summary in results:
+        orders += strategy_orders
+        trades += strategy_trades
+        balances += strategy_balances
+        summaries.append(summary)
+    return orders, trades, balances, summaries
+
+
+class Sweep:
+    def __init__(self, back_test: BackTest, workers: int = None, chunk_size: int = 10):
+        """
+        Back tests lists of strategies in parallel on a pool of worker processes.  Each worker process loads the
+        pricing data once and back tests chunks of consecutive strategies.  The chunks are merged in order and the
+        order and trade ids are shifted, so the results are the same as back_test.implement_all_(strategies).
+        The progress is logged as each chunk is saved, see ProgressReporter.
+
+        The pool of worker processes lives while the sweep is open, see open, so the workers load the pricing data
+        once for every list of strategies it back tests; implement_all_ on a closed sweep opens a pool for the list.
+
+        The workers use the cache and checkpoint settings of the back test: each worker opens the database of its
+        ResultCache, whose hits and misses are added to it, and the checkpoints the workers take are added to
+        back_test.checkpoints.  Its instrumentation only covers the I/O of the parent process.
+
+        Parameters
+        ----------
+        back_test
+            The BackTest that saves the results; its starting balance, engine, history, cache, checkpoint, strategy
+            types and indicator path are used by the workers
+        workers
+            The number of worker processes, defaults to the number of CPUs
+        chunk_size
+            The number of strategies sent to a worker at a time.  The vector engine back tests a chunk as one batch,
+            so it benefits from larger chunks
+
+        Returns
+        -------
+        Sweep
+        """
+        self.back_test = back_test
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """
+        Starts the pool of worker processes, they take the settings of the back test as it is now
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        back_test = self.back_test
+        cache = back_test.cache
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(back_test.starting_balance, back_test.engine, back_test.history,
+                                                      back_test.strategy_types, back_test.indicators.path,
+                                                      None if cache is None else (cache.path, cache.max_bytes,
+                                                                                  cache.ledgers),
+                                                      back_test.checkpoint))
+
+    def close(self) -> None:
+        """
+        Stops the pool of worker processes
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def implement_all_(self, strategies: [Strategy]) -> None:
+        """
+        Back tests a list of strategies in parallel.
+        Saves the results in the ../results folder from the back test init time.
+
+        Parameters
+        ----------
+        strategies
+            The strategies that are being implemented
+
+        Returns
+        -------
+        None
+        """
+        if self.executor is None:
+            with self:
+                return self.implement_all_(strategies)
+        chunks = [strategies[i:i + self.chunk_size] for i in range(0, len(strategies), self.chunk_size)]
+        progress = ProgressReporter(len(strategies), self.workers)
+        back_test = self.back_test
+        cache = back_test.cache
+        # map yields the results in chunk order, so they are saved in the same order as a serial run
+        for chunk, results in zip(chunks, self.executor.map(_simulate_chunk, chunks)):
+            *results, checkpoints, (hits, misses), seconds = results
+            self._save_chunk(chunk, *results)
+            back_test.checkpoints.update(checkpoints)
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
+            with running(back_test.dao.log):
+                progress.update(len(chunk), seconds)
+
+    def _save_chunk(self, strategies: [Strategy], orders: [Order], trades: [Trade], balances: [Balance],
+                    summaries: [Summary]) -> None:
+        order_id_offset = self.back_test.order_id_offset
+        trade_id_offset = self.back_test.trade_id_offset
+        for order in orders:
+            order.order_id += order_id_offset
+        trades = [trade._replace(trade_id=trade.trade_id + trade_id_offset,
+                                 order_id=trade.order_id + order_id_offset) for trade in trades]
+        self.back_test.order_id_offset += len(orders)
+        self.back_test.trade_id_offset += len(trades)
+        self.back_test.results.add_strategies(strategies)
+        if summaries is None:
+            self.back_test.results.add_balances(balances, track_drawdown=False)
+        else:
+            self.back_test.results.add_summaries(summaries)
+
+        dao = self.back_test.dao
+        dao._write_to_csv('strategies', strategies)
+        # the vector engines only save balances
+        if self.back_test.engine not in BATCH_ENGINES:
+            dao._write_to_csv('orders', orders)
+            dao._write_to_csv('trades', trades)
+        dao._write_to_csv('balances', balances)
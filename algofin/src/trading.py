@@ -1,17 +1,38 @@
+from bisect import bisect_left
 from datetime import date
 from strategies import Strategy, Strategies, LIMIT, MARKET
-from dao import Dao
-from objects import Balance, Order, Price, Trade
+from dao import Dao, CSV
+from objects import Balance, CachedResult, Checkpoint, Order, OrderRequest, Price, Summary, Trade
+from ledger import Ledger, FULL
+from order_book import OrderBook, BUY, SELL
+from pricing import PricingData
+from results import Results
+from result_cache import ResultCache, relabel
+from instrumentation import Instrumentation
+from price_cache import PriceColumns
+from vector import VectorBackTest, BalanceArrays
+from fixed import FixedVectorBackTest
+from multi import MultiBackTest
+from portfolio import PortfolioBackTest
+from price_stream import PriceWindow, OrderDates, BARS
+from indicators import IndicatorCache
+from rules import StrategyType, STRATEGY_TYPES, get_strategy_type, compile_rules
 from collections import defaultdict
 from decimal import Decimal
 
 # specify constants
-BUY = 'buy'
-SELL = 'sell'
+DECIMAL = 'decimal'
+VECTOR = 'vector'
+FIXED = 'fixed'
+MULTI = 'multi'
+BATCH_ENGINES = {VECTOR: VectorBackTest, FIXED: FixedVectorBackTest}
 
 
 class BackTest:
-    def __init__(self, starting_balance: int = 10000):
+    def __init__(self, starting_balance: int = 10000, engine: str = DECIMAL, max_symbols: int = None,
+                 preload: [str] = (), buffer_rows: int = 10000, backend: str = CSV, history: str = FULL,
+                 cache: ResultCache = None, checkpoint: bool = False, instrumentation: Instrumentation = None,
+                 log_level: int = None, strategy_types: {str: StrategyType} = None, indicator_path: str = None):
         """
         Initializes the BackTest class so that strategies can be back tested against historical daily
         pricing information.
@@ -20,18 +41,106 @@ class BackTest:
         ----------
         starting_balance : int
             The starting balance for back testing
+        engine : str
+            one of ['decimal', 'multi', 'vector', 'fixed']
+            - decimal: simulates every order, trade and balance of a strategy with Decimal values, the orders are
+                entered by the hooks of the StrategyType of its trade type, see rules.py
+            - multi: the decimal engine over the strategies of each symbol in a single pass over the prices, see
+                MultiBackTest; the results are the same as the decimal engine.  The strategies are compiled to their
+                Rule, and are back tested one at a time with a cache or checkpoints
+            - vector: simulates batches of strategies with the float64 kernel in vector.py and only saves the max and
+                ending balance records of each strategy, see vector.TOLERANCE for how close the results are.  The
+                strategies are compiled to their Rule, a strategy type without one only runs on the decimal engine
+            - fixed: the vector engine over int64 micro-dollars, exact and reproducible with documented rounding,
+                see fixed.SCALE
+        max_symbols : int
+            The max number of symbols whose pricing data is kept loaded, None for no limit.  Symbols are loaded the
+            first time a strategy uses them, and the least recently used symbol is evicted
+        preload : [str]
+            Symbols to load up front, e.g. the symbols of the strategies that are going to be implemented
+        buffer_rows : int
+            The number of result rows buffered in memory before they are written to the ../results folder, the rest
+            are written by close.  Use the BackTest as a context manager so that they are written when a run raises
+        backend : str
+            one of ['csv', 'parquet', 'sqlite', 'memory'], the format of the results files
+            - csv: one csv file per record type
+            - parquet: typed parquet tables with row groups per strategy, needs the optional pyarrow dependency
+            - sqlite: one SQLite database, results.db, with indexed tables that the best strategies can be queried from
+            - memory: no results files, the summaries of the strategies are only kept in memory
+        history : str
+            one of ['full', 'end_of_day', 'summary'], the balance records the decimal engine saves, see Ledger.
+            The summaries of the strategies, and so the best strategies, are the same in every mode
+        cache : ResultCache
+            The persistent cache of back test results, strategies whose results are cached are not simulated again.
+            The results are keyed by the strategy type and its Rule too, the strategies of a strategy type without a
+            Rule are always simulated.  None to always simulate
+        checkpoint : bool
+            Whether the decimal engine keeps a Checkpoint of every strategy, saved to the ../results folder by close,
+            so that the strategies can be resumed with resume_all_ once the pricing data has more trading days.
+            Strategies whose results come from the cache have no checkpoint
+        instrumentation : Instrumentation
+            Times the daily steps of the decimal engine and the I/O of the Dao and counts the orders, fills and balance
+            records of each strategy, saved to the ../results folder by close.  None to run without instrumentation
+        log_level : int
+            The level of the messages that are logged to run.log in the ../results folder, e.g. logging.INFO; None for
+            no log file.  See logs.configure to log to the terminal
+        strategy_types : {str: StrategyType}
+            The strategy types of more trade types, e.g. {'breakout': Breakout()}, see rules.py; the built in 'limit'
+            and 'hold' strategy types are always there.  The strategy types are pickled for the sweep worker processes
+        indicator_path : str
+            The folder the indicator series the strategy types read are saved to, e.g. indicators.INDICATOR_PATH, so
+            later runs reuse them; None only keeps them in memory for the BackTest, see IndicatorCache
 
         Returns
         -------
         BackTest
         """
-        self.dao = Dao()
-        self.symbols = self.dao.get_all_symbols()
-        self.pricing_data = self.dao.load_all_pricing_data()
+        self.dao = Dao(buffer_rows, backend, log_level)
+        if instrumentation is not None:
+            instrumentation.instrument_dao(self.dao)
+        self.pricing_data = PricingData(self.dao, max_symbols, preload)
+        self.symbols = self.pricing_data.symbols
+        self.results = Results()
         self.starting_balance = Decimal(starting_balance)
         self.strategies = Strategies.get_strategies()
+        self.engine = engine
+        self.history = history
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.checkpoints = dict()
+        self.price_arrays = dict()
         self.order_id_offset = 0
         self.trade_id_offset = 0
+        self.instrumentation = instrumentation
+        self.strategy_types = {**STRATEGY_TYPES, **(strategy_types or {})}
+        self.indicators = IndicatorCache(self.pricing_data, indicator_path)
+        if instrumentation is not None:
+            instrumentation.instrument_back_test(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Writes the buffered results, the checkpoints and the profiles of an instrumented run to the ../results folder
+        and closes the results files
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.checkpoints:
+            self.dao.save_checkpoints(list(self.checkpoints.values()))
+        self.dao.close()
+        if self.instrumentation is not None:
+            self.dao.save_profile(*self.instrumentation.finish(), self.instrumentation.profiler)
 
     def implement_all_hard_coded_strategies(self):
         """
@@ -46,13 +155,70 @@ class BackTest:
         -------
         None
         """
-        for strategy in self.strategies:
-            self.implement_(strategy)
+        self.implement_all_(self.strategies)
+
+    def implement_all_(self, strategies: [Strategy]) -> None:
+        """
+        Back tests a list of strategies with the engine this class was initialized with.
+        Saves the results in the ../results folder from this class init time.
+
+        Parameters
+        ----------
+        strategies
+            The strategies that are being implemented
+
+        Returns
+        -------
+        None
+        """
+        if self.engine in BATCH_ENGINES:
+            self._implement_vector_(strategies)
+        elif self.engine == MULTI and self.cache is None and not self.checkpoint:
+            self._implement_multi_(strategies)
+        else:
+            for strategy in strategies:
+                self.implement_(strategy)
+
+    def implement_portfolio_(self, strategies: [Strategy], portfolio_id: int = 0) -> Summary:
+        """
+        Back tests strategies of several symbols out of one account with a shared cash balance, see PortfolioBackTest.
+        Saves the results in the ../results folder from this class init time: the strategies, their orders and trades,
+        and the balance records of the account under the portfolio id.
+
+        Parameters
+        ----------
+        strategies
+            The strategies of the portfolio, 'limit' strategies with unique strategy ids
+        portfolio_id
+            The strategy id of the balance records and summary of the account, it should not be the id of a strategy
+
+        Returns
+        -------
+        Summary
+            The summary of the balance records of the account
+        """
+        if any(strategy.trade_type != LIMIT for strategy in strategies):
+            raise ValueError('the portfolio engine only back tests limit strategies')
+        orders, trades, balances, summary = PortfolioBackTest(self.pricing_data, strategies, self.starting_balance,
+                                                              portfolio_id, self.history).implement_()
+        for order in orders:
+            order.order_id += self.order_id_offset
+        trades = [trade._replace(trade_id=trade.trade_id + self.trade_id_offset,
+                                 order_id=trade.order_id + self.order_id_offset) for trade in trades]
+        self.order_id_offset += len(orders)
+        self.trade_id_offset += len(trades)
+        self.dao._write_to_csv('strategies', strategies)
+        self.results.add_strategies(strategies)
+        self.results.add_summaries([summary])
+        self.dao._write_to_csv('orders', orders)
+        self.dao._write_to_csv('trades', trades)
+        self.dao._write_to_csv('balances', balances)
+        return summary
 
     def get_max_strategy_ending_balance(self) -> (int, Decimal, Balance):
         """
-        Iterates over all of the results information in the ../results folder from this class init time and finds
-        the strategy that produced the largest ending balance.
+        Iterates over the summaries of the strategies back tested by this class and finds the strategy that
+        produced the largest ending balance.
 
         Parameters
         ----------
@@ -65,21 +231,12 @@ class BackTest:
             The largest ending balance amount
             The largest ending Balance record
         """
-        ending_balances, max_balance_of_each_strategy = self._get_strategy_ending_and_max_balances()
-        strategy_id = 0
-        ending_balance = 0
-        balance = None
-        for k, v in ending_balances.items():
-            if v[0] > ending_balance:
-                strategy_id = k
-                ending_balance = v[0]
-                balance = v[1]
-        return strategy_id, ending_balance, balance
+        return self.results.get_max_ending_balance()
 
     def get_max_strategy_balance_at_anytime(self):
         """
-        Iterates over all of the results information in the ../results folder from this class init time and finds
-        the strategy that produced the largest balance at any time during the back testing period.
+        Iterates over the summaries of the strategies back tested by this class and finds the strategy that
+        produced the largest balance at any time during the back testing period.
 
         Parameters
         ----------
@@ -92,38 +249,29 @@ class BackTest:
             The largest anytime balance amount
             The largest anytime Balance record
         """
-        ending_balances, max_balance_of_each_strategy = self._get_strategy_ending_and_max_balances()
-        strategy_id = 0
-        anytime_balance = Decimal(0)
-        balance = None
-        for k, v in max_balance_of_each_strategy.items():
-            if v[0] > anytime_balance:
-                strategy_id = k
-                anytime_balance = v[0]
-                balance = v[1]
-        return strategy_id, anytime_balance, balance
-
-    def _get_strategy_ending_and_max_balances(self):
-        ending_balances = dict()
-        max_balance_of_each_strategy = defaultdict(tuple)
-        balances = self.dao.get_balances()
-        for balance in balances:
-            total_balance = balance[2] + balance[3] + balance[4]
-            ending_balances[balance[0]] = (total_balance, balance)
-            if total_balance > max_balance_of_each_strategy.get(balance[0], (Decimal(0), None))[0]:
-                max_balance_of_each_strategy[balance[0]] = (total_balance, balance)
-        return ending_balances, max_balance_of_each_strategy
+        return self.results.get_max_balance_at_anytime()
 
     def _get_starting_trading_day(self, prices, start_date):
-        strategy_is_live = False
-        trading_day = 0
-        for day in prices:
-            if self._greater_than_or_equal(day.date, start_date):
-                strategy_is_live = True
-                break
-            trading_day += 1
+        trading_day = self._get_trading_day(prices, start_date)
+        # the newest trading day is never traded, see _get_last_trading_day
+        strategy_is_live = trading_day < len(prices) - 1
         return strategy_is_live, trading_day
 
+    @classmethod
+    def _get_last_trading_day(cls, prices: [Price], iso_date: str) -> int:
+        # the orders placed on a trading day open on the next one, so a strategy is live until the trading day before
+        # the newest one at the latest, and its checkpoint can be taken there
+        return min(cls._get_trading_day(prices, iso_date), len(prices) - 2)
+
+    @staticmethod
+    def _get_trading_day(prices: [Price], iso_date: str) -> int:
+        # the index of the first trading day on or after the date, iso format strings sort in date order
+        return bisect_left(prices, date.fromisoformat(iso_date).isoformat(), key=lambda price: price.date)
+
+    @staticmethod
+    def _get_column_trading_day(columns: PriceColumns, iso_date: str) -> int:
+        return int(columns.date.searchsorted(date.fromisoformat(iso_date).isoformat().encode()))
+
     def implement_(self, strategy: Strategy):
         """
         Implements a strategy against historic daily pricing info during the time period specified for the strategy.
@@ -138,67 +286,340 @@ class BackTest:
         -------
         None
         """
+        if self.engine in BATCH_ENGINES:
+            return self._implement_vector_([strategy])
         self.dao._write_to_csv('strategies', [strategy])
+        orders, trades, balances, summary = self._simulate_(strategy) if self.cache is None else \
+            self._simulate_cached_(strategy)
+        self._save_(strategy, orders, trades, balances, summary)
+
+    def implement_stream_(self, strategy: Strategy, prices=None, duration_unit: str = BARS) -> None:
+        """
+        Implements a strategy with the decimal engine over a stream of daily or intraday price bars, e.g. minute bars,
+        holding only the bars around the current one, see PriceWindow.  The bars are traded with the same steps and
+        OHLC fill rules as implement_, one bar at a time, and for daily bars the results are the same as implement_.
+        The strategy is live from the first bar on or after its start date to the first bar on or after its end date,
+        or the bar before the last one.
+        Saves the results in the ../results folder from this class init time.
+
+        Parameters
+        ----------
+        strategy
+            The strategy that is being implemented
+        prices
+            The price bars of the strategy's symbol in date order, with iso format dates or date times, e.g.
+            '2023-04-10 09:30'.  Defaults to Dao.stream_prices of the symbol
+        duration_unit
+            one of ['bars', 'minutes', 'hours', 'days'], the unit of the strategy's order duration, see DURATION_UNITS
+
+        Returns
+        -------
+        None
+        """
+        self.dao._write_to_csv('strategies', [strategy])
+        window = PriceWindow(self.dao.stream_prices(strategy.symbol) if prices is None else prices)
+        orders, trades, balances, summary = self._simulate_stream_(strategy, window, duration_unit)
+        self._save_(strategy, orders, trades, balances, summary)
+
+    def _simulate_stream_(self, strategy: Strategy, window: PriceWindow,
+                          duration_unit: str) -> ([Order], [Trade], [Balance], Summary):
         starting_balance = Balance(strategy_id=strategy.strategy_id, date=strategy.start_date,
                                    cash_balance=self.starting_balance,
                                    order_balance=Decimal(0), invested_balance=Decimal(0), number_of_shares=0)
-        orders = []
+        ledger = Ledger(strategy.strategy_id, starting_balance, self.history)
+        book = OrderBook()
         trades = []
-        balances = [starting_balance]
+        order_dates = OrderDates(window, self._order_duration(strategy), duration_unit)
+        price = None
+        for price in window:
+            if price.date < strategy.start_date:
+                continue
+            order_dates.close_due(book, price)
+            book, trades, ledger = self._trade_bar_(strategy, book, trades, ledger, window, price.day_index)
+            order_dates.add_orders(book)
+            book.end_of_day(price.day_index)
+            if price.date >= strategy.end_date or window.is_last(price.day_index + 1):
+                self._end_stream_(book, trades, ledger, price)
+                break
+            ledger.end_of_day()
+        orders = order_dates.with_iso_dates(book.history, price.day_index) if price else []
+        return orders, trades, ledger.balances(), ledger.summary
+
+    def _trade_bar_(self, strategy: Strategy, book: OrderBook, trades: [Trade], ledger: Ledger, prices,
+                    trading_day: int) -> (OrderBook, [Trade], Ledger):
+        # the steps of _run_ for one bar
+        price = prices[trading_day]
+        book, trades, ledger = self._process_executed_sell_orders(book, trades, ledger, price)
+        book, trades, ledger = self._process_executed_buy_orders(book, trades, ledger, strategy, trading_day, prices)
+        book = self._change_expired_sell_orders_to_maket_orders(book, trading_day)
+        book, ledger = self._close_expired_buy_orders(book, ledger, trading_day, price)
+        book, ledger = self._add_new_buy_order(book, ledger, strategy, trading_day, prices)
+        return book, trades, ledger
+
+    def _end_stream_(self, book: OrderBook, trades: [Trade], ledger: Ledger, price: Price) -> None:
+        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(ledger,
+                                                                                                          price)
+        ledger.record(date=price.date, order_balance=order_balance, cash_balance=cash_balance,
+                      invested_balance=self._total_(balance_num_of_shares, price.close),
+                      number_of_shares=balance_num_of_shares)
+        ledger.end_of_day()
+        self.order_id_offset += len(book)
+        self.trade_id_offset += len(trades)
+
+    def resume_all_(self, checkpoints: [Checkpoint], end_date: str) -> None:
+        """
+        Extends the back tests of strategies to a later end date, simulating only the trading days after their
+        checkpoints.  The results are the same as implementing the strategies with the later end date: the summaries,
+        the strategies' order and trade ids, and the records after the checkpoints.
+        Saves the results in the ../results folder from this class init time: the strategies with the later end date,
+        the orders that were active at the checkpoints and the new orders, the new trades, and the balance records
+        that follow the checkpoints, which replace the ending balance records of the checkpointed back tests.
+
+        Parameters
+        ----------
+        checkpoints
+            The checkpoints of the strategies, e.g. Dao.load_checkpoints
+        end_date
+            The later end date in string format: '2024-01-01'
+
+        Returns
+        -------
+        None
+        """
+        for checkpoint in checkpoints:
+            strategy = checkpoint.strategy._replace(end_date=end_date)
+            self.dao._write_to_csv('strategies', [strategy])
+            orders, trades, balances, summary = self._resume_(checkpoint, strategy)
+            self._save_(strategy, orders, trades, balances, summary)
+
+    def _save_(self, strategy: Strategy, orders: [Order], trades: [Trade], balances: [Balance],
+               summary: Summary) -> None:
+        self.results.add_strategies([strategy])
+        self.results.add_summaries([summary])
+        self.dao._write_to_csv('orders', orders)
+        self.dao._write_to_csv('trades', trades)
+        self.dao._write_to_csv('balances', balances)
+
+    def _simulate_(self, strategy: Strategy) -> ([Order], [Trade], [Balance], Summary):
+        starting_balance = Balance(strategy_id=strategy.strategy_id, date=strategy.start_date,
+                                   cash_balance=self.starting_balance,
+                                   order_balance=Decimal(0), invested_balance=Decimal(0), number_of_shares=0)
+        ledger = Ledger(strategy.strategy_id, starting_balance, self.history)
 
         prices = self.pricing_data[strategy.symbol]
 
         strategy_is_live, trading_day = self._get_starting_trading_day(prices, strategy.start_date)
+        return self._run_(strategy, OrderBook(), ledger, prices, trading_day, strategy_is_live)
+
+    def _resume_(self, checkpoint: Checkpoint, strategy: Strategy) -> ([Order], [Trade], [Balance], Summary):
+        if self.engine in BATCH_ENGINES:
+            raise ValueError('only the decimal engine can be resumed from a checkpoint')
+        prices = self.pricing_data[strategy.symbol]
+        trading_day = checkpoint.trading_day
+        if trading_day >= len(prices) or prices[trading_day].date != checkpoint.date:
+            raise ValueError('the pricing data of ' + strategy.symbol + ' changed before the checkpoint')
+        if self._get_last_trading_day(prices, strategy.end_date) <= trading_day:
+            raise ValueError('the end date ' + strategy.end_date + ' is not after the checkpoint')
+
+        book = OrderBook(archived=checkpoint.order_count - len(checkpoint.orders))
+        for order in checkpoint.orders:
+            # the close dates were capped by the last trading day of the pricing data the checkpoint was taken with
+            book.add(Order(**{**order._asdict(),
+                              'order_id': order.order_id + self.order_id_offset,
+                              'close_date': min(order.open_date + self._order_duration(strategy),
+                                                len(prices) - 1)}))
+        ledger = Ledger(strategy.strategy_id, checkpoint.balance, self.history, checkpoint.summary, checkpoint.held)
+        return self._run_(strategy, book, ledger, prices, trading_day + 1, True, checkpoint.trade_count)
+
+    def _checkpoint_(self, strategy: Strategy, book: OrderBook, ledger: Ledger, price: Price,
+                     trade_count: int) -> Checkpoint:
+        orders = [Order(**{**order._asdict(), 'order_id': order.order_id - self.order_id_offset})
+                  for order in sorted(book.buys + book.sells, key=lambda order: order.order_id)]
+        balance, summary, held = ledger.checkpoint()
+        return Checkpoint(strategy=strategy, date=price.date, trading_day=price.day_index, balance=balance,
+                          summary=summary, held=held, orders=orders, order_count=len(book), trade_count=trade_count)
+
+    def _run_(self, strategy: Strategy, book: OrderBook, ledger: Ledger, prices: [Price], trading_day: int,
+              strategy_is_live: bool, traded: int = 0) -> ([Order], [Trade], [Balance], Summary):
+        # the trade ids follow the trades made before a checkpoint
+        self.trade_id_offset += traded
+        trades = []
+        last_trading_day = self._get_last_trading_day(prices, strategy.end_date)
 
         while strategy_is_live:
             price = prices[trading_day]
 
             # check for sells that were executed
-            orders, trades, balances = self._process_executed_sell_orders(orders, trades, balances, strategy, price)
+            book, trades, ledger = self._process_executed_sell_orders(book, trades, ledger, price)
 
             # check for buys that were executed
-            orders, trades, balances = self._process_executed_buy_orders(orders, trades, balances, strategy,
-                                                                         trading_day,
-                                                                         prices)
+            book, trades, ledger = self._process_executed_buy_orders(book, trades, ledger, strategy, trading_day,
+                                                                     prices)
 
             # check for sells that expired
-            orders = self._change_expired_sell_orders_to_maket_orders(orders, price)
+            book = self._change_expired_sell_orders_to_maket_orders(book, trading_day)
 
             # check for buys that expired
-            orders, balances = self._close_expired_buy_orders(orders, balances, strategy, price)
+            book, ledger = self._close_expired_buy_orders(book, ledger, trading_day, price)
 
             # enter new buy order
-            orders, balances = self._add_new_buy_order(orders, balances, strategy, trading_day, prices)
+            book, ledger = self._add_new_buy_order(book, ledger, strategy, trading_day, prices)
 
+            book.end_of_day(trading_day)
             trading_day += 1
-            if self._greater_than_or_equal(price.date, strategy.end_date):
+            if price.day_index >= last_trading_day:
                 strategy_is_live = False
+                if self.checkpoint:
+                    self.checkpoints[strategy.strategy_id] = self._checkpoint_(strategy, book, ledger, price,
+                                                                               traded + len(trades))
                 order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(
-                    balances, price)
-                last_balance = Balance(strategy_id=strategy.strategy_id,
-                                       date=price.date,
-                                       order_balance=order_balance,
-                                       cash_balance=cash_balance,
-                                       invested_balance=self._total_(balance_num_of_shares, price.close),
-                                       number_of_shares=balance_num_of_shares)
-                balances.append(last_balance)
-                self.order_id_offset += len(orders)
+                    ledger, price)
+                ledger.record(date=price.date,
+                              order_balance=order_balance,
+                              cash_balance=cash_balance,
+                              invested_balance=self._total_(balance_num_of_shares, price.close),
+                              number_of_shares=balance_num_of_shares)
+                self.order_id_offset += len(book)
                 self.trade_id_offset += len(trades)
-
-        self.dao._write_to_csv('orders', orders)
-        self.dao._write_to_csv('trades', trades)
+            ledger.end_of_day()
+
+        return self._with_iso_dates(book.history, prices), trades, ledger.balances(), ledger.summary
+
+    def _implement_multi_(self, strategies: [Strategy]) -> None:
+        self.dao._write_to_csv('strategies', strategies)
+        for strategy, (orders, trades, balances, summary) in zip(strategies, self._simulate_multi_(strategies)):
+            self._save_(strategy, orders, trades, balances, summary)
+
+    def _simulate_multi_(self, strategies: [Strategy]) -> [([Order], [Trade], [Balance], Summary)]:
+        symbols = defaultdict(list)
+        for i, strategy in enumerate(strategies):
+            symbols[strategy.symbol].append(i)
+
+        results = [None] * len(strategies)
+        for symbol, indices in symbols.items():
+            prices = self.pricing_data[symbol]
+            batch = [strategies[i] for i in indices]
+            multi_back_test = MultiBackTest(prices, batch, compile_rules(batch, self.strategy_types),
+                                            [self._get_trading_day(prices, strategy.start_date) for strategy in batch],
+                                            [self._get_last_trading_day(prices, strategy.end_date)
+                                             for strategy in batch],
+                                            self.starting_balance, self.history)
+            for i, (orders, trades, balances, summary) in zip(indices, multi_back_test.implement_()):
+                results[i] = self._with_iso_dates(orders, prices), trades, balances, summary
+
+        # the ids follow on from strategy to strategy, the same as back testing them one at a time
+        for orders, trades, _, _ in results:
+            for order in orders:
+                order.order_id += self.order_id_offset
+            trades[:] = [trade._replace(trade_id=trade.trade_id + self.trade_id_offset,
+                                        order_id=trade.order_id + self.order_id_offset) for trade in trades]
+            self.order_id_offset += len(orders)
+            self.trade_id_offset += len(trades)
+        return results
+
+    def _cache_key(self, strategy: Strategy) -> str:
+        # the behaviour of a strategy type is only known from its rule, the strategies of the types that only have
+        # hooks are not cached
+        strategy_type = get_strategy_type(strategy, self.strategy_types)
+        rule = strategy_type.rule(strategy)
+        if rule is None:
+            return None
+        history = None if self.engine in BATCH_ENGINES else self.history
+        return self.cache.key(strategy, self.starting_balance, self.pricing_data.fingerprint(strategy.symbol),
+                              self.engine, history, type(strategy_type).__qualname__, rule)
+
+    def _simulate_cached_(self, strategy: Strategy) -> ([Order], [Trade], [Balance], Summary):
+        key = self._cache_key(strategy)
+        if key is None:
+            return self._simulate_(strategy)
+        order_id_offset, trade_id_offset = self.order_id_offset, self.trade_id_offset
+        result = self.cache.get([key]).get(key)
+        if result is None:
+            orders, trades, balances, summary = self._simulate_(strategy)
+            result = CachedResult(orders, trades, balances, summary, self.order_id_offset - order_id_offset,
+                                  self.trade_id_offset - trade_id_offset)
+            self.cache.put({key: relabel(result, 0, -order_id_offset, -trade_id_offset)})
+        else:
+            # the ids of the next strategy follow on as if this one was simulated
+            result = relabel(result, strategy.strategy_id, order_id_offset, trade_id_offset)
+            self.order_id_offset += result.order_count
+            self.trade_id_offset += result.trade_count
+        return result.orders, result.trades, result.balances, result.summary
+
+    def _simulate_vector_cached_(self, strategies: [Strategy]) -> [Balance]:
+        keys = [self._cache_key(strategy) for strategy in strategies]
+        results = self.cache.get(keys)
+        misses = [(strategy, key) for strategy, key in zip(strategies, keys) if key not in results]
+        balances = self._simulate_vector_([strategy for strategy, _ in misses]) if misses else []
+        simulated = dict()
+        for i, (strategy, key) in enumerate(misses):
+            # the vector engines save two balance records per strategy, the max then the ending balance record
+            simulated[key] = relabel(CachedResult([], [], balances[2 * i:2 * i + 2], None, 0, 0), 0, 0, 0)
+        self.cache.put(simulated)
+        results.update(simulated)
+        return [balance for strategy, key in zip(strategies, keys)
+                for balance in relabel(results[key], strategy.strategy_id, 0, 0).balances]
+
+    def _implement_vector_(self, strategies: [Strategy]) -> None:
+        balances = self._simulate_vector_(strategies) if self.cache is None else \
+            self._simulate_vector_cached_(strategies)
+        self.results.add_strategies(strategies)
+        self.results.add_balances(balances, track_drawdown=False)
+        self.dao._write_to_csv('strategies', strategies)
         self.dao._write_to_csv('balances', balances)
 
-    def _process_executed_buy_orders(self, orders: [Order], trades: [Trade], balances: [Balance], strategy: Strategy,
-                                     trading_day: int, prices: [Price]) -> ([Order], [Trade], [Balance]):
+    def _simulate_vector_(self, strategies: [Strategy]) -> [Balance]:
+        # the lot arrays of a batch are sized by its longest order duration
+        batches = defaultdict(list)
+        for strategy, rule in zip(strategies, compile_rules(strategies, self.strategy_types)):
+            batches[(strategy.symbol, strategy.start_date, strategy.end_date, rule.order_duration)].append(
+                (strategy, rule))
+
+        balances = dict()
+        for (symbol, start_date, end_date, order_duration), batch in batches.items():
+            # the vector engine only needs the memory-mapped columns, not the Decimal prices
+            columns = self.pricing_data.columns(symbol)
+            engine = BATCH_ENGINES[self.engine]
+            if symbol not in self.price_arrays:
+                # the pricing columns of the engine are loaded once per symbol, and reused by every later batch
+                self.price_arrays[symbol] = engine.load_prices(columns)
+            vector_back_test = engine(self.price_arrays[symbol],
+                                      [rule.buy_offset for _, rule in batch],
+                                      [rule.sell_offset for _, rule in batch],
+                                      [rule.order_duration for _, rule in batch],
+                                      [rule.order_amount_ratio for _, rule in batch],
+                                      self.starting_balance)
+            ending, peak = vector_back_test.implement_(self._get_column_trading_day(columns, start_date),
+                                                       self._get_column_trading_day(columns, end_date))
+            for i, (strategy, _) in enumerate(batch):
+                # the max balance record goes first so that it wins a tie with the ending balance record
+                balances[strategy.strategy_id] = [self._vector_balance(strategy, peak, i, columns, engine),
+                                                  self._vector_balance(strategy, ending, i, columns, engine)]
+
+        return [balance for strategy in strategies for balance in balances[strategy.strategy_id]]
+
+    @staticmethod
+    def _vector_balance(strategy: Strategy, balances: BalanceArrays, i: int, columns: PriceColumns,
+                        engine: VectorBackTest) -> Balance:
+        day_index = balances.day_index[i]
+        return Balance(strategy_id=strategy.strategy_id,
+                       date=columns.date[day_index].decode() if day_index >= 0 else strategy.start_date,
+                       order_balance=engine.decimal(balances.order_balance[i]),
+                       cash_balance=engine.decimal(balances.cash_balance[i]),
+                       invested_balance=engine.decimal(balances.invested_balance[i]),
+                       number_of_shares=int(balances.number_of_shares[i]))
+
+    def _process_executed_buy_orders(self, book: OrderBook, trades: [Trade], ledger: Ledger, strategy: Strategy,
+                                     trading_day: int, prices: [Price]) -> (OrderBook, [Trade], Ledger):
 
         price = prices[trading_day]
-        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(balances,
+        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(ledger,
                                                                                                           price)
-        for past_order in orders:
-            # check active buys
-            if past_order.active and past_order.buy_sell == BUY and self._greater_than_or_equal(past_order.close_date,
-                                                                                                price.date):
+        strategy_type = get_strategy_type(strategy, self.strategy_types)
+        requests = []
+        # active buys have not reached their close date yet, expired buys were closed on their close date
+        for past_order in book.buys:
+            if past_order.active:
                 # check buy price condition was met
                 if past_order.price >= min(price.open, price.low, price.close):
 
@@ -209,13 +630,11 @@ class BackTest:
                     buy_total = self._total_(past_order.number_of_shares, buy_price)
                     new_num_of_shares = balance_num_of_shares + past_order.number_of_shares
 
-                    balance = Balance(strategy_id=strategy.strategy_id,
-                                      date=price.date,
-                                      order_balance=order_balance - past_order.total,
-                                      cash_balance=cash_balance + past_order.total - buy_total,
-                                      invested_balance=self._total_(new_num_of_shares, price.close),
-                                      number_of_shares=new_num_of_shares)
-                    balances.append(balance)
+                    ledger.record(date=price.date,
+                                  order_balance=order_balance - past_order.total,
+                                  cash_balance=cash_balance + past_order.total - buy_total,
+                                  invested_balance=self._total_(new_num_of_shares, price.close),
+                                  number_of_shares=new_num_of_shares)
                     past_order.active = False
 
                     trade = Trade(trade_id=len(trades) + 1 + self.trade_id_offset,
@@ -225,36 +644,22 @@ class BackTest:
                                   price=buy_price,
                                   total=buy_total)
                     trades.append(trade)
+                    ledger.trade(past_order, buy_total)
+                    requests += strategy_type.on_fill(strategy, past_order, trade)
 
-                    sale_price = buy_price * strategy.sell_offset
-                    sale_total = self._total_(past_order.number_of_shares, sale_price)
-                    sale_order = Order(order_id=len(orders) + 1 + self.order_id_offset,
-                                       strategy_id=strategy.strategy_id,
-                                       symbol=strategy.symbol,
-                                       number_of_shares=past_order.number_of_shares,
-                                       buy_sell=SELL,
-                                       trade_type=LIMIT,
-                                       open_date=prices[trading_day + 1].date,
-                                       close_date=prices[
-                                           min(trading_day + 1 + strategy.order_duration, len(prices) - 1)].date,
-                                       price=sale_price,
-                                       total=sale_total,
-                                       active=True)
-                    orders.append(sale_order)
-
-        return orders, trades, balances
-
-    def _process_executed_sell_orders(self, orders: [Order], trades: [Trade], balances: [Balance], strategy: Strategy,
-                                      price: Price) -> ([Order], [Trade], [Balance]):
-
-        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(balances,
+        return self._enter_orders(book, ledger, strategy, trading_day, prices, requests), trades, ledger
+
+    def _process_executed_sell_orders(self, book: OrderBook, trades: [Trade], ledger: Ledger,
+                                      price: Price) -> (OrderBook, [Trade], Ledger):
+
+        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(ledger,
                                                                                                           price)
-        # we should not have to check all past orders, can we check just the last one? What happens
-        # during the first and last order duration?
-        for past_order in orders:
+        # only the active sells are indexed; limit sells that reached their close date were already converted to
+        # market sells, so every active limit sell is still within its order duration
+        for past_order in book.sells:
             # check if past sell orders have executed today
             # check for active market sales
-            if past_order.active and past_order.buy_sell == SELL and past_order.trade_type == MARKET:
+            if past_order.active and past_order.trade_type == MARKET:
 
                 sale_total = self._total_(past_order.number_of_shares, price.open)
                 new_num_shares = past_order.number_of_shares + balance_num_of_shares
@@ -266,21 +671,18 @@ class BackTest:
                               price=price.open,
                               total=sale_total)
                 trades.append(trade)
+                ledger.trade(past_order, sale_total)
 
-                balance = Balance(strategy_id=strategy.strategy_id,
-                                  date=price.date,
-                                  order_balance=order_balance,
-                                  cash_balance=cash_balance + sale_total,
-                                  invested_balance=self._total_(new_num_shares, price.close),
-                                  number_of_shares=new_num_shares)
-                balances.append(balance)
+                ledger.record(date=price.date,
+                              order_balance=order_balance,
+                              cash_balance=cash_balance + sale_total,
+                              invested_balance=self._total_(new_num_shares, price.close),
+                              number_of_shares=new_num_shares)
 
                 past_order.active = False
 
             # check active limit sales
-            elif past_order.active and past_order.buy_sell == SELL and past_order.trade_type == LIMIT and self._greater_than_or_equal(
-                    past_order.close_date,
-                    price.date):
+            elif past_order.active and past_order.trade_type == LIMIT:
                 # check sale price conditions were met
                 if past_order.price <= max(price.open, price.high, price.close):
                     sale_price = past_order.price
@@ -290,13 +692,11 @@ class BackTest:
                     sale_total = self._total_(past_order.number_of_shares, sale_price)
                     new_num_of_shares = balance_num_of_shares - past_order.number_of_shares
 
-                    balance = Balance(strategy_id=strategy.strategy_id,
-                                      date=price.date,
-                                      order_balance=order_balance,
-                                      cash_balance=cash_balance + sale_total,
-                                      invested_balance=self._total_(new_num_of_shares, price.close),
-                                      number_of_shares=new_num_of_shares)
-                    balances.append(balance)
+                    ledger.record(date=price.date,
+                                  order_balance=order_balance,
+                                  cash_balance=cash_balance + sale_total,
+                                  invested_balance=self._total_(new_num_of_shares, price.close),
+                                  number_of_shares=new_num_of_shares)
                     past_order.active = False
 
                     trade = Trade(trade_id=len(trades) + 1 + self.trade_id_offset,
@@ -306,114 +706,104 @@ class BackTest:
                                   price=sale_price,
                                   total=sale_total)
                     trades.append(trade)
+                    ledger.trade(past_order, sale_total)
 
-        return orders, trades, balances
+        return book, trades, ledger
 
     @staticmethod
     def _total_(num_shares: int, current_price: float):
         return num_shares * current_price
 
-    def _add_new_buy_order(self, orders: [Order], balances: [Balance], strategy: Strategy, trading_day: int,
+    def _add_new_buy_order(self, book: OrderBook, ledger: Ledger, strategy: Strategy, trading_day: int,
                            prices) -> (
-            [Order], [Balance]):
-
-        price = prices[trading_day]
-
-        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(balances,
-                                                                                                          price)
-
-        default_order_amount = self.starting_balance * strategy.order_amount_ratio
-
-        if cash_balance > Decimal(0):
-            # create_order
-            order_amount = default_order_amount if default_order_amount < cash_balance else cash_balance
-            buy_offset_price = price.close * strategy.buy_offset
-            order_num_of_shares = int(order_amount / buy_offset_price)
-            if order_num_of_shares > 0:
-                open_date = prices[trading_day + 1].date
-                close = prices[min(trading_day + 1 + strategy.order_duration, len(prices) - 1)].date
-                total = buy_offset_price * order_num_of_shares
-                order = Order(order_id=len(orders) + 1 + self.order_id_offset,
-                              strategy_id=strategy.strategy_id,
-                              symbol=strategy.symbol,
-                              number_of_shares=order_num_of_shares,
-                              buy_sell=BUY,
-                              trade_type='limit',
-                              open_date=open_date,
-                              close_date=close,
-                              price=buy_offset_price,
-                              total=total,
-                              active=True)
-                orders.append(order)
-                cash_balance -= total
-                order_balance += total
+            OrderBook, Ledger):
+
+        # the strategy type decides the new orders of the day
+        strategy_type = get_strategy_type(strategy, self.strategy_types)
+        requests = strategy_type.on_bar(strategy, prices, trading_day, ledger.account, self.starting_balance,
+                                        self.indicators)
+        return self._enter_orders(book, ledger, strategy, trading_day, prices, requests), ledger
+
+    def _enter_orders(self, book: OrderBook, ledger: Ledger, strategy: Strategy, trading_day: int, prices,
+                      requests: [OrderRequest]) -> OrderBook:
+        # the orders requested by the strategy type open on the next trading day, a buy order holds its total
+        order_duration = self._order_duration(strategy) if requests else None
+        for request in requests:
+            open_date = trading_day + 1
+            close = min(trading_day + 1 + order_duration, len(prices) - 1)
+            total = self._total_(request.number_of_shares, request.price)
+            order = Order(order_id=len(book) + 1 + self.order_id_offset,
+                          strategy_id=strategy.strategy_id,
+                          symbol=strategy.symbol,
+                          number_of_shares=request.number_of_shares,
+                          buy_sell=request.buy_sell,
+                          trade_type=LIMIT,
+                          open_date=open_date,
+                          close_date=close,
+                          price=request.price,
+                          total=total,
+                          active=True)
+            book.add(order)
+            if request.buy_sell == BUY:
                 # update the balance
-                balance = Balance(strategy.strategy_id, open_date, order_balance, cash_balance, invested_balance,
-                                  balance_num_of_shares)
-                balances.append(balance)
+                order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(
+                    ledger, prices[trading_day])
+                ledger.record(prices[open_date].date, order_balance + total, cash_balance - total, invested_balance,
+                              balance_num_of_shares)
 
-        return orders, balances
+        return book
 
-    def _change_expired_sell_orders_to_maket_orders(self, orders: [Order], price: Price) -> (
-            [Order], [Trade], [Balance]):
+    def _order_duration(self, strategy: Strategy) -> int:
+        # the order duration of the rule of the strategy type, the same as the multi and vector engines
+        rule = get_strategy_type(strategy, self.strategy_types).rule(strategy)
+        return strategy.order_duration if rule is None else rule.order_duration
 
-        for past_order in orders:
-            # check if past sells have expired
-            if past_order.active and past_order.buy_sell == SELL and self._less_than_or_equal(past_order.close_date,
-                                                                                              price.date):
-                # convert the sale to a market sell at the next opening price
-                past_order.trade_type = MARKET
+    def _change_expired_sell_orders_to_maket_orders(self, book: OrderBook, trading_day: int) -> OrderBook:
 
-        return orders
+        # check if past sells have expired
+        for past_order in book.expiring(trading_day, SELL):
+            # convert the sale to a market sell at the next opening price
+            past_order.trade_type = MARKET
 
-    def _close_expired_buy_orders(self, orders: [Order], balances: [Balance], strategy: Strategy, price: Price) -> (
-            [Order], [Balance]):
+        return book
 
-        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(balances,
-                                                                                                          price)
+    def _close_expired_buy_orders(self, book: OrderBook, ledger: Ledger, trading_day: int,
+                                  price: Price) -> (OrderBook, Ledger):
 
-        # we should not have to check all past orders, can we check just the last one? What happens
-        # during the first and last order duration? such as for past_order in orders[-(strategy.order_duration + 1):]:
-        for past_order in orders:
-            # check if past buys have expired
-            if past_order.active and past_order.buy_sell == BUY and self._less_than_or_equal(past_order.close_date,
-                                                                                             price.date):
-                order_balance -= past_order.total
-                cash_balance += past_order.total
-                balance = Balance(strategy_id=strategy.strategy_id,
-                                  date=price.date,
-                                  order_balance=order_balance,
-                                  cash_balance=cash_balance,
-                                  invested_balance=invested_balance,
-                                  number_of_shares=balance_num_of_shares)
-                balances.append(balance)
-                past_order.active = False
-
-        return orders, balances
+        order_balance, cash_balance, invested_balance, balance_num_of_shares = self._get_current_balances(ledger,
+                                                                                                          price)
 
-    def _get_current_balances(self, balances: [Balance], price: Price):
-        order_balance = balances[-1].order_balance
-        cash_balance = balances[-1].cash_balance
-        balance_num_of_shares = balances[-1].number_of_shares
+        # check if past buys have expired
+        for past_order in book.expiring(trading_day, BUY):
+            order_balance -= past_order.total
+            cash_balance += past_order.total
+            ledger.record(date=price.date,
+                          order_balance=order_balance,
+                          cash_balance=cash_balance,
+                          invested_balance=invested_balance,
+                          number_of_shares=balance_num_of_shares)
+            past_order.active = False
+
+        return book, ledger
+
+    def _get_current_balances(self, ledger: Ledger, price: Price):
+        order_balance = ledger.account.order_balance
+        cash_balance = ledger.account.cash_balance
+        balance_num_of_shares = ledger.account.number_of_shares
         invested_balance = balance_num_of_shares * price.close
         return order_balance, cash_balance, invested_balance, balance_num_of_shares
 
     @staticmethod
-    def _equal(left: str, right: str):
-        return date.fromisoformat(left) == date.fromisoformat(right)
-
-    @staticmethod
-    def _less_than_or_equal(left: str, right: str):
-        return date.fromisoformat(left) <= date.fromisoformat(right)
-
-    @staticmethod
-    def _greater_than_or_equal(left: str, right: str):
-        return date.fromisoformat(left) >= date.fromisoformat(right)
+    def _with_iso_dates(orders: [Order], prices: [Price]) -> [Order]:
+        # orders keep trading day indices internally, the results are saved with iso format dates
+        return [Order(**{**order._asdict(),
+                         'open_date': prices[order.open_date].date,
+                         'close_date': prices[order.close_date].date}) for order in orders]
 
 
 if __name__ == '__main__':
-    back_test = BackTest()
-    back_test.implement_all_hard_coded_strategies()
+    with ResultCache() as cache, BackTest(cache=cache) as back_test:
+        back_test.implement_all_hard_coded_strategies()
     strategy_id, ending_balance, balance = back_test.get_max_strategy_ending_balance()
-    best_hard_coded_strategy = back_test.dao.get_strategy(strategy_id)
+    best_hard_coded_strategy = back_test.results.get_strategy(strategy_id)
     print(strategy_id, ending_balance, balance, best_hard_coded_strategy)
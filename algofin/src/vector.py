@@ -0,0 +1,330 @@
+from collections import namedtuple
+from decimal import Decimal
+from objects import Price
+from price_cache import PriceColumns
+import numpy as np
+
+# specify constants
+NONE = 0
+BUY = 1
+SELL = 2
+MARKET = 3
+TOLERANCE = 1e-12
+"""
+Relative tolerance used when the vector engine compares float64 prices: a limit price within TOLERANCE of the day's
+price is treated as equal, and a share count within TOLERANCE of the next integer is rounded up to it.  The Decimal
+engine compares exact decimal products, so this absorbs the float64 rounding of those products.  With prices of up to
+6 decimals and offsets of up to 3 decimals the ending and max balances match the Decimal engine to a relative error
+well below 1e-9, see tests/test_vector.py.
+"""
+
+PriceArrays = namedtuple('PriceArrays', ['open', 'high', 'low', 'close'])
+"""
+Columnar float64 daily pricing information of one symbol, indexed by trading day index
+
+Parameters
+----------
+- open: numpy array of the opening prices
+- high: numpy array of the highest prices
+- low: numpy array of the lowest prices
+- close: numpy array of the closing prices
+
+Returns
+-------
+PriceArrays
+    The pricing columns
+"""
+
+BalanceArrays = namedtuple('BalanceArrays',
+                           ['order_balance', 'cash_balance', 'invested_balance', 'number_of_shares', 'day_index'])
+"""
+Balance records of a batch of strategies, one element per strategy
+
+Parameters
+----------
+- order_balance: float64 numpy array
+- cash_balance: float64 numpy array
+- invested_balance: float64 numpy array
+- number_of_shares: int64 numpy array
+- day_index: int64 numpy array of the trading day index of the balance record, -1 for the starting balance record
+
+Returns
+-------
+BalanceArrays
+    The balance records
+"""
+
+
+def load_price_arrays(prices: [Price]) -> PriceArrays:
+    """
+    Converts a list of daily prices to float64 columns
+
+    Parameters
+    ----------
+    prices
+        List of daily stock prices
+
+    Returns
+    -------
+    PriceArrays
+        The pricing columns
+    """
+    columns = np.array([(price.open, price.high, price.low, price.close) for price in prices], dtype=np.float64)
+    return PriceArrays(*columns.reshape(-1, 4).T.copy())
+
+
+class VectorBackTest:
+    # the dtype of the money arrays and the relative tolerance of their comparisons
+    money = np.float64
+    tolerance = TOLERANCE
+
+    def __init__(self, prices: PriceArrays, buy_offsets, sell_offsets, order_durations, order_amount_ratios,
+                 starting_balance):
+        """
+        Back tests a batch of strategies of the same symbol at once, each compiled to a Rule: 'limit buy offset down;
+        limit sell offset up' or 'buy and hold'.
+
+        Follows the same order lifecycle as BackTest.implement_, but over float64 arrays with one element per
+        strategy.  Every buy order and the sell order entered when it fills form a lot; the lots of all the strategies
+        live in flat arrays of slots, strategy * slots_per_strategy + the day the buy order was entered modulo
+        slots_per_strategy.  Each trading day scans the lot arrays with a fixed number of array operations and then
+        only touches the lots that filled or expired.  Only the ending and max balance records are kept.
+
+        Parameters
+        ----------
+        prices
+            The pricing columns of the symbol
+        buy_offsets, sell_offsets, order_durations, order_amount_ratios
+            Sequences with one value per strategy, see Rule; a sell offset of None holds the shares a buy order fills
+        starting_balance
+            The starting balance for back testing
+
+        Returns
+        -------
+        VectorBackTest
+        """
+        self.prices = prices
+        self.buy_offsets = self._ratios(buy_offsets)
+        self.holds = np.array([offset is None for offset in sell_offsets], dtype=bool)
+        self.sell_offsets = self._ratios([1 if offset is None else offset for offset in sell_offsets])
+        self.order_durations = np.asarray(order_durations, dtype=np.int64)
+        self.default_order_amounts = self._order_amounts(starting_balance, order_amount_ratios)
+        self.starting_balance = self._money(starting_balance)
+        self.strategies = len(self.buy_offsets)
+
+    @staticmethod
+    def load_prices(columns: PriceColumns) -> PriceArrays:
+        """
+        Gets the pricing columns this engine computes with
+
+        Parameters
+        ----------
+        columns
+            The memory-mapped pricing columns of the symbol
+
+        Returns
+        -------
+        PriceArrays
+            The float64 pricing columns
+        """
+        return PriceArrays(columns.open, columns.high, columns.low, columns.close)
+
+    @staticmethod
+    def decimal(value) -> Decimal:
+        """
+        Converts a money value of the balance arrays to a Decimal
+
+        Parameters
+        ----------
+        value
+            A float64 money value
+
+        Returns
+        -------
+        Decimal
+            The shortest Decimal that rounds to the float64 value
+        """
+        return Decimal(str(value))
+
+    @staticmethod
+    def _ratios(values):
+        return np.asarray(values, dtype=np.float64)
+
+    @staticmethod
+    def _order_amounts(starting_balance, ratios):
+        return float(starting_balance) * np.asarray(ratios, dtype=np.float64)
+
+    @staticmethod
+    def _money(value):
+        return float(value)
+
+    @staticmethod
+    def _limit_price(prices, offsets):
+        return prices * offsets
+
+    @staticmethod
+    def _shares(order_amount, price):
+        return np.floor(order_amount / price * (1 + TOLERANCE)).astype(np.int64)
+
+    def implement_(self, first_day: int, last_day: int) -> (BalanceArrays, BalanceArrays):
+        """
+        Implements the strategies from the first to the last trading day index, both included
+
+        Parameters
+        ----------
+        first_day
+            The trading day index of the start date
+        last_day
+            The trading day index of the end date
+
+        Returns
+        -------
+        (BalanceArrays, BalanceArrays)
+            The ending balance records
+            The balance records with the max total balance at anytime
+        """
+        self._reset(last_day - first_day + 2)
+        # the orders placed on a trading day open on the next one, the newest trading day is not traded
+        for trading_day in range(first_day, min(last_day, len(self.prices.close) - 2) + 1):
+            self._process_executed_sell_orders(trading_day)
+            self._process_executed_buy_orders(trading_day)
+            self._change_expired_sell_orders_to_market_orders(trading_day)
+            self._close_expired_buy_orders(trading_day)
+            self._add_new_buy_order(trading_day, first_day)
+            self.day = trading_day
+        close = self.prices.close[self.day] if self.day >= 0 else self.money(0)
+        every = np.arange(self.strategies)
+        invested = self.number_of_shares * close
+        self._track_peak(every, self.order_balance + self.cash_balance + invested, self.order_balance,
+                         self.cash_balance, invested, self.number_of_shares, self.day)
+        ending = BalanceArrays(self.order_balance, self.cash_balance, invested, self.number_of_shares,
+                               np.full(self.strategies, self.day))
+        return ending, BalanceArrays(*self.peak[1:])
+
+    def _reset(self, trading_days: int):
+        # a lot lives at most order_duration + 1 days as a buy, order_duration + 1 days as a limit sell and one day
+        # as a market sell
+        self.slots = int(min(2 * self.order_durations.max(initial=0) + 4, trading_days))
+        lots = self.strategies * self.slots
+        self.state = np.zeros(lots, dtype=np.int8)
+        self.shares = np.zeros(lots, dtype=np.int64)
+        self.limit_price = np.zeros(lots, dtype=self.money)
+        self.order_total = np.zeros(lots, dtype=self.money)
+        self.close_day = np.zeros(lots, dtype=np.int64)
+        # sorts the lots of a strategy in order_id order within a side
+        self.sequence = np.zeros(lots, dtype=np.int64)
+        self.order_balance = np.zeros(self.strategies, dtype=self.money)
+        self.cash_balance = np.full(self.strategies, self.starting_balance, dtype=self.money)
+        self.number_of_shares = np.zeros(self.strategies, dtype=np.int64)
+        self.peak = [np.full(self.strategies, self.starting_balance, dtype=self.money),
+                     np.zeros(self.strategies, dtype=self.money),
+                     np.full(self.strategies, self.starting_balance, dtype=self.money),
+                     np.zeros(self.strategies, dtype=self.money),
+                     np.zeros(self.strategies, dtype=np.int64), np.full(self.strategies, -1, dtype=np.int64)]
+        self.day = -1
+
+    def _track_peak(self, rows, totals, order_balance, cash_balance, invested_balance, number_of_shares, day):
+        # a later balance record only replaces the max balance record when it is strictly larger
+        higher = totals > self.peak[0][rows] * (1 + self.tolerance)
+        if higher.any():
+            for column, values in zip(self.peak, (totals, order_balance, cash_balance, invested_balance,
+                                                  number_of_shares, day)):
+                column[rows[higher]] = values[higher] if np.ndim(values) else values
+
+    @staticmethod
+    def _last_of_each(rows, keys):
+        # positions of the largest key of each strategy, rows in ascending strategy order
+        ordered = np.lexsort((keys, rows))
+        return ordered[np.append(rows[ordered][1:] != rows[ordered][:-1], True)]
+
+    def _record_fills(self, lots, rows, order_balance, cash_balance, number_of_shares, trading_day):
+        # every fill records a balance from the balances at the start of the step
+        invested = number_of_shares * self.prices.close[trading_day]
+        totals = order_balance + cash_balance + invested
+        peaks = self._last_of_each(rows, totals)
+        self._track_peak(rows[peaks], totals[peaks], order_balance[peaks], cash_balance[peaks], invested[peaks],
+                         number_of_shares[peaks], trading_day)
+        # so the last fill in order_id order is the one that carries over
+        last = self._last_of_each(rows, self.sequence[lots])
+        self.order_balance[rows[last]] = order_balance[last]
+        self.cash_balance[rows[last]] = cash_balance[last]
+        self.number_of_shares[rows[last]] = number_of_shares[last]
+
+    def _process_executed_sell_orders(self, trading_day: int):
+        p = self.prices
+        high = max(p.open[trading_day], p.high[trading_day], p.close[trading_day]) * (1 + self.tolerance)
+        lots = np.flatnonzero((self.state == MARKET) | ((self.state == SELL) & (self.limit_price <= high)))
+        if not len(lots):
+            return
+        rows = lots // self.slots
+        market = self.state[lots] == MARKET
+        shares = self.shares[lots]
+        sale_price = np.where(market, p.open[trading_day], np.maximum(self.limit_price[lots], p.open[trading_day]))
+        # market sales add the shares to the balance, the same as BackTest._process_executed_sell_orders
+        self._record_fills(lots, rows, self.order_balance[rows], self.cash_balance[rows] + shares * sale_price,
+                           self.number_of_shares[rows] + np.where(market, shares, -shares), trading_day)
+        self.state[lots] = NONE
+
+    def _process_executed_buy_orders(self, trading_day: int):
+        p = self.prices
+        low = min(p.open[trading_day], p.low[trading_day], p.close[trading_day])
+        lots = np.flatnonzero((self.state == BUY) & (self.limit_price * (1 + self.tolerance) >= low))
+        if not len(lots):
+            return
+        rows = lots // self.slots
+        shares = self.shares[lots]
+        buy_price = np.minimum(self.limit_price[lots], p.open[trading_day])
+        order_total = self.order_total[lots]
+        self._record_fills(lots, rows, self.order_balance[rows] - order_total,
+                           self.cash_balance[rows] + order_total - shares * buy_price,
+                           self.number_of_shares[rows] + shares, trading_day)
+        # enter the limit sell for the purchased shares, the lot is done when they are held
+        self.state[lots] = np.where(self.holds[rows], NONE, SELL)
+        self.limit_price[lots] = self._limit_price(buy_price, self.sell_offsets[rows])
+        self.close_day[lots] = np.minimum(trading_day + 1 + self.order_durations[rows], len(p.close) - 1)
+        self.sequence[lots] += trading_day * len(p.close)
+
+    def _change_expired_sell_orders_to_market_orders(self, trading_day: int):
+        self.state[(self.state == SELL) & (self.close_day <= trading_day)] = MARKET
+
+    def _close_expired_buy_orders(self, trading_day: int):
+        lots = np.flatnonzero((self.state == BUY) & (self.close_day <= trading_day))
+        if not len(lots):
+            return
+        rows = lots // self.slots
+        order_total = self.order_total[lots]
+        first = self._last_of_each(rows, -self.sequence[lots])
+        rows_first = rows[first]
+        invested = self.number_of_shares[rows_first] * self.prices.close[trading_day]
+        self._track_peak(rows_first, self.order_balance[rows_first] + self.cash_balance[rows_first] + invested,
+                         self.order_balance[rows_first] - order_total[first],
+                         self.cash_balance[rows_first] + order_total[first], invested,
+                         self.number_of_shares[rows_first], trading_day)
+        released = np.zeros(self.strategies, dtype=self.money)
+        np.add.at(released, rows, order_total)
+        self.order_balance -= released
+        self.cash_balance += released
+        self.state[lots] = NONE
+
+    def _add_new_buy_order(self, trading_day: int, first_day: int):
+        close = self.prices.close[trading_day]
+        order_amount = np.minimum(self.default_order_amounts, self.cash_balance)
+        buy_offset_price = self._limit_price(close, self.buy_offsets)
+        shares = self._shares(order_amount, buy_offset_price)
+        rows = np.flatnonzero((self.cash_balance > 0) & (shares > 0))
+        if not len(rows):
+            return
+        lots = rows * self.slots + (trading_day - first_day) % self.slots
+        total = buy_offset_price[rows] * shares[rows]
+        self.state[lots] = BUY
+        self.shares[lots] = shares[rows]
+        self.limit_price[lots] = buy_offset_price[rows]
+        self.order_total[lots] = total
+        self.close_day[lots] = np.minimum(trading_day + 1 + self.order_durations[rows], len(self.prices.close) - 1)
+        self.sequence[lots] = trading_day
+        self.cash_balance[rows] -= total
+        self.order_balance[rows] += total
+        invested = self.number_of_shares[rows] * close
+        self._track_peak(rows, self.order_balance[rows] + self.cash_balance[rows] + invested,
+                         self.order_balance[rows], self.cash_balance[rows], invested, self.number_of_shares[rows],
+                         trading_day + 1)
@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from functools import partial
+import numpy as np
+from dao import Dao, MEMORY
+from ledger import SUMMARY
+from objects import Window, WalkForwardReport
+from optimize import Budget, Search, SEARCHES, GRID, SPACE, ENDING_TOTAL, MAX_TOTAL, get_score
+from results import Results
+from trading import BackTest, DECIMAL, VECTOR
+
+# the BackTest of a worker process, created once per worker so the pricing data is loaded once per worker and reused
+# by every window the worker optimizes
+worker_back_test = None
+
+
+def _init_worker(starting_balance, engine: str) -> None:
+    global worker_back_test
+    worker_back_test = BackTest(starting_balance, engine, backend=MEMORY, history=SUMMARY)
+
+
+def _run_window(dates: (int, str, str, str, str), search: str, space: dict, seed: int, budget: Budget,
+                objective: str) -> Window:
+    window_id, train_start, train_end, test_start, test_end = dates
+    back_test = worker_back_test
+    # each window only keeps the summaries of its own back tests
+    back_test.results = Results()
+    budget = Budget(budget.backtests, budget.seconds) if budget else None
+    train = Search(back_test, train_start, train_end, budget, objective)
+    strategy, train_score = SEARCHES[search](space, seed).run(train)
+
+    test_strategy = strategy._replace(strategy_id=train.strategy_id + 1, start_date=test_start, end_date=test_end)
+    back_test.implement_all_([test_strategy])
+    test_score = get_score(back_test.results.summaries[test_strategy.strategy_id], objective)
+    return Window(window_id, train_start, train_end, test_start, test_end, strategy.symbol, strategy.buy_offset,
+                  strategy.sell_offset, strategy.order_duration, strategy.order_amount_ratio,
+                  train_score / back_test.starting_balance - 1, test_score / back_test.starting_balance - 1)
+
+
+def get_windows(dates: np.ndarray, start: str, end: str, window: int, step: int, split: float) -> [tuple]:
+    """
+    Splits a date range into walk forward windows of trading days
+
+    Parameters
+    ----------
+    dates
+        The trading days of the calendar, a numpy bytes array of iso format dates, e.g. PriceColumns.date
+    start
+        Start date of the first window in string format: '2005-01-01'
+    end
+        No window goes past the end date, in string format: '2023-01-01'
+    window
+        The number of trading days of a window, train and test
+    step
+        The number of trading days from the start of a window to the start of the next window, at least the number of
+        test days so that the test days of the windows do not overlap
+    split
+        The fraction of the trading days of a window that are train days, the rest are test days
+
+    Returns
+    -------
+    [tuple]
+        The window id, train start, train end, test start and test end dates of each window
+    """
+    train_days = round(window * split)
+    if not 0 < train_days < window or step < 1:
+        raise ValueError('a window needs train and test days and a positive step')
+    # the test returns of the windows are compounded, which only holds when their test days do not overlap
+    if step < window - train_days:
+        raise ValueError('the step needs to be at least the number of test days of a window: ' + str(step))
+    first = int(dates.searchsorted(date.fromisoformat(start).isoformat().encode()))
+    # a back test places orders for the next trading day, so the last trading day is never the end of a window
+    last = min(int(dates.searchsorted(date.fromisoformat(end).isoformat().encode(), side='right')), len(dates) - 1)
+    return [(window_id, dates[day].decode(), dates[day + train_days - 1].decode(), dates[day + train_days].decode(),
+             dates[day + window - 1].decode())
+            for window_id, day in enumerate(range(first, last - window + 1, step))]
+
+
+def get_report(windows: [Window], train_days: int, test_days: int) -> WalkForwardReport:
+    """
+    Consolidates the windows of a walk forward.  The compounded test return reinvests through the test days of the
+    windows one after the other, see get_windows for why they do not overlap.  The efficiency compares the returns per
+    trading day, the mean test return over test_days to the mean train return over train_days, since the train and
+    test days of a window differ in length.
+
+    Parameters
+    ----------
+    windows
+        The Window records
+    train_days, test_days
+        The number of trading days of the train and test dates of every window
+
+    Returns
+    -------
+    WalkForwardReport
+        The consolidated report
+    """
+    count = Decimal(max(len(windows), 1))
+    mean_train_return = sum(window.train_return for window in windows) / count
+    mean_test_return = sum(window.test_return for window in windows) / count
+    compounded = Decimal(1)
+    for window in windows:
+        compounded *= 1 + window.test_return
+    efficiency = None
+    if mean_train_return:
+        efficiency = (mean_test_return / test_days) / (mean_train_return / train_days)
+    return WalkForwardReport(windows, train_days, test_days, mean_train_return, mean_test_return, compounded - 1,
+                             sum(window.test_return > 0 for window in windows) / count, efficiency)
+
+
+def walk_forward(start: str, end: str, window: int, step: int, split: float = 0.75, engine: str = DECIMAL,
+                 workers: int = None, search: str = GRID, budget: Budget = None, space: dict = None, seed: int = None,
+                 objective: str = ENDING_TOTAL, starting_balance: int = 10000, calendar: str = None) -> WalkForwardReport:
+    """
+    Walks a strategy search forward through a date range: optimizes the strategy parameters on the train days of each
+    window and back tests the best strategy on the test days that follow.  The windows are optimized in parallel, each
+    worker process loads the pricing data once and reuses it, with the date index, for every window it optimizes.
+    Saves the windows to walk_forward.csv in the results folder and prints the consolidated report.
+
+    Parameters
+    ----------
+    start
+        Start date of the first window in string format: '2005-01-01'
+    end
+        No window goes past the end date, in string format: '2023-01-01'
+    window
+        The number of trading days of a window, train and test, e.g. 756 for about 3 years
+    step
+        The number of trading days from the start of a window to the start of the next window, e.g. 252 for a year,
+        at least the number of test days of a window
+    split
+        The fraction of the trading days of a window that are train days, the rest are test days
+    engine
+        The BackTest engine, one of ['decimal', 'multi', 'vector', 'fixed']
+    workers
+        The number of worker processes, defaults to the number of CPUs; 1 optimizes the windows in this process
+    search
+        How the values are searched on each window, see find_optimal_strategy
+    budget
+        The Budget of the search of each window, unlimited by default
+    space
+        The values of each strategy parameter, defaults to SPACE
+    seed
+        The seed of the random searches
+    objective
+        What is maximized, one of ['ending_total', 'max_total'].  The returns of the windows are the objective over
+        the starting balance, so the performance metrics of optimize.get_score, which are not balances, are not
+        objectives of a walk forward
+    starting_balance
+        The starting balance of every back test
+    calendar
+        The symbol whose trading days the windows are counted in, defaults to the first symbol of the space
+
+    Returns
+    -------
+    WalkForwardReport
+        The consolidated report
+    """
+    if objective not in (ENDING_TOTAL, MAX_TOTAL):
+        raise ValueError('the objective of a walk forward is a balance, ending_total or max_total: ' + objective)
+    space = space or SPACE
+    dao = Dao()
+    windows = get_windows(dao.get_price_columns(calendar or space['symbol'][0]).date, start, end, window, step, split)
+    run_window = partial(_run_window, search=search, space=space, seed=seed, budget=budget, objective=objective)
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        _init_worker(starting_balance, engine)
+        results = list(map(run_window, windows))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(windows), 1)), initializer=_init_worker,
+                                 initargs=(starting_balance, engine)) as executor:
+            results = list(executor.map(run_window, windows))
+
+    dao._write_to_csv('walk_forward', results)
+    dao.close()
+    train_days = round(window * split)
+    report = get_report(results, train_days, window - train_days)
+    print('windows:', len(results), 'mean train return:', report.mean_train_return, 'mean test return:',
+          report.mean_test_return, 'compounded test return:', report.compounded_test_return, 'positive windows:',
+          report.positive_windows, 'efficiency:', report.efficiency)
+    return report
+
+
+if __name__ == '__main__':
+    walk_forward('2005-01-01', '2023-01-01', window=756, step=252, split=2 / 3, engine=VECTOR)
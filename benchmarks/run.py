@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'algofin', 'src'))
+
+from suite import BENCHMARKS  # noqa: E402
+from synthetic import SYMBOL, write_prices  # noqa: E402
+
+# specify constants
+BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+BARS = [10000, 100000]
+REPEAT = 3
+THRESHOLD = 1.5
+"""
+A benchmark regresses when its best time is more than THRESHOLD times its baseline, the timings of a shared machine
+vary by tens of percent from run to run
+"""
+PRICING_DATA = ['QQQ.csv', 'RITM.csv']
+
+
+def get_key(name: str, bars: int = None) -> str:
+    """
+    Gets the key of a timing in the baselines
+
+    Parameters
+    ----------
+    name
+        The name of the benchmark
+    bars
+        The number of bars of the synthetic series, None for a benchmark over the real pricing data
+
+    Returns
+    -------
+    str
+        e.g. 'load_pricing_cold[10000]'
+    """
+    return name if bars is None else f'{name}[{bars}]'
+
+
+def compare(timings: dict, baselines: dict, threshold: float = THRESHOLD) -> dict:
+    """
+    Compares timings with their baselines
+
+    Parameters
+    ----------
+    timings
+        The best time in seconds of each benchmark key
+    baselines
+        The baseline time in seconds of each benchmark key
+    threshold
+        The max ratio of a timing to its baseline
+
+    Returns
+    -------
+    dict
+        The ratio of each timing to its baseline, and whether it regressed: {key: (ratio, regressed)}, None for the
+        ratio of a timing without a baseline
+    """
+    ratios = dict()
+    for key, seconds in timings.items():
+        baseline = baselines.get(key)
+        ratio = seconds / baseline if baseline else None
+        ratios[key] = (ratio, ratio is not None and ratio > threshold)
+    return ratios
+
+
+def time_benchmark(benchmark, bars: int, repeat: int) -> float:
+    """
+    Times a benchmark in the current folder, the results folder is emptied before every run
+
+    Parameters
+    ----------
+    benchmark
+        The Benchmark
+    bars
+        The number of bars of the synthetic series
+    repeat
+        The number of runs
+
+    Returns
+    -------
+    float
+        The best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        shutil.rmtree('algofin/results', ignore_errors=True)
+        os.makedirs('algofin/results')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            value = benchmark.setup(bars) if benchmark.setup else None
+            start = time.perf_counter()
+            benchmark.run(bars, value)
+            seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def run(bars: [int], repeat: int, pattern: str = '') -> dict:
+    """
+    Times the benchmarks of the suite in a scratch copy of the pricing data, with a synthetic series of each size
+
+    Parameters
+    ----------
+    bars
+        The numbers of bars of the synthetic series, e.g. [10000, 100000, 1000000]
+    repeat
+        The number of runs of each benchmark, the best is kept
+    pattern
+        Only run the benchmarks whose name contains it
+
+    Returns
+    -------
+    dict
+        The best time in seconds of each benchmark key, see get_key
+    """
+    timings = dict()
+    with _workspace():
+        for size in [None] + bars:
+            if size is not None:
+                write_prices(f'algofin/pricing_data/{SYMBOL}.csv', size)
+            for benchmark in BENCHMARKS:
+                if pattern in benchmark.name and benchmark.sized == (size is not None):
+                    timings[get_key(benchmark.name, size)] = _time(benchmark, size, repeat)
+    return {key: seconds for key, seconds in timings.items() if seconds is not None}
+
+
+@contextlib.contextmanager
+def _workspace():
+    # the Dao reads and writes relative to the current folder, so the benchmarks run in a scratch copy of the repo
+    # folders that is removed afterwards
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        os.makedirs(workspace + '/algofin/pricing_data')
+        for name in PRICING_DATA:
+            shutil.copy(os.path.join(ROOT, 'algofin', 'pricing_data', name), workspace + '/algofin/pricing_data')
+        os.chdir(workspace)
+        try:
+            yield workspace
+        finally:
+            os.chdir(cwd)
+
+
+def _time(benchmark, bars: int, repeat: int) -> float:
+    try:
+        seconds = time_benchmark(benchmark, bars, repeat)
+    except ImportError as e:
+        # an optional dependency that is not installed, e.g. pyarrow
+        print(f'{get_key(benchmark.name, bars):40} skipped: {e}')
+        return None
+    print(f'{get_key(benchmark.name, bars):40} {seconds:10.4f}s')
+    return seconds
+
+
+def load_baselines(path: str = BASELINES) -> dict:
+    if not os.path.exists(path):
+        return dict()
+    with open(path) as f:
+        return json.load(f)['timings']
+
+
+def save_baselines(timings: dict, path: str = BASELINES) -> None:
+    # the new timings replace the baselines of the same keys, the other baselines are kept
+    baselines = load_baselines(path)
+    baselines.update(timings)
+    with open(path, 'w') as f:
+        json.dump({'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count(),
+                   'python': platform.python_version(), 'timings': dict(sorted(baselines.items()))}, f, indent=2)
+        f.write('\n')
+
+
+def main(argv: [str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Times the back test engines, the Dao and the optimizer and '
+                                                 'compares the timings with the stored baselines')
+    parser.add_argument('--bars', type=int, nargs='+', default=BARS,
+                        help='the numbers of bars of the synthetic series, e.g. 10000 100000 1000000')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='the number of runs of each benchmark')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose name contains it')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='the max ratio of a timing to its baseline')
+    parser.add_argument('--save', action='store_true', help='stores the timings as the new baselines')
+    args = parser.parse_args(argv)
+
+    timings = run(args.bars, args.repeat, args.filter)
+    if args.save:
+        save_baselines(timings)
+        return 0
+    regressions = 0
+    print(f'\n{"benchmark":40} {"seconds":>10} {"baseline":>10} {"ratio":>7}')
+    baselines = load_baselines()
+    for key, (ratio, regressed) in compare(timings, baselines, args.threshold).items():
+        baseline = f'{baselines[key]:10.4f}' if ratio is not None else f'{"-":>10}'
+        status = f'{ratio:7.2f}' if ratio is not None else f'{"-":>7}'
+        print(f'{key:40} {timings[key]:10.4f} {baseline} {status}' + ('  REGRESSION' if regressed else ''))
+        regressions += regressed
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import glob
+import os
+from collections import namedtuple
+from functools import lru_cache
+from decimal import Decimal
+from dao import Dao, CSV, PARQUET, SQLITE
+from objects import Balance, Strategy
+from optimize import find_optimal_strategy
+from strategies import LIMIT
+from trading import BackTest, DECIMAL, VECTOR
+from synthetic import SYMBOL, FIRST_DATE, get_dates
+
+# specify constants
+# the full range of the QQQ pricing data, the last trading days are left for the orders placed on the end date
+QQQ_START = '1999-01-01'
+QQQ_END = '2023-06-01'
+# 8 strategies of the optimize grid, over the synthetic series
+GRID_SPACE = {
+    'symbol': [SYMBOL],
+    'order_amount_ratio': [Decimal('0.10'), Decimal('0.20')],
+    'buy_offset': [Decimal('0.95'), Decimal('0.99')],
+    'sell_offset': [Decimal('1.02'), Decimal('1.05')],
+    'order_duration': [10],
+}
+
+Benchmark = namedtuple('Benchmark', ['name', 'run', 'setup', 'sized'])
+"""
+A timed operation of the suite
+
+Parameters
+----------
+- name: the name of the benchmark, e.g. 'load_pricing_cold'
+- run: the timed function, called with the number of bars of the synthetic series and the value returned by setup
+- setup: the untimed function called before every run with the number of bars, or None
+- sized: whether the benchmark runs over the synthetic series, so it is timed for every number of bars; the others
+    run over the real pricing data once
+
+Returns
+-------
+Benchmark
+    The benchmark
+"""
+BENCHMARKS = []
+
+
+def benchmark(sized: bool = True, setup=None):
+    """
+    Adds a function to the suite, in the order of the suite
+
+    Parameters
+    ----------
+    sized
+        See Benchmark
+    setup
+        See Benchmark
+
+    Returns
+    -------
+    function
+        The decorator
+    """
+    def add(run):
+        BENCHMARKS.append(Benchmark(run.__name__, run, setup, sized))
+        return run
+    return add
+
+
+def _strategy(symbol: str, start_date: str, end_date: str) -> Strategy:
+    return Strategy(strategy_id=1, strategy_name='benchmark', description='limit buy offset down; limit sell offset up',
+                    buy_offset=Decimal('0.95'), sell_offset=Decimal('1.05'), trade_type=LIMIT, order_duration=10,
+                    order_amount_ratio=Decimal('0.10'), symbol=symbol, start_date=start_date, end_date=end_date)
+
+
+@lru_cache
+def _last_date(bars: int) -> str:
+    # the day before the last bar of the synthetic series, the orders placed on the end date open on the last bar
+    return str(get_dates(bars)[-2])
+
+
+def _remove_pricing_caches(bars: int) -> None:
+    for path in glob.glob('algofin/pricing_data/*.cache'):
+        os.remove(path)
+
+
+def _load_pricing_caches(bars: int) -> None:
+    Dao().load_all_pricing_data()
+
+
+def _back_test(bars: int) -> BackTest:
+    # the prices are loaded up front, so only the back test and its writes are timed
+    back_test = BackTest(engine=DECIMAL)
+    back_test.pricing_data.preload(back_test.symbols)
+    return back_test
+
+
+def _balances(bars: int) -> [Balance]:
+    return [Balance(strategy_id=1 + day // 1000, date=FIRST_DATE, order_balance=Decimal('1000.5'),
+                    cash_balance=Decimal('8999.123456'), invested_balance=Decimal(day), number_of_shares=day)
+            for day in range(bars)]
+
+
+def _write(backend: str, balances: [Balance]) -> None:
+    dao = Dao(backend=backend)
+    dao._write_to_csv('balances', balances)
+    dao.close()
+
+
+@benchmark(setup=_remove_pricing_caches)
+def load_pricing_cold(bars: int, _) -> None:
+    # parses the csv files and compiles their caches
+    Dao().load_all_pricing_data()
+
+
+@benchmark(setup=_load_pricing_caches)
+def load_pricing_warm(bars: int, _) -> None:
+    Dao().load_all_pricing_data()
+
+
+@benchmark(sized=False, setup=_back_test)
+def implement_qqq(bars: int, back_test: BackTest) -> None:
+    with back_test:
+        back_test.implement_(_strategy('QQQ', QQQ_START, QQQ_END))
+
+
+@benchmark(setup=_back_test)
+def implement_synthetic(bars: int, back_test: BackTest) -> None:
+    with back_test:
+        back_test.implement_(_strategy(SYMBOL, FIRST_DATE, _last_date(bars)))
+
+
+@benchmark(sized=False, setup=_back_test)
+def hard_coded_strategies(bars: int, back_test: BackTest) -> None:
+    with back_test:
+        back_test.implement_all_hard_coded_strategies()
+
+
+@benchmark()
+def optimize_grid(bars: int, _) -> None:
+    find_optimal_strategy(FIRST_DATE, _last_date(bars), space=GRID_SPACE)
+
+
+@benchmark()
+def optimize_grid_vector(bars: int, _) -> None:
+    find_optimal_strategy(FIRST_DATE, _last_date(bars), engine=VECTOR, space=GRID_SPACE)
+
+
+@benchmark(setup=_balances)
+def write_results_csv(bars: int, balances: [Balance]) -> None:
+    # a balance record per bar
+    _write(CSV, balances)
+
+
+@benchmark(setup=_balances)
+def write_results_sqlite(bars: int, balances: [Balance]) -> None:
+    _write(SQLITE, balances)
+
+
+@benchmark(setup=_balances)
+def write_results_parquet(bars: int, balances: [Balance]) -> None:
+    _write(PARQUET, balances)
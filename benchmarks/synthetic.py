@@ -0,0 +1,87 @@
+import numpy as np
+
+# specify constants
+SYMBOL = 'SYN'
+FIRST_DATE = '1900-01-01'
+STARTING_PRICE = 100
+VOLATILITY = 0.015
+REVERSION = 0.002
+"""
+The log price is a mean reverting random walk around the starting price, so a series of a million bars neither
+collapses to zero nor overflows the fixed engine, and it keeps crossing the limit prices of the strategies
+"""
+
+
+def get_dates(bars: int) -> np.ndarray:
+    """
+    Gets the dates of a synthetic pricing series, one per weekday from FIRST_DATE
+
+    Parameters
+    ----------
+    bars
+        The number of trading days
+
+    Returns
+    -------
+    np.ndarray
+        The iso dates, e.g. '1900-01-01'
+    """
+    return np.datetime_as_string(np.busday_offset(np.datetime64(FIRST_DATE), np.arange(bars), roll='forward'), unit='D')
+
+
+def get_prices(bars: int, seed: int = 0) -> (np.ndarray, np.ndarray):
+    """
+    Generates a synthetic daily pricing series, one bar per weekday from FIRST_DATE
+
+    Parameters
+    ----------
+    bars
+        The number of trading days, e.g. 10000 or 1000000
+    seed
+        The seed of the random walk, the same seed gives the same series
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        The iso dates
+        The open, high, low and close prices, shape (bars, 4), rounded to 6 decimal places like the csv files
+    """
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, VOLATILITY, (bars, 2))
+    log_prices = np.empty(bars)
+    log_price = 0.0
+    for day, shock in enumerate(shocks[:, 0].tolist()):
+        log_price += shock - REVERSION * log_price
+        log_prices[day] = log_price
+    closes = STARTING_PRICE * np.exp(log_prices)
+    opens = np.concatenate(([STARTING_PRICE], closes[:-1])) * np.exp(shocks[:, 1] / 4)
+    spreads = 1 + np.abs(rng.normal(0, VOLATILITY / 2, (bars, 2)))
+    highs = np.maximum(opens, closes) * spreads[:, 0]
+    lows = np.minimum(opens, closes) / spreads[:, 1]
+    return get_dates(bars), np.round(np.stack((opens, highs, lows, closes), axis=1), 6)
+
+
+def write_prices(path: str, bars: int, symbol: str = SYMBOL, seed: int = 0) -> None:
+    """
+    Writes a synthetic pricing csv file in the format of the ../pricing_data folder
+
+    Parameters
+    ----------
+    path
+        The csv file, e.g. 'algofin/pricing_data/SYN.csv'
+    bars
+        The number of trading days
+    symbol
+        The stock symbol of the rows
+    seed
+        The seed of the random walk
+
+    Returns
+    -------
+    None
+    """
+    dates, prices = get_prices(bars, seed)
+    with open(path, 'w', newline='') as f:
+        f.write('Symbol,Date,Open,High,Low,Close\n')
+        f.writelines('%s,%s,%.6f,%.6f,%.6f,%.6f\n' % (symbol, date, *row)
+                     for date, row in zip(dates.tolist(), prices.tolist()))
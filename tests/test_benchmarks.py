@@ -0,0 +1,23 @@
+import numpy as np
+from ..algofin.src.price_cache import PriceCache
+from ..benchmarks.synthetic import get_prices, write_prices
+
+
+def test_it_generates_the_same_synthetic_series_for_a_seed():
+    dates, prices = get_prices(1000, seed=1)
+    same_dates, same_prices = get_prices(1000, seed=1)
+    assert (dates == same_dates).all() and (prices == same_prices).all()
+    assert not (prices == get_prices(1000, seed=2)[1]).all()
+    assert dates[:3].tolist() == ['1900-01-01', '1900-01-02', '1900-01-03'] and dates[5] == '1900-01-08'
+    opens, highs, lows, closes = prices.T
+    assert (highs >= np.maximum(opens, closes)).all() and (lows <= np.minimum(opens, closes)).all()
+    assert (lows > 0).all()
+
+
+def test_it_writes_a_synthetic_series_in_the_pricing_data_format(tmp_path):
+    path = str(tmp_path / 'SYN.csv')
+    write_prices(path, 100)
+    dates, prices = get_prices(100)
+    columns = PriceCache(path).load(lambda csv_path: [row.split(',') for row in open(csv_path).read().split()[1:]])
+    assert columns.date.astype(str).tolist() == dates.tolist()
+    assert np.array_equal(np.stack((columns.open, columns.high, columns.low, columns.close), axis=1), prices)
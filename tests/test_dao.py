@@ -11,11 +11,11 @@ def test_it_gets_all_symbols():
 def test_it_loads_a_pricing_file():
     prices = Dao()._get_prices('RITM')
     assert len(prices) == 2544
-    assert len(prices[0]) == 6
+    assert len(prices[0]) == 7
     assert prices[0] == Price(symbol='RITM', date='2013-05-02', open=Decimal('14.0'), high=Decimal('14.0'),
-                              low=Decimal('13.0'), close=Decimal('13.52'))
+                              low=Decimal('13.0'), close=Decimal('13.52'), day_index=0)
     assert prices[-1] == Price(symbol='RITM', date='2023-06-08', open=Decimal('8.88'), high=Decimal('8.96'),
-                               low=Decimal('8.81'), close=Decimal('8.92'))
+                               low=Decimal('8.81'), close=Decimal('8.92'), day_index=2543)
 
 
 def test_it_loads_all_pricing_data():
@@ -0,0 +1,31 @@
+import numpy as np
+from decimal import Decimal
+from ..algofin.src.fixed import FixedVectorBackTest, to_fixed, _divide
+from ..algofin.src.parity import parity_report
+from ..algofin.src.strategies import Strategies
+from ..algofin.src.trading import BackTest, FIXED
+
+
+def test_it_rounds_half_to_even():
+    assert to_fixed(Decimal('0.995')) == 995000
+    assert to_fixed(Decimal('1.0000005')) == 1000000
+    assert to_fixed(Decimal('1.0000015')) == 1000002
+    assert _divide(np.array([15, 25, 26, 34]), 10).tolist() == [2, 2, 3, 3]
+    assert FixedVectorBackTest.decimal(np.int64(245631988309)) == Decimal('245631.988309')
+
+
+def test_it_matches_the_decimal_engine_within_the_limit_price_rounding():
+    report = parity_report(Strategies.get_strategies(), FIXED)
+    assert [parity.strategy_id for parity in report] == list(range(1, 9))
+    for parity in report:
+        assert parity.ending_error < Decimal('1e-8')
+        assert parity.max_error < Decimal('1e-8')
+
+
+def test_it_finds_the_same_strategy_as_the_decimal_engine():
+    back_test = BackTest(engine=FIXED)
+    back_test.implement_all_hard_coded_strategies()
+    strategy_id, ending_balance, balance = back_test.get_max_strategy_ending_balance()
+    assert strategy_id == 1
+    assert ending_balance == Decimal('245631.988309')
+    assert balance.number_of_shares == 732
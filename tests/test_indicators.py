@@ -0,0 +1,105 @@
+import os
+import shutil
+from decimal import Decimal
+import numpy as np
+import pytest
+from ..algofin.src.dao import Dao
+from ..algofin.src.indicators import Indicator, IndicatorCache, IndicatorSeries, Sma, Ema, Atr, Rsi, Bollinger
+from ..algofin.src.objects import OrderRequest
+from ..algofin.src.pricing import PricingData
+from ..algofin.src.rules import StrategyType
+from ..algofin.src.trading import BackTest
+
+INDICATORS = [Sma(20), Ema(12), Atr(14), Rsi(14), Bollinger(20)]
+
+
+def _head(columns, days):
+    return columns._replace(**{name: getattr(columns, name)[..., :days] for name in columns._fields})
+
+
+def test_it_computes_the_indicators():
+    columns = BackTest().pricing_data.columns('QQQ')
+    close = np.asarray(columns.close)
+    sma = Sma(20).compute(columns)[0][:, 0]
+    assert np.isnan(sma[:19]).all()
+    assert np.allclose(sma[19:], np.lib.stride_tricks.sliding_window_view(close, 20).mean(axis=1))
+    middle, upper, lower = Bollinger(20, 2).compute(columns)[0][100]
+    assert middle == pytest.approx(sma[100]) and upper - middle == pytest.approx(2 * close[81:101].std())
+    ema = Ema(12).compute(columns)[0][:, 0]
+    assert ema[11] == pytest.approx(close[:12].mean()) and ema[12] == pytest.approx(ema[11] + (close[12] - ema[11]) / 6.5)
+    rsi = Rsi(14).compute(columns)[0][:, 0]
+    assert np.isnan(rsi[:14]).all() and ((rsi[14:] >= 0) & (rsi[14:] <= 100)).all()
+    atr = Atr(14).compute(columns)[0][:, 0]
+    assert atr[13] == pytest.approx(np.mean([columns.high[0] - columns.low[0]] + [
+        max(columns.high[i], columns.close[i - 1]) - min(columns.low[i], columns.close[i - 1]) for i in range(1, 14)]))
+
+
+def test_it_only_creates_complete_indicators():
+    class Incomplete(Indicator):
+        def compute(self, columns):
+            return np.full((len(columns.close), 1), np.nan), None
+
+    with pytest.raises(TypeError):
+        Incomplete(20)
+
+
+def test_it_updates_the_indicators_a_trading_day_at_a_time():
+    back_test = BackTest()
+    columns, prices = back_test.pricing_data.columns('QQQ'), back_test.pricing_data['QQQ']
+    cache = IndicatorCache(back_test.pricing_data)
+    for indicator in INDICATORS:
+        series = cache.get('QQQ', indicator)
+        assert cache.get('QQQ', indicator) is series
+        for days in [0, 5, 3000]:
+            head = _head(columns, days)
+            values, state = indicator.compute(head)
+            updated = IndicatorSeries(indicator, values, state, None, None)
+            for price in prices[days:]:
+                updated.append(price)
+            assert np.allclose(updated.values, series.values, rtol=1e-9, equal_nan=True)
+        assert series[5000] == pytest.approx(updated[5000])
+    assert cache.computed == len(INDICATORS)
+
+
+def test_it_extends_the_saved_indicators_when_the_pricing_data_grows(tmp_path, monkeypatch):
+    source = os.path.abspath('algofin/pricing_data/QQQ.csv')
+    with open(source) as f:
+        lines = f.readlines()
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('algofin/pricing_data')
+    with open('algofin/pricing_data/QQQ.csv', 'w') as f:
+        f.writelines(lines[:3001])
+    cache = IndicatorCache(PricingData(Dao()), str(tmp_path / 'indicators'))
+    assert len(cache.get('QQQ', Atr(20))) == 3000
+
+    with open('algofin/pricing_data/QQQ.csv', 'a') as f:
+        f.writelines(lines[3001:])
+    extended = IndicatorCache(PricingData(Dao()), str(tmp_path / 'indicators'))
+    series = extended.get('QQQ', Atr(20))
+    assert (extended.computed, extended.extended) == (0, 1)
+    assert np.allclose(series.values, Atr(20).compute(extended.pricing_data.columns('QQQ'))[0], equal_nan=True)
+    saved = IndicatorCache(extended.pricing_data, str(tmp_path / 'indicators'))
+    assert len(saved.get('QQQ', Atr(20))) == len(series) and saved.computed == 0
+    shutil.rmtree('algofin/results', ignore_errors=True)
+
+
+class AtrBand(StrategyType):
+    # a limit buy at the closing price less the 20 day ATR, read by every strategy of the type
+    def on_bar(self, strategy, prices, trading_day, account, starting_balance, indicators):
+        atr = indicators.get(strategy.symbol, Atr(20))[trading_day]
+        if np.isnan(atr) or account.cash_balance < 1000:
+            return []
+        price = prices[trading_day].close - Decimal(str(round(atr, 2)))
+        return [OrderRequest('buy', int(1000 / price), price)]
+
+    def on_fill(self, strategy, order, trade):
+        return [OrderRequest('sell', trade.number_of_shares, trade.price * Decimal('1.05'))]
+
+
+def test_it_computes_an_indicator_once_for_the_strategies_that_read_it():
+    back_test = BackTest(strategy_types={'atr band': AtrBand()})
+    strategies = [strategy._replace(strategy_id=i, trade_type='atr band', start_date='2015-01-01',
+                                    end_date='2016-01-01') for i, strategy in enumerate(back_test.strategies[:3])]
+    results = [back_test._simulate_(strategy) for strategy in strategies]
+    assert all(trades for _, trades, _, _ in results)
+    assert back_test.indicators.computed == 1
@@ -0,0 +1,38 @@
+import json
+import os
+from ..algofin.src.dao import PROFILE, PROFILE_STATS
+from ..algofin.src.instrumentation import Instrumentation
+from ..algofin.src.trading import BackTest
+
+
+def test_it_profiles_each_strategy_without_changing_the_results():
+    back_test = BackTest()
+    back_test.implement_all_hard_coded_strategies()
+    instrumentation = Instrumentation()
+    with BackTest(instrumentation=instrumentation) as instrumented_back_test:
+        instrumented_back_test.dao.now += '_instrumented'
+        instrumented_back_test.implement_all_hard_coded_strategies()
+    assert instrumented_back_test.results.summaries == back_test.results.summaries
+    profiles = instrumentation.strategies
+    assert [profile.strategy_id for profile in profiles] == list(range(1, 9))
+    # the starting balance record is not recorded by the engine
+    assert profiles[0].balance_records == len(back_test.dao.get_balances(1)) - 1
+    assert sum(profile.fills for profile in profiles) == len(back_test.dao._read_csv(
+        'algofin/results/' + back_test.dao.now + '/trades.csv', list))
+    run = instrumentation.summary()
+    assert run.strategies == 8 and run.days == sum(profile.days for profile in profiles)
+    assert 0 < run.sell_fills + run.buy_fills + run.sell_expiry + run.buy_expiry + run.new_order < run.simulate
+    assert run.load > 0 and run.write > 0
+    with open('algofin/results/' + instrumented_back_test.dao.now + '/' + PROFILE) as f:
+        assert json.load(f)['run'] == run._asdict()
+
+
+def test_it_only_instruments_when_asked():
+    back_test = BackTest()
+    assert '_run_' not in vars(back_test) and 'close' not in vars(back_test.dao)
+    instrumentation = Instrumentation(profile=True)
+    with BackTest(instrumentation=instrumentation) as profiled_back_test:
+        profiled_back_test.dao.now += '_profiled'
+        profiled_back_test.implement_(profiled_back_test.strategies[0])
+    assert os.path.exists('algofin/results/' + profiled_back_test.dao.now + '/' + PROFILE_STATS)
+    assert '_run_' in instrumentation.stats()
@@ -0,0 +1,41 @@
+from decimal import Decimal
+from ..algofin.src.ledger import Ledger, FULL, END_OF_DAY, SUMMARY
+from ..algofin.src.objects import Balance
+from ..algofin.src.results import Results
+
+STARTING_BALANCE = Balance(1, '2023-04-10', Decimal(0), Decimal(10000), Decimal(0), 0)
+DAYS = [[('2023-04-10', Decimal(0), Decimal(10000), Decimal(0), 0),
+         ('2023-04-11', Decimal(1000), Decimal(9000), Decimal(0), 0)],
+        [('2023-04-11', Decimal(0), Decimal(9000), Decimal(1500), 10)],
+        [('2023-04-12', Decimal(0), Decimal(9000), Decimal(800), 10),
+         ('2023-04-13', Decimal(500), Decimal(8500), Decimal(800), 10)]]
+
+
+def _back_test(history):
+    ledger = Ledger(1, STARTING_BALANCE, history)
+    for day in DAYS:
+        for record in day:
+            ledger.record(*record)
+        ledger.end_of_day()
+    return ledger.balances(), ledger.summary
+
+
+def test_it_summarizes_every_balance_record_in_every_mode():
+    balances, summary = _back_test(FULL)
+    results = Results()
+    results.add_balances(balances)
+    assert len(balances) == 6
+    # the metrics need the trading days and the trades, which the balance records do not have
+    assert results.summaries[1].metrics is None
+    results.summaries[1].metrics = summary.metrics
+    assert summary == results.summaries[1]
+    assert summary.max_total == Decimal(10500)
+    assert summary.max_drawdown == Decimal(700) / Decimal(10500)
+    assert _back_test(END_OF_DAY)[1] == summary
+    assert _back_test(SUMMARY)[1] == summary
+
+
+def test_it_keeps_the_balance_records_of_the_history_mode():
+    balances, summary = _back_test(FULL)
+    assert _back_test(END_OF_DAY)[0] == [balances[0], balances[2], balances[3], balances[5]]
+    assert _back_test(SUMMARY)[0] == [balances[3], balances[5]]
@@ -0,0 +1,51 @@
+import logging
+from ..algofin.src.logs import LOGGER, RUN_LOG, ProgressReporter
+from ..algofin.src.trading import BackTest
+
+
+def test_it_logs_a_run_to_its_results_folder_only_when_asked(capsys):
+    level = logging.getLogger(LOGGER).level
+    back_test = BackTest(log_level=logging.DEBUG)
+    back_test.dao.now += '_logged'
+    with back_test:
+        back_test.implement_(back_test.strategies[0])
+    with open('algofin/results/' + back_test.dao.now + '/' + RUN_LOG) as f:
+        log = f.read()
+    # the messages logged before the results folder was known are kept for the log file
+    assert log.index(' now: ') < log.index(' symbols: ') < log.index(' writing rows to csv: ')
+    assert back_test.dao.log is None and not logging.getLogger(LOGGER).handlers
+    # the algofin loggers build no debug message once the run is closed
+    assert logging.getLogger(LOGGER).level == level
+    BackTest().implement_(back_test.strategies[0])
+    assert capsys.readouterr().out == ''
+
+
+def test_it_only_logs_the_messages_of_its_own_run():
+    first, second = BackTest(log_level=logging.DEBUG), BackTest(log_level=logging.INFO)
+    first.dao.now += '_first'
+    second.dao.now += '_second'
+    first.implement_(first.strategies[0])
+    second.implement_(second.strategies[0])
+    first.close()
+    assert logging.getLogger(LOGGER).level == logging.INFO
+    second.close()
+    logs = []
+    for back_test in (first, second):
+        with open('algofin/results/' + back_test.dao.now + '/' + RUN_LOG) as f:
+            logs.append(f.read())
+    assert first.dao.now + '/' in logs[0] and second.dao.now not in logs[0]
+    assert ' now: ' in logs[1] and ' DEBUG ' not in logs[1] and first.dao.now not in logs[1]
+
+
+def test_it_reports_the_progress_of_a_sweep(caplog):
+    reporter = ProgressReporter(total=10, workers=2, interval=3600)
+    reporter.started -= 4
+    with caplog.at_level(logging.INFO, LOGGER):
+        progress = reporter.update(5, 2.0)
+        assert progress.done == 5 and 1 < progress.strategies_per_second < 1.25
+        assert 4 < progress.eta < 5 and 0.2 < progress.utilization < 0.25
+        # within the interval nothing is logged until the sweep is done
+        assert not caplog.records
+        reporter.update(5, 2.0)
+    assert caplog.records[0].progress.done == 10 and caplog.records[0].progress.eta == 0
+    assert caplog.records[0].getMessage().startswith('10/10 strategies')
@@ -0,0 +1,73 @@
+import math
+import statistics
+from decimal import Decimal
+import pytest
+from ..algofin.src.ledger import Ledger, SUMMARY
+from ..algofin.src.metrics import SHARPE, MAX_DRAWDOWN_DAYS
+from ..algofin.src.objects import Balance, Order
+from ..algofin.src.optimize import Search, GridSearch
+from ..algofin.src.strategies import HOLD
+from ..algofin.src.trading import BackTest, VECTOR
+
+STARTING_BALANCE = Balance(1, '2023-01-02', Decimal(0), Decimal(10000), Decimal(0), 0)
+# the date, total balance and number of shares at the end of each trading day
+DAYS = [('2023-01-03', Decimal(10000), 0), ('2023-01-04', Decimal(10200), 10), ('2023-01-05', Decimal(9900), 10),
+        ('2023-01-06', Decimal(9800), 5), ('2023-01-09', Decimal(10300), 0), ('2023-01-10', Decimal(10300), 0)]
+# the buy_sell, number of shares and total of the trades of each trading day
+TRADES = {1: [('buy', 10, Decimal(1000))], 3: [('sell', 5, Decimal(550))], 4: [('sell', 5, Decimal(450))]}
+SPACE = {'symbol': ['QQQ'], 'order_amount_ratio': [Decimal('0.1'), Decimal('0.2')],
+         'buy_offset': [Decimal('0.95'), Decimal('0.99')], 'sell_offset': [Decimal('1.02'), Decimal('1.05')],
+         'order_duration': [10]}
+
+
+def _order(buy_sell, number_of_shares):
+    return Order(order_id=1, strategy_id=1, symbol='QQQ', number_of_shares=number_of_shares, buy_sell=buy_sell,
+                 trade_type='limit', open_date=None, close_date=None, price=None, total=None, active=False)
+
+
+def test_it_matches_the_metrics_of_the_full_history():
+    ledger = Ledger(1, STARTING_BALANCE, SUMMARY)
+    for day, (date, total, number_of_shares) in enumerate(DAYS):
+        ledger.record(date, Decimal(0), total, Decimal(0), number_of_shares)
+        for buy_sell, number_of_shares, trade_total in TRADES.get(day, []):
+            ledger.trade(_order(buy_sell, number_of_shares), trade_total)
+        ledger.end_of_day()
+    metrics = ledger.summary.metrics
+
+    totals = [STARTING_BALANCE.cash_balance] + [total for _, total, _ in DAYS]
+    returns = [float(b / a) - 1 for a, b in zip(totals, totals[1:])]
+    downside = math.sqrt(sum(min(r, 0) ** 2 for r in returns) / len(returns))
+    assert metrics.sharpe == pytest.approx(statistics.mean(returns) / statistics.stdev(returns) * math.sqrt(252))
+    assert metrics.sortino == pytest.approx(statistics.mean(returns) / downside * math.sqrt(252))
+    assert metrics.max_drawdown_days == 2
+    assert metrics.cagr == pytest.approx(1.03 ** (365.25 / 8) - 1)
+    assert metrics.win_rate == 0.5
+    assert metrics.average_trade_return == pytest.approx(0.0)
+    assert metrics.exposure == 0.5
+    assert metrics.turnover == pytest.approx(1000 / float(statistics.mean(totals[1:])))
+
+
+def test_it_ranks_the_strategies_by_any_metric():
+    search = Search(BackTest(), '2010-01-01', '2012-01-01', objective=SHARPE, batch_size=4)
+    strategy, score = GridSearch(SPACE).run(search)
+    summaries = search.back_test.results.summaries
+    assert len(summaries) == 8
+    assert score == max(summary.metrics.sharpe for summary in summaries.values())
+    assert summaries[strategy.strategy_id].metrics.sharpe == score
+
+    search = Search(BackTest(), '2010-01-01', '2012-01-01', objective=MAX_DRAWDOWN_DAYS, batch_size=4)
+    strategy, score = GridSearch(SPACE).run(search)
+    summaries = search.back_test.results.summaries
+    assert -score == min(summary.metrics.max_drawdown_days for summary in summaries.values())
+
+    with pytest.raises(ValueError):
+        GridSearch(SPACE).run(Search(BackTest(engine=VECTOR), '2010-01-01', '2012-01-01', objective=SHARPE))
+
+
+def test_it_has_no_closed_trades_when_holding():
+    back_test = BackTest()
+    strategy = next(strategy for strategy in back_test.strategies if strategy.trade_type == HOLD)
+    metrics = back_test._simulate_(strategy._replace(start_date='2015-01-01', end_date='2016-01-01'))[3].metrics
+    assert metrics.win_rate is None and metrics.average_trade_return is None
+    assert 0.9 < metrics.exposure <= 1
+    assert metrics.sharpe is not None and metrics.cagr is not None
@@ -0,0 +1,35 @@
+from decimal import Decimal
+from ..algofin.src.trading import BackTest
+
+
+def _strategies():
+    strategy = BackTest().strategies[0]
+    return [strategy._replace(strategy_id=i + 1, symbol=symbol, buy_offset=Decimal(buy_offset), order_duration=duration,
+                              start_date=start_date, end_date=end_date)
+            for i, (symbol, buy_offset, duration, start_date, end_date) in enumerate([
+                ('QQQ', '0.97', 3, '2010-01-01', '2011-06-01'), ('RITM', '0.95', 10, '2014-03-01', '2015-01-01'),
+                ('QQQ', '0.99', 1, '2010-06-05', '2010-09-01'), ('QQQ', '0.97', 3, '2011-01-01', '2010-01-01'),
+                ('QQQ', '0.995', 20, '2030-01-01', '2031-01-01')])]
+
+
+def test_it_simulates_the_strategies_of_a_symbol_the_same_as_one_at_a_time():
+    back_test = BackTest()
+    results = [back_test._simulate_(strategy) for strategy in _strategies()]
+    multi_back_test = BackTest(engine='multi')
+    multi_results = multi_back_test._simulate_multi_(_strategies())
+    assert (multi_back_test.order_id_offset, multi_back_test.trade_id_offset) == \
+        (back_test.order_id_offset, back_test.trade_id_offset)
+    for (orders, trades, balances, summary), (multi_orders, multi_trades, multi_balances, multi_summary) in \
+            zip(results, multi_results):
+        assert list(map(tuple, multi_orders)) == list(map(tuple, orders))
+        assert multi_trades == trades
+        assert multi_balances == balances
+        assert tuple(multi_summary) == tuple(summary)
+
+
+def test_it_finds_the_same_best_strategy():
+    back_test = BackTest(engine='multi', history='end_of_day')
+    back_test.implement_all_hard_coded_strategies()
+    strategy_id, ending_balance, balance = back_test.get_max_strategy_ending_balance()
+    assert strategy_id == 1
+    assert ending_balance.quantize(Decimal('.000001')) == Decimal('245631.988283')
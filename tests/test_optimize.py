@@ -0,0 +1,56 @@
+from decimal import Decimal
+from ..algofin.src.optimize import Budget, Search, GridSearch, RandomSearch, SuccessiveHalving, TPESearch
+from ..algofin.src.trading import BackTest, VECTOR
+
+SPACE = {'symbol': ['QQQ'], 'order_amount_ratio': [Decimal('0.1'), Decimal('0.2')],
+         'buy_offset': [Decimal('0.95'), Decimal('0.97'), Decimal('0.99')],
+         'sell_offset': [Decimal('1.02'), Decimal('1.05')], 'order_duration': [10]}
+
+
+def _search(budget=None):
+    return Search(BackTest(engine=VECTOR), '2010-01-01', '2012-01-01', budget, batch_size=4)
+
+
+def test_it_finds_the_best_strategy_of_the_grid():
+    search = _search()
+    strategy, score = GridSearch(SPACE).run(search)
+    summaries = search.back_test.results.summaries
+    assert len(summaries) == 12
+    assert score == max(summary.ending_total for summary in summaries.values())
+    assert summaries[strategy.strategy_id].ending_total == score
+    assert search.back_test.results.get_strategy(2).buy_offset == Decimal('0.95')
+
+
+def test_it_stays_within_the_budget_without_repeats():
+    for searcher in [RandomSearch(SPACE, seed=1), TPESearch(SPACE, seed=1, startup=4)]:
+        search = _search(Budget(backtests=7))
+        searcher.run(search)
+        strategies = search.back_test.results.strategies.values()
+        assert search.budget.spent == 7
+        assert len({(s.order_amount_ratio, s.buy_offset, s.sell_offset) for s in strategies}) == 7
+
+
+def test_it_promotes_the_best_candidates_to_the_full_date_range():
+    search = _search()
+    halving = SuccessiveHalving(SPACE, seed=1, candidates=9, eta=3, min_days=100)
+    assert halving._window_ends('2010-01-01', '2012-01-01', 9) == ['2010-04-11', '2010-09-01', '2012-01-01']
+    strategy, score = halving.run(search)
+    assert search.budget.spent == 9 + 3 + 1
+    assert (strategy.start_date, strategy.end_date) == ('2010-01-01', '2012-01-01')
+    assert search.back_test.results.summaries[strategy.strategy_id].ending_total == score
+
+
+def test_it_reuses_the_worker_processes_for_every_batch():
+    search = Search(BackTest(engine=VECTOR), '2010-01-01', '2012-01-01', workers=2, batch_size=4)
+    executors = []
+    evaluate = search.evaluate
+
+    def tracked(candidates, *args):
+        executors.append(search.sweep.executor)
+        return evaluate(candidates, *args)
+
+    search.evaluate = tracked
+    strategy, score = GridSearch(SPACE).run(search)
+    assert len(executors) == 3 and all(executor is executors[0] for executor in executors)
+    assert search.sweep is None
+    assert score == GridSearch(SPACE).run(_search())[1]
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from ..algofin.src.order_book import OrderBook, BUY, SELL
+from ..algofin.src.objects import Order
+
+
+def _order(order_id, buy_sell, close_date):
+    return Order(order_id=order_id, strategy_id=1, symbol='QQQ', number_of_shares=10, buy_sell=buy_sell,
+                 trade_type='limit', open_date=1, close_date=close_date, price=Decimal('10'),
+                 total=Decimal('100'), active=True)
+
+
+def test_it_indexes_active_orders_by_side_and_close_day():
+    book = OrderBook()
+    buy = _order(1, BUY, 5)
+    sell = _order(2, SELL, 5)
+    later_buy = _order(3, BUY, 6)
+    book.add(buy)
+    book.add(sell)
+    book.add(later_buy)
+    assert len(book) == 3
+    assert book.buys == [buy, later_buy]
+    assert book.sells == [sell]
+    assert book.expiring(5, BUY) == [buy]
+    assert book.expiring(5, SELL) == [sell]
+    assert book.expiring(4, BUY) == []
+
+
+def test_it_drops_inactive_orders_at_the_end_of_the_day():
+    book = OrderBook()
+    buy = _order(1, BUY, 5)
+    sell = _order(2, SELL, 7)
+    book.add(buy)
+    book.add(sell)
+    buy.active = False
+    book.end_of_day(5)
+    assert book.buys == []
+    assert book.sells == [sell]
+    assert book.expiring(5, BUY) == []
+    assert book.history == [buy, sell]
@@ -0,0 +1,39 @@
+import pytest
+from decimal import Decimal
+from ..algofin.src.objects import Balance, Order
+from ..algofin.src.parquet_sink import ParquetSink, read_parquet
+
+pytest.importorskip('pyarrow')
+
+
+def test_it_reads_back_the_records_of_one_strategy(tmp_path):
+    path = str(tmp_path / 'results')
+    balances = [Balance(1, '2023-04-10', 0, Decimal('10000'), 0, 0),
+                Balance(1, '2023-04-11', Decimal('9599.93112890'), Decimal('188.9756901150'), Decimal('0'), 0),
+                Balance(2, '2023-04-10', 0, Decimal('10000'), 0, 0)]
+    with ParquetSink(path, buffer_rows=2) as sink:
+        sink.write('balances', balances[:2])
+        sink.write('balances', balances[2:])
+    assert read_parquet(path, 'balances') == balances
+    assert read_parquet(path, 'balances', 2) == balances[2:]
+    assert read_parquet(path, 'balances', 1)[1].date == '2023-04-11'
+
+
+def test_it_reads_the_trades_of_a_strategy_by_its_orders(tmp_path):
+    path = str(tmp_path / 'results')
+    orders = [Order(order_id=order_id, strategy_id=strategy_id, symbol='QQQ', number_of_shares=10, buy_sell='buy',
+                    trade_type='limit', open_date='2023-04-10', close_date='2023-04-17', price=Decimal('10.5'),
+                    total=Decimal('105'), active=False) for order_id, strategy_id in [(1, 1), (2, 1), (3, 2)]]
+    with ParquetSink(path) as sink:
+        sink.write('orders', orders)
+    assert [tuple(order) for order in read_parquet(path, 'orders', 2)] == [tuple(orders[2])]
+    assert read_parquet(path, 'trades', 2) == []
+
+
+def test_it_keeps_the_large_balances(tmp_path):
+    path = str(tmp_path / 'results')
+    balances = [Balance(1, '2023-04-10', 0, Decimal('12345678901234567890.123456789012345678'),
+                        Decimal('10000000000.5'), 0)]
+    with ParquetSink(path) as sink:
+        sink.write('balances', balances)
+    assert read_parquet(path, 'balances') == balances
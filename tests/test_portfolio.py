@@ -0,0 +1,55 @@
+from collections import Counter
+from decimal import Decimal
+from ..algofin.src.portfolio import MergedPrices, PortfolioBackTest
+from ..algofin.src.trading import BackTest
+
+
+def test_it_aligns_the_prices_of_the_symbols_by_date():
+    back_test = BackTest()
+    merged = MergedPrices(back_test.pricing_data, ['QQQ', 'RITM'])
+    qqq, ritm = back_test.pricing_data['QQQ'], back_test.pricing_data['RITM']
+    assert merged.dates == sorted({price.date for price in qqq + ritm})
+    # RITM starts trading in 2013
+    first_day = merged.merged_days[1][0]
+    assert merged.dates[first_day] == ritm[0].date == '2013-05-02'
+    assert merged.trading_days[1][first_day - 1] == -1 and merged.trading_days[1][first_day] == 0
+    assert merged.prices[0][merged.trading_days[0][first_day]].date == '2013-05-02'
+
+
+def test_it_back_tests_the_strategies_out_of_one_account():
+    back_test = BackTest()
+    strategies = [back_test.strategies[1], back_test.strategies[4]]
+    assert [strategy.symbol for strategy in strategies] == ['QQQ', 'RITM']
+    orders, trades, balances, summary = PortfolioBackTest(back_test.pricing_data, strategies,
+                                                          Decimal(10000)).implement_()
+    assert {order.symbol for order in orders} == {'QQQ', 'RITM'}
+    orders = {order.order_id: order for order in orders}
+    cash, shares = Decimal(10000), Counter()
+    for trade in trades:
+        order = orders[trade.order_id]
+        sign = 1 if order.buy_sell == 'buy' else -1
+        cash -= sign * trade.total
+        shares[order.symbol] += sign * trade.number_of_shares
+    ending_balance = balances[-1]
+    assert ending_balance.cash_balance + ending_balance.order_balance == cash
+    assert ending_balance.number_of_shares == sum(shares.values())
+    assert min(balance.cash_balance for balance in balances) >= 0
+    assert [balance.date for balance in balances] == sorted(balance.date for balance in balances)
+    assert summary.ending_total == ending_balance.order_balance + ending_balance.cash_balance + \
+        ending_balance.invested_balance
+
+
+def test_it_allocates_from_a_shared_cash_pool():
+    back_test = BackTest()
+    all_in = [strategy._replace(order_amount_ratio=Decimal(1), start_date='2013-05-02')
+              for strategy in (back_test.strategies[1], back_test.strategies[4])]
+    back_test.dao.now += '_portfolio'
+    with back_test:
+        summary = back_test.implement_portfolio_(all_in, portfolio_id=100)
+    orders = back_test.dao._read_csv('algofin/results/' + back_test.dao.now + '/orders.csv', list)
+    # the first strategy takes all the cash it can, the second one only gets what is left
+    first, second = orders[:2]
+    assert (first[1], second[1]) == ('2', '5') and first[6] == second[6]
+    assert Decimal(second[9]) <= Decimal(10000) - Decimal(first[9]) < Decimal(first[8])
+    assert back_test.results.summaries[100] == summary
+    assert back_test.dao.get_balances(100)[-1] == summary.ending_balance
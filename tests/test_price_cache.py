@@ -0,0 +1,54 @@
+import os
+from ..algofin.src.price_cache import PriceCache
+
+
+def _write_csv(path, rows):
+    with open(path, 'w') as f:
+        f.write('Symbol,Date,Open,High,Low,Close\n')
+        f.writelines(row + '\n' for row in rows)
+
+
+def _read_csv(path):
+    with open(path) as f:
+        return [line.strip().split(',') for line in f.readlines()[1:]]
+
+
+def test_it_builds_and_memory_maps_the_cache(tmp_path):
+    csv_path = str(tmp_path / 'ABC.csv')
+    _write_csv(csv_path, ['ABC,2023-04-10,10.5,11.25,10.0,11.000000', 'ABC,2023-04-11,11.0,12.0,10.75,11.5'])
+    columns = PriceCache(csv_path).load(_read_csv)
+    assert os.path.exists(str(tmp_path / 'ABC.cache'))
+    assert columns.date.tolist() == [b'2023-04-10', b'2023-04-11']
+    assert columns.close.tolist() == [11.0, 11.5]
+    assert columns.units[3].tolist() == [11000000, 115]
+    assert columns.exponents[3].tolist() == [-6, -1]
+    assert not columns.close.flags.owndata
+
+    cached = PriceCache(csv_path).load(None)
+    assert cached.close.tolist() == [11.0, 11.5]
+
+
+def test_it_rebuilds_the_cache_when_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / 'ABC.csv')
+    _write_csv(csv_path, ['ABC,2023-04-10,10.5,11.25,10.0,11.0'])
+    PriceCache(csv_path).load(_read_csv)
+    _write_csv(csv_path, ['ABC,2023-04-10,10.5,11.25,10.0,11.0', 'ABC,2023-04-11,11.0,12.0,10.75,11.5'])
+    columns = PriceCache(csv_path).load(_read_csv)
+    assert len(columns.date) == 2
+
+
+def test_it_restamps_the_cache_when_the_csv_is_touched(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'ABC.csv')
+    _write_csv(csv_path, ['ABC,2023-04-10,10.5,11.25,10.0,11.0', 'ABC,2023-04-11,11.0,12.0,10.75,11.5'])
+    PriceCache(csv_path).load(_read_csv)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    hashes = []
+    sha256 = PriceCache._sha256
+    monkeypatch.setattr(PriceCache, '_sha256', lambda self: hashes.append(self) or sha256(self))
+
+    # the content did not change, so the cache is kept and only its stamp is rewritten
+    columns = PriceCache(csv_path).load(None)
+    assert columns.close.tolist() == [11.0, 11.5] and len(hashes) == 1
+    columns = PriceCache(csv_path).load(None)
+    assert columns.units[3].tolist() == [110, 115] and len(hashes) == 1
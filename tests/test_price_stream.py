@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from ..algofin.src.objects import Price
+from ..algofin.src.price_stream import PriceWindow, BARS, MINUTES
+from ..algofin.src.trading import BackTest
+
+
+def _minute_bars(days: [Price]) -> [Price]:
+    # the daily bars as contiguous minute bars, one a minute from 09:30
+    start = datetime(2023, 4, 10, 9, 30)
+    return [price._replace(date=(start + timedelta(minutes=i)).isoformat(' ', 'minutes'))
+            for i, price in enumerate(days)]
+
+
+def test_it_streams_the_same_results_as_the_daily_back_test():
+    back_test = BackTest()
+    strategy = back_test.strategies[1]
+    assert strategy.symbol == 'QQQ'
+    orders, trades, balances, summary = back_test._simulate_(strategy)
+    # the order and trade ids of each simulation follow on from the previous one
+    back_test.order_id_offset = back_test.trade_id_offset = 0
+    streamed = back_test._simulate_stream_(strategy, PriceWindow(back_test.dao.stream_prices('QQQ', 1000)), BARS)
+    assert [tuple(order) for order in streamed[0]] == [tuple(order) for order in orders]
+    assert streamed[1:] == (trades, balances, summary)
+
+
+def test_it_closes_the_orders_by_wall_time():
+    back_test = BackTest()
+    bars = _minute_bars(back_test.pricing_data['QQQ'][:2000])
+    strategy = back_test.strategies[1]._replace(start_date=bars[0].date, end_date=bars[1500].date)
+    in_bars = back_test._simulate_stream_(strategy, PriceWindow(iter(bars)), BARS)
+    back_test.order_id_offset = back_test.trade_id_offset = 0
+    in_minutes = back_test._simulate_stream_(strategy, PriceWindow(iter(bars)), MINUTES)
+    assert [tuple(order) for order in in_minutes[0]] == [tuple(order) for order in in_bars[0]]
+    assert in_minutes[1:] == in_bars[1:]
+    assert in_bars[2][-1].date == bars[1500].date
+    # a gap of an hour closes the open orders on the first bar after it
+    gapped = bars[:700] + [price._replace(date=(datetime.fromisoformat(price.date) + timedelta(hours=1))
+                                          .isoformat(' ', 'minutes')) for price in bars[700:]]
+    orders = back_test._simulate_stream_(strategy, PriceWindow(iter(gapped)), MINUTES)[0]
+    assert {order.close_date for order in orders if order.open_date < gapped[700].date <= order.close_date} == \
+        {gapped[700].date}
+
+
+def test_it_holds_a_window_of_the_stream():
+    window = PriceWindow(Price('QQQ', str(day), *[Decimal(1)] * 4, None) for day in range(10))
+    assert len(window) > 10
+    assert [price.day_index for price in window][-1] == 9
+    assert len(window) == 10 and len(window.window) <= 3
+    with pytest.raises(IndexError):
+        window[0]
+    with pytest.raises(ValueError):
+        BackTest()._simulate_stream_(BackTest().strategies[1], window, 'weeks')
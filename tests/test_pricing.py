@@ -0,0 +1,20 @@
+from ..algofin.src.dao import Dao
+from ..algofin.src.pricing import PricingData
+
+
+def test_it_loads_a_symbol_the_first_time_it_is_used():
+    pricing_data = PricingData(Dao())
+    assert 'QQQ' in pricing_data
+    assert 'XYZ' not in pricing_data
+    assert list(pricing_data.loaded) == []
+    assert pricing_data['QQQ'][0].date == '1999-03-10'
+    assert list(pricing_data.loaded) == ['QQQ']
+    assert pricing_data['QQQ'] is pricing_data['QQQ']
+
+
+def test_it_evicts_the_least_recently_used_symbol():
+    pricing_data = PricingData(Dao(), max_symbols=1, preload=['QQQ', 'RITM'])
+    assert list(pricing_data.loaded) == ['QQQ']
+    pricing_data['RITM']
+    assert list(pricing_data.loaded) == ['RITM']
+    assert len(pricing_data) == 2
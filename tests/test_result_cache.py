@@ -0,0 +1,70 @@
+import hashlib
+from ..algofin.src.objects import CachedResult
+from ..algofin.src.result_cache import ResultCache
+from ..algofin.src.rules import BuyAndHold
+from ..algofin.src.trading import BackTest
+from .test_rules import RoundTrip
+
+
+def _simulate_twice(back_test, strategies):
+    first = [back_test._simulate_cached_(strategy) for strategy in strategies]
+    back_test.order_id_offset = back_test.trade_id_offset = 0
+    second = [back_test._simulate_cached_(strategy) for strategy in strategies]
+    return first, second
+
+
+def test_it_keys_the_results_by_the_values_that_determine_them(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    strategy = BackTest().strategies[0]
+    key = cache.key(strategy, 10000, 'abc', 'decimal', 'full')
+    assert key == cache.key(strategy._replace(strategy_id=9, strategy_name='other'), 10000, 'abc', 'decimal', 'full')
+    assert key != cache.key(strategy, 20000, 'abc', 'decimal', 'full')
+    assert key != cache.key(strategy, 10000, 'abd', 'decimal', 'full')
+    assert key != cache.key(strategy, 10000, 'abc', 'vector')
+    with open('algofin/pricing_data/QQQ.csv', 'rb') as f:
+        assert BackTest().pricing_data.fingerprint('QQQ') == hashlib.sha256(f.read()).hexdigest()
+
+
+def test_it_returns_the_same_results_on_a_hit(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    back_test = BackTest(cache=cache)
+    first, second = _simulate_twice(back_test, back_test.strategies[:3])
+    assert (cache.hits, cache.misses) == (3, 3)
+    for (orders, trades, balances, summary), (cached_orders, cached_trades, cached_balances, cached_summary) in \
+            zip(first, second):
+        assert list(map(tuple, orders)) == list(map(tuple, cached_orders))
+        assert trades == cached_trades
+        assert balances == cached_balances
+        assert tuple(summary) == tuple(cached_summary)
+    assert second[1][0][0].order_id == len(first[0][0]) + 1
+
+    vector_back_test = BackTest(engine='vector', cache=cache)
+    balances = vector_back_test._simulate_vector_cached_(vector_back_test.strategies)
+    assert vector_back_test._simulate_vector_cached_(vector_back_test.strategies) == balances
+    assert balances == vector_back_test._simulate_vector_(vector_back_test.strategies)
+
+
+def test_it_evicts_the_least_recently_used_results(tmp_path):
+    result = CachedResult([], [], [], None, 0, 0)
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    cache.put({'a': result, 'b': result})
+    size = cache.size()[1] // 2
+    cache.max_bytes = 2 * size
+    cache.get(['a'])
+    cache.put({'c': result})
+    assert set(cache.get(['a', 'b', 'c'])) == {'a', 'c'}
+    assert cache.size() == (2, 2 * size)
+
+
+def test_it_keys_the_results_by_the_strategy_type(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    strategy = BackTest().strategies[0]._replace(start_date='2015-01-01', end_date='2016-01-01')
+    BackTest(cache=cache)._simulate_cached_(strategy)
+    for strategy_types in [{'limit': BuyAndHold()}, {'round trip': RoundTrip()}]:
+        custom = strategy._replace(trade_type=next(iter(strategy_types)))
+        simulated = BackTest(strategy_types=strategy_types)._simulate_(custom)
+        cached = BackTest(cache=cache, strategy_types=strategy_types)._simulate_cached_(custom)
+        assert simulated[1:] == cached[1:]
+        assert list(map(tuple, simulated[0])) == list(map(tuple, cached[0]))
+    # the round trip strategy type has no rule, so its strategies are not cached
+    assert (cache.hits, cache.misses) == (0, 2)
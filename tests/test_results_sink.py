@@ -0,0 +1,29 @@
+import pytest
+from ..algofin.src.results_sink import ResultsSink
+
+
+def _read(path):
+    with open(path, newline='') as f:
+        return f.read()
+
+
+def test_it_buffers_rows_until_the_buffer_is_full(tmp_path):
+    path = str(tmp_path / 'results')
+    sink = ResultsSink(path, buffer_rows=3)
+    sink.write('balances', [[1, 'a'], [2, 'b']])
+    assert _read(path + '/balances.csv') == ''
+    sink.write('strategies', [[1]])
+    assert _read(path + '/balances.csv') == '1,a\r\n2,b\r\n'
+    assert _read(path + '/strategies.csv') == '1\r\n'
+    sink.write('balances', [[3, 'c']])
+    sink.close()
+    assert _read(path + '/balances.csv') == '1,a\r\n2,b\r\n3,c\r\n'
+
+
+def test_it_writes_the_buffered_rows_when_a_run_raises(tmp_path):
+    path = str(tmp_path / 'results')
+    with pytest.raises(ValueError):
+        with ResultsSink(path) as sink:
+            sink.write('orders', [[1, 'buy']])
+            raise ValueError
+    assert _read(path + '/orders.csv') == '1,buy\r\n'
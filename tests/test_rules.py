@@ -0,0 +1,63 @@
+from decimal import Decimal
+import pytest
+from ..algofin.src.objects import OrderRequest, Rule
+from ..algofin.src.rules import StrategyType, RuleType
+from ..algofin.src.trading import BackTest, VECTOR
+
+
+class RoundTrip(StrategyType):
+    # buys 10 shares at the close when it has no shares or orders, and sells them 1% up
+    def on_bar(self, strategy, prices, trading_day, account, starting_balance, indicators):
+        if account.number_of_shares or account.order_balance:
+            return []
+        return [OrderRequest('buy', 10, prices[trading_day].close)]
+
+    def on_fill(self, strategy, order, trade):
+        return [OrderRequest('sell', trade.number_of_shares, trade.price * Decimal('1.01'))]
+
+
+class Dip(RuleType):
+    def rule(self, strategy):
+        return Rule(Decimal('0.97'), Decimal('1.06'), 2, Decimal('0.2'))
+
+
+def _strategy(trade_type):
+    return BackTest().strategies[0]._replace(trade_type=trade_type, start_date='2015-01-01', end_date='2016-01-01')
+
+
+def test_it_back_tests_the_hooks_of_a_strategy_type():
+    strategy_types = {'round trip': RoundTrip()}
+    strategy = _strategy('round trip')
+    orders, trades, balances, summary = BackTest(strategy_types=strategy_types)._simulate_(strategy)
+    assert len(trades) > 2
+    assert [order.buy_sell for order in orders[:4]] == ['buy', 'sell', 'buy', 'sell']
+    assert {order.number_of_shares for order in orders} == {10}
+    with pytest.raises(ValueError):
+        BackTest(engine=VECTOR, strategy_types=strategy_types)._simulate_vector_([strategy])
+    with pytest.raises(ValueError):
+        BackTest()._simulate_(strategy)
+
+
+def test_it_compiles_a_rule_to_the_vector_engine():
+    strategy_types = {'dip': Dip()}
+    strategy = _strategy('dip')
+    # the rule's order duration differs from the strategy's, 10
+    offsets = strategy._replace(trade_type='limit', buy_offset=Decimal('0.97'), sell_offset=Decimal('1.06'),
+                                order_duration=2, order_amount_ratio=Decimal('0.2'))
+    summary = BackTest(strategy_types=strategy_types)._simulate_(strategy)[3]
+    assert tuple(summary) == tuple(BackTest()._simulate_(offsets)[3])
+    ending_balance = BackTest(engine=VECTOR, strategy_types=strategy_types)._simulate_vector_([strategy])[1]
+    ending_total = ending_balance.order_balance + ending_balance.cash_balance + ending_balance.invested_balance
+    assert abs(ending_total - summary.ending_total) / summary.ending_total < Decimal('1e-9')
+    multi_summary = BackTest(engine='multi', strategy_types=strategy_types)._simulate_multi_([strategy])[0][3]
+    assert tuple(multi_summary) == tuple(summary)
+
+
+def test_it_holds_the_shares_of_a_buy_and_hold_strategy():
+    back_test = BackTest(engine='multi')
+    strategy = back_test.strategies[6]
+    assert strategy.trade_type == 'hold'
+    orders, trades, balances, summary = back_test._simulate_multi_([strategy])[0]
+    assert {order.buy_sell for order in orders} == {'buy'}
+    assert balances[-1].number_of_shares == sum(trade.number_of_shares for trade in trades)
+    assert tuple(summary) == tuple(BackTest()._simulate_(strategy)[3])
@@ -0,0 +1,26 @@
+from decimal import Decimal
+from ..algofin.src.objects import Balance
+from ..algofin.src.sqlite_sink import SqliteSink, read_sqlite, max_ending_balance, max_balance_at_anytime
+
+BALANCES = [Balance(1, '2023-04-10', 0, Decimal('10000'), 0, 0),
+            Balance(1, '2023-04-11', Decimal('0'), Decimal('0.5'), Decimal('12000.5'), 100),
+            Balance(1, '2023-04-12', Decimal('0'), Decimal('0.5'), Decimal('11000'), 100),
+            Balance(2, '2023-04-10', 0, Decimal('10000'), 0, 0),
+            Balance(2, '2023-04-11', Decimal('0'), Decimal('11000.5'), Decimal('0'), 0),
+            Balance(2, '2023-04-12', Decimal('0'), Decimal('12001'), Decimal('0'), 0)]
+
+
+def test_it_reads_the_rows_of_a_strategy(tmp_path):
+    with SqliteSink(str(tmp_path), buffer_rows=4) as sink:
+        sink.write('balances', BALANCES)
+    assert read_sqlite(str(tmp_path), 'balances', 2) == [(2, '2023-04-10', '0', '10000', '0', 0),
+                                                         (2, '2023-04-11', '0', '11000.5', '0', 0),
+                                                         (2, '2023-04-12', '0', '12001', '0', 0)]
+
+
+def test_it_finds_the_first_strategy_with_the_max_balance(tmp_path):
+    with SqliteSink(str(tmp_path)) as sink:
+        sink.write('balances', BALANCES)
+    assert max_ending_balance(str(tmp_path)) == (2, Decimal('12001'), BALANCES[5])
+    # strategy 2 ties the max of strategy 1 at anytime, the first one wins
+    assert max_balance_at_anytime(str(tmp_path)) == (1, Decimal('12001'), BALANCES[1])
@@ -0,0 +1,37 @@
+from decimal import Decimal
+from ..algofin.src.result_cache import ResultCache
+from ..algofin.src.sweep import Sweep
+from ..algofin.src.trading import BackTest
+
+
+def test_it_matches_the_serial_back_test():
+    # back tests can start within the same second, keep their results folders apart
+    serial_back_test = BackTest()
+    serial_back_test.dao.now += '_serial'
+    serial_back_test.implement_all_hard_coded_strategies()
+    parallel_back_test = BackTest()
+    parallel_back_test.dao.now += '_parallel'
+    Sweep(parallel_back_test, workers=2, chunk_size=3).implement_all_(parallel_back_test.strategies)
+    assert parallel_back_test.order_id_offset == serial_back_test.order_id_offset
+    assert parallel_back_test.trade_id_offset == serial_back_test.trade_id_offset
+    assert parallel_back_test.dao.get_strategies() == serial_back_test.dao.get_strategies()
+    assert parallel_back_test.dao.get_balances() == serial_back_test.dao.get_balances()
+    strategy_id, ending_balance, balance = parallel_back_test.get_max_strategy_ending_balance()
+    assert strategy_id == 1
+    assert ending_balance.quantize(Decimal('.000001')) == Decimal('245631.988283')
+
+
+def test_it_uses_the_cache_and_checkpoints_of_the_back_test(tmp_path):
+    strategies = BackTest().strategies[:4]
+    serial_back_test = BackTest(checkpoint=True)
+    serial_back_test.dao.now += '_serial_checkpoint'
+    serial_back_test.implement_all_(strategies)
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    for run in range(2):
+        parallel_back_test = BackTest(cache=cache, checkpoint=True)
+        parallel_back_test.dao.now += '_parallel_cache_' + str(run)
+        Sweep(parallel_back_test, workers=2, chunk_size=2).implement_all_(strategies)
+        assert parallel_back_test.results.summaries == serial_back_test.results.summaries
+        # the strategies whose results come from the cache have no checkpoint
+        assert parallel_back_test.checkpoints == (serial_back_test.checkpoints if run == 0 else dict())
+    assert (cache.hits, cache.misses) == (4, 4)
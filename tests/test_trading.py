@@ -1,4 +1,5 @@
 from decimal import Decimal
+from ..algofin.src.dao import Dao
 from ..algofin.src.trading import BackTest
 from ..algofin.src.objects import Balance
 
@@ -23,3 +24,89 @@ def test_it_finds_the_strategy_with_max_balance_at_anytime():
     assert balance == Balance(strategy_id=1, date='2023-05-01', order_balance=Decimal('9599.93112890'),
                               cash_balance=Decimal('188.9756901150'), invested_balance=Decimal('235843.081464'),
                               number_of_shares=732)
+
+
+def test_it_finds_the_first_trading_day_on_or_after_a_date():
+    back_test = BackTest()
+    prices = back_test.pricing_data['RITM']
+    assert back_test._get_trading_day(prices, '2013-05-02') == 0
+    assert back_test._get_trading_day(prices, '2013-05-04') == 2
+    assert back_test._get_trading_day(prices, '1999-05-01') == 0
+    assert back_test._get_trading_day(prices, '2024-01-01') == len(prices)
+
+
+def test_it_summarizes_the_balances_without_reading_the_results():
+    back_test = BackTest()
+    back_test.implement_all_hard_coded_strategies()
+    summary = back_test.results.summaries[1]
+    assert summary.ending_total.quantize(Decimal('.000001')) == Decimal('245631.988283')
+    assert summary.max_balance == summary.ending_balance
+    assert Decimal(0) < summary.max_drawdown < Decimal(1)
+    assert back_test.results.get_strategy(1) == back_test.strategies[0]
+
+
+def test_it_keeps_only_the_summary_balance_records():
+    back_test = BackTest()
+    back_test.implement_all_hard_coded_strategies()
+    summary_back_test = BackTest(history='summary')
+    summary_back_test.dao.now += '_summary'
+    summary_back_test.implement_all_hard_coded_strategies()
+    assert summary_back_test.results.summaries == back_test.results.summaries
+    assert len(summary_back_test.dao.get_balances(1)) == 2
+
+
+def test_it_resumes_strategies_from_their_checkpoints():
+    strategies = BackTest().strategies[3:5]
+    back_test = BackTest()
+    full = [back_test._simulate_(strategy) for strategy in strategies]
+
+    checkpoint_back_test = BackTest(checkpoint=True)
+    checkpoint_back_test.dao.now += '_checkpoint'
+    prices = checkpoint_back_test.pricing_data['RITM']
+    # the pricing data the checkpoints are taken with ends a few trading days after the checkpoints
+    checkpoint_back_test.pricing_data.loaded['RITM'] = prices[:2003]
+    checkpoint_back_test.implement_all_([strategy._replace(end_date=prices[2000].date) for strategy in strategies])
+    checkpoint_back_test.close()
+    checkpoints = Dao.load_checkpoints(checkpoint_back_test.dao.now)
+    assert [checkpoint.trading_day for checkpoint in checkpoints] == [2000, 2000]
+
+    # resumed twice, over 200 trading days and then to the end date
+    nightly_back_test = BackTest(checkpoint=True)
+    for checkpoint in checkpoints:
+        nightly_back_test._resume_(checkpoint, checkpoint.strategy._replace(end_date=prices[2200].date))
+    resumed_back_test = BackTest()
+    resumed = [resumed_back_test._resume_(checkpoint, strategy)
+               for checkpoint, strategy in zip(nightly_back_test.checkpoints.values(), strategies)]
+    assert (resumed_back_test.order_id_offset, resumed_back_test.trade_id_offset) == \
+        (back_test.order_id_offset, back_test.trade_id_offset)
+    for (orders, trades, balances, summary), (_, resumed_trades, resumed_balances, resumed_summary) in \
+            zip(full, resumed):
+        assert tuple(resumed_summary) == tuple(summary)
+        assert trades[len(trades) - len(resumed_trades):] == resumed_trades
+        assert balances[len(balances) - len(resumed_balances):] == resumed_balances
+
+
+def test_it_checkpoints_on_the_newest_trading_day_and_resumes_once_rows_are_appended():
+    strategies = BackTest().strategies[3:5]
+    checkpoint_back_test = BackTest(checkpoint=True)
+    prices = checkpoint_back_test.pricing_data['RITM']
+    end_date = prices[2200].date
+    back_test = BackTest()
+    full = [back_test._simulate_(strategy._replace(end_date=end_date)) for strategy in strategies]
+
+    # the nightly run ends on the newest row of the pricing data
+    checkpoint_back_test.pricing_data.loaded['RITM'] = prices[:2001]
+    for strategy in strategies:
+        checkpoint_back_test._simulate_(strategy._replace(end_date=prices[2000].date))
+    checkpoints = list(checkpoint_back_test.checkpoints.values())
+    assert [checkpoint.trading_day for checkpoint in checkpoints] == [1999, 1999]
+
+    # the next night the rows up to the end date are appended
+    resumed_back_test = BackTest()
+    resumed = [resumed_back_test._resume_(checkpoint, strategy._replace(end_date=end_date))
+               for checkpoint, strategy in zip(checkpoints, strategies)]
+    for (orders, trades, balances, summary), (_, resumed_trades, resumed_balances, resumed_summary) in \
+            zip(full, resumed):
+        assert tuple(resumed_summary) == tuple(summary)
+        assert trades[len(trades) - len(resumed_trades):] == resumed_trades
+        assert balances[len(balances) - len(resumed_balances):] == resumed_balances
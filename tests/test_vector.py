@@ -0,0 +1,35 @@
+from decimal import Decimal
+from ..algofin.src.trading import BackTest, VECTOR
+from ..algofin.src.vector import TOLERANCE
+
+
+def _assert_close(left: Decimal, right: Decimal):
+    assert abs(left - right) <= abs(right) * Decimal(1e-9)
+
+
+def test_it_matches_the_decimal_engine_ending_balance():
+    back_test = BackTest(engine=VECTOR)
+    back_test.implement_all_hard_coded_strategies()
+    strategy_id, ending_balance, balance = back_test.get_max_strategy_ending_balance()
+    assert strategy_id == 1
+    _assert_close(ending_balance, Decimal('245631.988283'))
+    assert balance.date == '2023-05-01'
+    assert balance.number_of_shares == 732
+    _assert_close(balance.cash_balance, Decimal('188.9756901150'))
+
+
+def test_it_matches_the_decimal_engine_for_every_strategy():
+    decimal_back_test = BackTest()
+    decimal_back_test.implement_all_hard_coded_strategies()
+    vector_back_test = BackTest(engine=VECTOR)
+    vector_back_test.implement_all_hard_coded_strategies()
+    decimal_summaries = decimal_back_test.results.summaries
+    vector_summaries = vector_back_test.results.summaries
+    assert decimal_summaries.keys() == vector_summaries.keys()
+    for strategy_id, decimal_summary in decimal_summaries.items():
+        vector_summary = vector_summaries[strategy_id]
+        _assert_close(vector_summary.ending_total, decimal_summary.ending_total)
+        _assert_close(vector_summary.max_total, decimal_summary.max_total)
+        assert vector_summary.ending_balance.number_of_shares == decimal_summary.ending_balance.number_of_shares
+        assert vector_summary.max_balance.date == decimal_summary.max_balance.date
+    assert TOLERANCE < 1e-9
@@ -0,0 +1,41 @@
+from decimal import Decimal
+import numpy as np
+import pytest
+from ..algofin.src.walk_forward import get_windows, walk_forward
+
+SPACE = {'symbol': ['QQQ'], 'order_amount_ratio': [Decimal('0.1'), Decimal('0.2')],
+         'buy_offset': [Decimal('0.95'), Decimal('0.99')], 'sell_offset': [Decimal('1.02'), Decimal('1.05')],
+         'order_duration': [10]}
+
+
+def test_it_splits_the_date_range_into_windows():
+    dates = np.array(['2020-01-0' + str(day) for day in range(1, 10)], dtype=np.bytes_)
+    assert get_windows(dates, '2020-01-02', '2020-01-08', 4, 2, 0.5) == [
+        (0, '2020-01-02', '2020-01-03', '2020-01-04', '2020-01-05'),
+        (1, '2020-01-04', '2020-01-05', '2020-01-06', '2020-01-07')]
+    # the last trading day is never the end of a window
+    assert len(get_windows(dates, '2020-01-01', '2020-01-31', 3, 2, 1 / 3)) == 3
+    with pytest.raises(ValueError):
+        get_windows(dates, '2020-01-01', '2020-01-31', 4, 1, 1)
+    # the test days of the windows would overlap
+    with pytest.raises(ValueError):
+        get_windows(dates, '2020-01-01', '2020-01-31', 4, 1, 0.5)
+
+
+def test_it_tests_the_optimized_strategy_of_each_window():
+    report = walk_forward('2010-01-01', '2012-01-01', 200, 150, 0.75, engine='vector', workers=1, space=SPACE)
+    assert [(window.train_start, window.test_end) for window in report.windows] == [
+        ('2010-01-04', '2010-10-18'), ('2010-08-09', '2011-05-23'), ('2011-03-14', '2011-12-23')]
+    assert (report.train_days, report.test_days) == (150, 50)
+    compounded = Decimal(1)
+    for window in report.windows:
+        assert window.train_end < window.test_start
+        compounded *= 1 + window.test_return
+    assert report.compounded_test_return == compounded - 1
+    assert report.mean_test_return == sum(window.test_return for window in report.windows) / 3
+
+
+def test_it_only_walks_forward_a_balance_objective():
+    with pytest.raises(ValueError):
+        walk_forward('2010-01-01', '2012-01-01', 200, 150, 0.75, engine='vector', workers=1, space=SPACE,
+                     objective='sharpe')